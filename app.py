@@ -1,431 +1,466 @@
 import os
-import re
-import random
-import platform
-from scipy.io.wavfile import write
-from scipy.io.wavfile import read
-import numpy as np
+import time
+# Measured from here so the startup time below includes every import
+startup = time.perf_counter()
 import gradio as gr
-import yt_dlp
-import subprocess
+import uvicorn
+from fastapi import FastAPI
 from argparse import ArgumentParser
 from gradio_i18n import Translate
 from gradio_i18n import gettext as _
 import assets.themes.loadThemes as loadThemes
+from core.worker import get_worker, stem_name
+from core.pinning import spawn_entry
+from core.models import roformer_models, mdx23c_models, mdxnet_models, vrarch_models, demucs_models, all_models, output_format, mdxnet_overlap_values, vrarch_window_size_values, demucs_overlap_values, extensions
+from core.models import roformer_params, mdx23c_params, mdxnet_params, vrarch_params, demucs_params, model_arch
+from core.batch import BatchEngine, BatchProgress, batch_message, find_audio_files, longest_first, parse_globs, probe_durations
+from core.model_index import ModelIndex, start_warm_up
+from core.stem_cache import StemCache
+from core.silence import with_silence
+from core.fingerprint import Duplicates
+from core.retention import RetentionManager
+from core.jobs import Job
+from core.api import create_router
+from core.metrics import create_metrics_router
+from core.streaming import stream_separate
+from core.manifest import Manifest
+from core.watch import FolderWatcher
+from core.pipeline import parse_steps, run_pipeline
+from core.ensemble import ensemble, ensemble_methods
+from core.audio import read_audio, write_stem
+from core.download import download_audio, expand_links, parse_links, separate_links
+import json
 
 if __name__ == "__main__":
+   # Batch workers and calibration runs are spawned processes, they must not run this file again (args only exists here)
+   spawn_entry()
    parser = ArgumentParser(description="Separate audio into multiple stems")
    parser.add_argument("--share", action="store_true", dest="share_enabled", default=False, help="Enable sharing")
    parser.add_argument('--listen-port', type=int, help="The listening port that the server will use.")
+   parser.add_argument("--api", action="store_true", default=False, help="Serve the HTTP job API under /api next to the UI (not available with --share).")
+   parser.add_argument("--metrics", action="store_true", default=False, help="Serve Prometheus metrics on /metrics next to the UI (not available with --share).")
+   parser.add_argument("--concurrency-limit", type=int, default=1, help="Default number of requests Gradio runs at the same time for each event.")
+   parser.add_argument("--separate-concurrency", type=int, help="Single-file separations that can run at the same time, shared by all tabs (defaults to --concurrency-limit).")
+   parser.add_argument("--batch-concurrency", type=int, help="Batch separations that can run at the same time, shared by all tabs (defaults to --concurrency-limit).")
+   parser.add_argument("--separator-threads", type=int, default=1, help="Separations the resident worker runs in parallel (jobs for the same model always run one at a time).")
+   parser.add_argument("--batch-workers", type=int, default=1, help="Number of worker processes used for batch separation, with more than one the models of an ensemble also run at once.")
+   parser.add_argument("--encoder-workers", type=int, default=2, help="Threads encoding stems in the background, the next separation starts while the previous stems are being written.")
+   parser.add_argument("--download-workers", type=int, default=2, help="Links downloaded at the same time when separating several links, the next download starts as soon as a separation finishes.")
+   parser.add_argument("--batch-threads", type=int, help="Intra-op threads per batch worker (defaults to the available cores divided by the number of workers).")
+   parser.add_argument("--stem-cache-size", type=float, default=10, help="Disk budget in GB for cached stems of already separated audio (0 disables the cache).")
+   parser.add_argument("--warm-models", nargs="*", help="Models loaded in the background at startup so the first separation doesn't wait for them (defaults to the model used last, pass no names to disable).")
+   parser.add_argument("--model-cache-size", type=float, default=4, help="Memory budget in GB for the models kept loaded between separations.")
+   parser.add_argument("--memory-budget", type=float, help="Memory in GB an auto segment size may use for one separation (defaults to most of the free memory).")
+   parser.add_argument("--retention-size", type=float, default=0, help="Disk budget in GB for the job folders and downloads the app created in inputs, outputs and ytdl, the least recently used are removed first (0, the default, disables the limit).")
+   parser.add_argument("--retention-days", type=float, default=0, help="Remove the job folders and downloads the app created that weren't used for this many days (0, the default, disables the limit).")
    args = parser.parse_args()
 
-roformer_models = {
-        'BS-Roformer-Viperx-1297.ckpt': 'model_bs_roformer_ep_317_sdr_12.9755.ckpt',
-        'BS-Roformer-Viperx-1296.ckpt': 'model_bs_roformer_ep_368_sdr_12.9628.ckpt',
-        'BS-Roformer-Viperx-1053.ckpt': 'model_bs_roformer_ep_937_sdr_10.5309.ckpt',
-        'Mel-Roformer-Viperx-1143.ckpt': 'model_mel_band_roformer_ep_3005_sdr_11.4360.ckpt',
-        'BS-Roformer-De-Reverb-Anvuew': 'deverb_bs_roformer_8_384dim_10depth.ckpt',
-        'Mel-Roformer-Crowd-Aufr33-Viperx': 'mel_band_roformer_crowd_aufr33_viperx_sdr_8.7144.ckpt',
-        'Mel-Roformer-Denoise-Aufr33': 'denoise_mel_band_roformer_aufr33_sdr_27.9959.ckpt',
-        'Mel-Roformer-Denoise-Aufr33-Aggr' : 'denoise_mel_band_roformer_aufr33_aggr_sdr_27.9768.ckpt',
-        'Mel-Roformer-Karaoke-Aufr33-Viperx': 'mel_band_roformer_karaoke_aufr33_viperx_sdr_10.1956.ckpt'
-}
-
-mdx23c_models = [
-    'MDX23C_D1581.ckpt',
-    'MDX23C-8KFFT-InstVoc_HQ.ckpt',
-    'MDX23C-8KFFT-InstVoc_HQ_2.ckpt',
-]
+directory = "outputs"
 
-mdxnet_models = [
-    'UVR-MDX-NET-Inst_full_292.onnx',
-    'UVR-MDX-NET_Inst_187_beta.onnx',
-    'UVR-MDX-NET_Inst_82_beta.onnx',
-    'UVR-MDX-NET_Inst_90_beta.onnx',
-    'UVR-MDX-NET_Main_340.onnx',
-    'UVR-MDX-NET_Main_390.onnx',
-    'UVR-MDX-NET_Main_406.onnx',
-    'UVR-MDX-NET_Main_427.onnx',
-    'UVR-MDX-NET_Main_438.onnx',
-    'UVR-MDX-NET-Inst_HQ_1.onnx',
-    'UVR-MDX-NET-Inst_HQ_2.onnx',
-    'UVR-MDX-NET-Inst_HQ_3.onnx',
-    'UVR-MDX-NET-Inst_HQ_4.onnx',
-    'UVR_MDXNET_Main.onnx',
-    'UVR-MDX-NET-Inst_Main.onnx',
-    'UVR_MDXNET_1_9703.onnx',
-    'UVR_MDXNET_2_9682.onnx',
-    'UVR_MDXNET_3_9662.onnx',
-    'UVR-MDX-NET-Inst_1.onnx',
-    'UVR-MDX-NET-Inst_2.onnx',
-    'UVR-MDX-NET-Inst_3.onnx',
-    'UVR_MDXNET_KARA.onnx',
-    'UVR_MDXNET_KARA_2.onnx',
-    'UVR_MDXNET_9482.onnx',
-    'UVR-MDX-NET-Voc_FT.onnx',
-    'Kim_Vocal_1.onnx',
-    'Kim_Vocal_2.onnx',
-    'Kim_Inst.onnx',
-    'Reverb_HQ_By_FoxJoy.onnx',
-    'UVR-MDX-NET_Crowd_HQ_1.onnx',
-    'kuielab_a_vocals.onnx',
-    'kuielab_a_other.onnx',
-    'kuielab_a_bass.onnx',
-    'kuielab_a_drums.onnx',
-    'kuielab_b_vocals.onnx',
-    'kuielab_b_other.onnx',
-    'kuielab_b_bass.onnx',
-    'kuielab_b_drums.onnx',
-]
+os.makedirs("outputs", exist_ok=True)
+os.makedirs("inputs", exist_ok=True)
+os.makedirs("ytdl", exist_ok=True)
+os.makedirs("models", exist_ok=True)
 
-vrarch_models = [
-    '1_HP-UVR.pth',
-    '2_HP-UVR.pth',
-    '3_HP-Vocal-UVR.pth',
-    '4_HP-Vocal-UVR.pth',
-    '5_HP-Karaoke-UVR.pth',
-    '6_HP-Karaoke-UVR.pth',
-    '7_HP2-UVR.pth',
-    '8_HP2-UVR.pth',
-    '9_HP2-UVR.pth',
-    '10_SP-UVR-2B-32000-1.pth',
-    '11_SP-UVR-2B-32000-2.pth',
-    '12_SP-UVR-3B-44100.pth',
-    '13_SP-UVR-4B-44100-1.pth',
-    '14_SP-UVR-4B-44100-2.pth',
-    '15_SP-UVR-MID-44100-1.pth',
-    '16_SP-UVR-MID-44100-2.pth',
-    '17_HP-Wind_Inst-UVR.pth',
-    'UVR-De-Echo-Aggressive.pth',
-    'UVR-De-Echo-Normal.pth',
-    'UVR-DeEcho-DeReverb.pth',
-    'UVR-DeNoise-Lite.pth',
-    'UVR-DeNoise.pth',
-    'UVR-BVE-4B_SN-44100-1.pth',
-    'MGM_HIGHEND_v4.pth',
-    'MGM_LOWEND_A_v4.pth',
-    'MGM_LOWEND_B_v4.pth',
-    'MGM_MAIN_v4.pth',
+worker = get_worker(model_cache_size=int(args.model_cache_size * 1024 ** 3), threads=args.separator_threads, encoder_workers=args.encoder_workers, memory_budget=int(args.memory_budget * 1024 ** 3) if args.memory_budget else None)
+worker.models.register(all_models)
+model_index = ModelIndex()
+worker.index = model_index
+start_warm_up(worker, model_index, args.warm_models)
+stem_cache = StemCache(os.path.join(directory, "cache"), max_size=int(args.stem_cache_size * 1024 ** 3))
+batch = BatchEngine(workers=args.batch_workers, threads=args.batch_threads, model_cache_size=int(args.model_cache_size * 1024 ** 3))
+retention = RetentionManager(
+  {"inputs": "inputs", "outputs": directory, "ytdl": "ytdl"},
+  max_size=int(args.retention_size * 1024 ** 3),
+  max_age=args.retention_days * 24 * 3600,
+  exclude=[stem_cache.root],
+).start()
+
+def model_choices(models):
+  # Labels flag the models already downloaded and the ones already loaded, the value stays the model name
+  loaded = set(worker.models.stats()["models"])
+  choices = []
+
+  for name, model in models.items():
+    if model in loaded:
+      choices.append((f"{name} ⚡", name))
+    elif model_index.available(model):
+      choices.append((f"{name} ✓", name))
+    else:
+      choices.append((name, name))
+
+  return choices
+
+tab_models = [
+  roformer_models,
+  {model: model for model in mdx23c_models},
+  {model: model for model in mdxnet_models},
+  {model: model for model in vrarch_models},
+  {model: model for model in demucs_models},
 ]
 
-demucs_models = [
-    'htdemucs_ft.yaml', 
-    'htdemucs.yaml',
-    'hdemucs_mmi.yaml',
-]
+def refresh_model_choices():
+  return [gr.update(choices=model_choices(models)) for models in tab_models]
 
-output_format = [
-    'wav',
-    'flac',
-    'mp3',
-]
+def separate_audio(job, audio, model, output_format, params, skip_silence=False, progress=None):
+  job.timer.model = model
 
-mdxnet_overlap_values = [
-    '0.25',
-    '0.5',
-    '0.75',
-    '0.99',
-]
+  with job.timer.stage("cache_lookup"):
+    key = stem_cache.file_key(audio, model, output_format, with_silence(params, skip_silence))
+    cached_files = stem_cache.get(key)
 
-vrarch_window_size_values = [
-    '320',
-    '512',
-    '1024',
-]
+  if cached_files:
+    return cached_files
 
-demucs_overlap_values = [
-    '0.25',
-    '0.50',
-    '0.75',
-    '0.99',
-]
+  # The upload goes to the separator as it is, the separator is the only one decoding it
+  job.input_file = audio
+  output_dir = stem_cache.entry_dir(key) if stem_cache.enabled else job.output_dir
+  output_files = worker.separate(job.input_file, model, output_dir, output_format, params, timer=job.timer, skip_silence=skip_silence, progress=progress)
 
-files_list = []
-found_files = []
-logs = []
-directory = "outputs"
-extensions = (".mp3", ".wav", ".flac")
+  with job.timer.stage("cache_store"):
+    return stem_cache.put(key, output_files)
 
-os.makedirs("outputs", exist_ok=True)
-os.makedirs("inputs", exist_ok=True)
-os.makedirs("ytdl", exist_ok=True)
-os.makedirs("models", exist_ok=True)
+def stem_outputs(files, count):
+  outputs = [gr.update(value=file, label=stem_name(file)) for file in files[:count]]
+  return outputs + [gr.update(value=None) for _ in range(count - len(outputs))]
 
-if os.path.isdir("env"):
-    if platform.system() == "Windows":
-        separator_location = ".\\env\\Scripts\\audio-separator.exe"
-    elif platform.system() == "Linux":
-        separator_location = "env/bin/audio-separator"
-else:
-    separator_location = "audio-separator"
-
-def download_audio(url):
-    ydl_opts = {
-        'format': 'bestaudio/best',
-        'outtmpl': 'ytdl/%(title)s.%(ext)s',
-        'postprocessors': [{
-            'key': 'FFmpegExtractAudio',
-            'preferredcodec': 'wav',
-            'preferredquality': '192',
-        }],
-    }
+def stream_audio(audio, model, output_format, params, count):
+  job = Job(output_root=directory, handler="stream")
 
-    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-        info_dict = ydl.extract_info(url, download=True)
-        file_path = ydl.prepare_filename(info_dict).rsplit('.', 1)[0] + '.wav'
-        sample_rate, audio_data = read(file_path)
-        audio_array = np.asarray(audio_data, dtype=np.int16)
+  with job.timer:
+    job.input_file = audio
+    stems = []
 
-        return sample_rate, audio_array
+    for chunk in stream_separate(worker, job.input_file, model, job.output_dir, output_format, params, timer=job.timer):
+      stems.extend(stem for stem in chunk if stem not in stems)
+      yield tuple(chunk.get(stem) for stem in stems[:count]) + (None,) * (count - len(stems[:count]))
 
-def random_id_generator():
-    random_id = str(random.randint(10000, 99999))
-    return random_id
+def roformer_separator(roformer_audio, roformer_model, roformer_output_format, roformer_overlap, roformer_segment_size, roformer_auto_segment, roformer_skip_silence, progress=gr.Progress()):
+  job = Job(output_root=directory, handler="roformer")
 
-def roformer_separator(roformer_audio, roformer_model, roformer_output_format, roformer_overlap, roformer_segment_size):
-  global files_list
-  files_list.clear()
-  pattern = random_id_generator()
-  write(f'inputs/{pattern}.wav', roformer_audio[0], roformer_audio[1])
-  full_roformer_model = roformer_models[roformer_model]
-  prompt = f"{separator_location} ./inputs/{pattern}.wav --model_filename {full_roformer_model} --output_dir=./outputs --output_format={roformer_output_format} --normalization=0.9 --mdxc_overlap={roformer_overlap} --mdxc_segment_size={roformer_segment_size} --model_file_dir=./models"
-  os.system(prompt)
+  with job.timer:
+    full_roformer_model = roformer_models[roformer_model]
+    params = roformer_params(roformer_overlap, "auto" if roformer_auto_segment else roformer_segment_size)
+    job.files.extend(separate_audio(job, roformer_audio, full_roformer_model, roformer_output_format, params, roformer_skip_silence, progress))
+
+    with job.timer.stage("outputs"):
+      stem1_file, stem2_file = stem_outputs(job.files, 2)
 
-  for file in os.listdir(directory):
-    if re.search(pattern, file):
-      files_list.append(os.path.join(directory, file))
+  return stem1_file, stem2_file
+
+def mdxc_separator(mdx23c_audio, mdx23c_model, mdx23c_output_format, mdx23c_segment_size, mdx23c_overlap, mdx23c_denoise, mdx23c_auto_segment, mdx23c_skip_silence, progress=gr.Progress()):
+  job = Job(output_root=directory, handler="mdx23c")
 
-  stem1_file = files_list[0]
-  stem2_file = files_list[1]
+  with job.timer:
+    params = mdx23c_params(mdx23c_overlap, "auto" if mdx23c_auto_segment else mdx23c_segment_size, mdx23c_denoise)
+    job.files.extend(separate_audio(job, mdx23c_audio, mdx23c_model, mdx23c_output_format, params, mdx23c_skip_silence, progress))
+
+    with job.timer.stage("outputs"):
+      stem1_file, stem2_file = stem_outputs(job.files, 2)
 
   return stem1_file, stem2_file
 
-def mdxc_separator(mdx23c_audio, mdx23c_model, mdx23c_output_format, mdx23c_segment_size, mdx23c_overlap, mdx23c_denoise):
-  global files_list
-  files_list.clear()
-  pattern = random_id_generator()
-  write(f'inputs/{pattern}.wav', mdx23c_audio[0], mdx23c_audio[1])
-  prompt = f"{separator_location} ./inputs/{pattern}.wav --model_filename {mdx23c_model} --output_dir=./outputs --output_format={mdx23c_output_format} --normalization=0.9 --mdxc_segment_size={mdx23c_segment_size} --mdxc_overlap={mdx23c_overlap} --model_file_dir=./models"
-  
-  if mdx23c_denoise:
-    prompt += " --mdx_enable_denoise"
-  
-  os.system(prompt)
-
-  for file in os.listdir(directory):
-    if re.search(pattern, file):
-      files_list.append(os.path.join(directory, file))
-
-  stem1_file = files_list[0]
-  stem2_file = files_list[1]
+def mdxnet_separator(mdxnet_audio, mdxnet_model, mdxnet_output_format, mdxnet_segment_size, mdxnet_overlap, mdxnet_denoise, mdxnet_skip_silence, progress=gr.Progress()):
+  job = Job(output_root=directory, handler="mdxnet")
+
+  with job.timer:
+    params = mdxnet_params(mdxnet_overlap, mdxnet_segment_size, mdxnet_denoise)
+    job.files.extend(separate_audio(job, mdxnet_audio, mdxnet_model, mdxnet_output_format, params, mdxnet_skip_silence, progress))
+
+    with job.timer.stage("outputs"):
+      stem1_file, stem2_file = stem_outputs(job.files, 2)
 
   return stem1_file, stem2_file
 
-def mdxnet_separator(mdxnet_audio, mdxnet_model, mdxnet_output_format, mdxnet_segment_size, mdxnet_overlap, mdxnet_denoise):
-  global files_list
-  files_list.clear()
-  pattern = random_id_generator()
-  write(f'inputs/{pattern}.wav', mdxnet_audio[0], mdxnet_audio[1])
-  prompt = f"{separator_location} ./inputs/{pattern}.wav --model_filename {mdxnet_model} --output_dir=./outputs --output_format={mdxnet_output_format} --normalization=0.9 --mdx_segment_size={mdxnet_segment_size} --mdx_overlap={mdxnet_overlap} --model_file_dir=./models"
-  
-  if mdxnet_denoise:
-    prompt += " --mdx_enable_denoise"
-  
-  os.system(prompt)
-
-  for file in os.listdir(directory):
-    if re.search(pattern, file):
-      files_list.append(os.path.join(directory, file))
-
-  stem1_file = files_list[0]
-  stem2_file = files_list[1]
+def vrarch_separator(vrarch_audio, vrarch_model, vrarch_output_format, vrarch_window_size, vrarch_agression, vrarch_tta, vrarch_high_end_process, vrarch_skip_silence, progress=gr.Progress()):
+  job = Job(output_root=directory, handler="vrarch")
+
+  with job.timer:
+    params = vrarch_params(vrarch_window_size, vrarch_agression, vrarch_tta, vrarch_high_end_process)
+    job.files.extend(separate_audio(job, vrarch_audio, vrarch_model, vrarch_output_format, params, vrarch_skip_silence, progress))
+
+    with job.timer.stage("outputs"):
+      stem1_file, stem2_file = stem_outputs(job.files, 2)
 
   return stem1_file, stem2_file
 
-def vrarch_separator(vrarch_audio, vrarch_model, vrarch_output_format, vrarch_window_size, vrarch_agression, vrarch_tta, vrarch_high_end_process):
-  global files_list
-  files_list.clear()
-  pattern = random_id_generator()
-  write(f'inputs/{pattern}.wav', vrarch_audio[0], vrarch_audio[1])
-  prompt = f"{separator_location} ./inputs/{pattern}.wav --model_filename {vrarch_model} --output_dir=./outputs --output_format={vrarch_output_format} --normalization=0.9 --vr_window_size={vrarch_window_size} --vr_aggression={vrarch_agression} --model_file_dir=./models"
-  
-  if vrarch_tta:
-    prompt += " --vr_enable_tta"
-  if vrarch_high_end_process:
-    prompt += " --vr_high_end_process"
+def demucs_separator(demucs_audio, demucs_model, demucs_output_format, demucs_shifts, demucs_overlap, demucs_skip_silence, progress=gr.Progress()):
+  job = Job(output_root=directory, handler="demucs")
 
-  os.system(prompt)
+  with job.timer:
+    params = demucs_params(demucs_shifts, demucs_overlap)
+    job.files.extend(separate_audio(job, demucs_audio, demucs_model, demucs_output_format, params, demucs_skip_silence, progress))
 
-  for file in os.listdir(directory):
-    if re.search(pattern, file):
-      files_list.append(os.path.join(directory, file))
+    with job.timer.stage("outputs"):
+      stem1_file, stem2_file, stem3_file, stem4_file = stem_outputs(job.files, 4)
 
-  stem1_file = files_list[0]
-  stem2_file = files_list[1]
+  return stem1_file, stem2_file, stem3_file, stem4_file
 
-  return stem1_file, stem2_file
+def roformer_stream(roformer_audio, roformer_model, roformer_output_format, roformer_overlap, roformer_segment_size, roformer_auto_segment):
+  full_roformer_model = roformer_models[roformer_model]
+  params = roformer_params(roformer_overlap, "auto" if roformer_auto_segment else roformer_segment_size)
+  yield from stream_audio(roformer_audio, full_roformer_model, roformer_output_format, params, 2)
 
-def demucs_separator(demucs_audio, demucs_model, demucs_output_format, demucs_shifts, demucs_overlap):
-  global files_list
-  files_list.clear()
-  pattern = random_id_generator()
-  write(f'inputs/{pattern}.wav', demucs_audio[0], demucs_audio[1])
-  prompt = f"{separator_location} ./inputs/{pattern}.wav --model_filename {demucs_model} --output_dir=./outputs --output_format={demucs_output_format} --normalization=0.9 --demucs_shifts={demucs_shifts} --demucs_overlap={demucs_overlap} --model_file_dir=./models"
+def mdxc_stream(mdx23c_audio, mdx23c_model, mdx23c_output_format, mdx23c_segment_size, mdx23c_overlap, mdx23c_denoise, mdx23c_auto_segment):
+  params = mdx23c_params(mdx23c_overlap, "auto" if mdx23c_auto_segment else mdx23c_segment_size, mdx23c_denoise)
+  yield from stream_audio(mdx23c_audio, mdx23c_model, mdx23c_output_format, params, 2)
 
-  os.system(prompt)
+def mdxnet_stream(mdxnet_audio, mdxnet_model, mdxnet_output_format, mdxnet_segment_size, mdxnet_overlap, mdxnet_denoise):
+  params = mdxnet_params(mdxnet_overlap, mdxnet_segment_size, mdxnet_denoise)
+  yield from stream_audio(mdxnet_audio, mdxnet_model, mdxnet_output_format, params, 2)
 
-  for file in os.listdir(directory):
-    if re.search(pattern, file):
-      files_list.append(os.path.join(directory, file))
+def vrarch_stream(vrarch_audio, vrarch_model, vrarch_output_format, vrarch_window_size, vrarch_agression, vrarch_tta, vrarch_high_end_process):
+  params = vrarch_params(vrarch_window_size, vrarch_agression, vrarch_tta, vrarch_high_end_process)
+  yield from stream_audio(vrarch_audio, vrarch_model, vrarch_output_format, params, 2)
+
+def demucs_stream(demucs_audio, demucs_model, demucs_output_format, demucs_shifts, demucs_overlap):
+  params = demucs_params(demucs_shifts, demucs_overlap)
+  yield from stream_audio(demucs_audio, demucs_model, demucs_output_format, params, 4)
+
+def batch_files(job, manifest, file_paths, model, path_input, path_output, output_format, params, progress=None, skip_silence=False, duplicates=None, report=None):
+  for event, file_path, result in batch.run(file_paths, model, path_output, output_format, params, input_root=path_input, skip_silence=skip_silence):
+    with job.timer.stage("manifest"):
+      if event == "processed":
+        manifest.record(file_path, stems=result)
+      elif event == "failed":
+        manifest.record(file_path, error=result)
+
+    job.logs.append(batch_message(event, file_path, result))
+
+    if event == "processed" and duplicates is not None:
+      for copy, stems in duplicates.link(file_path, result, path_input, path_output).items():
+        manifest.record(copy, stems=stems)
+        job.logs.append(batch_message("duplicate", copy, file_path))
+
+    if progress is None:
+      yield "\n".join(job.logs)
+      continue
+
+    if event != "processing":
+      progress.update(file_path)
+
+    if report is not None:
+      report(progress.fraction(), desc=progress.message())
+
+    # The estimate is only shown under the log, it changes with every file
+    yield "\n".join(job.logs + [progress.message()])
+
+def run_batch(path_input, path_output, model, output_format, params, recursive=False, include="", exclude="", skip_silence=False, dedup=False, report=None):
+  job = Job(output_root=directory, handler="batch")
+  job.timer.model = model
+
+  with job.timer:
+    with job.timer.stage("scan_input"):
+      job.found_files.extend(find_audio_files(path_input, recursive, parse_globs(include), parse_globs(exclude), skip=[path_output]))
+      total_files = len(job.found_files)
+
+    if total_files == 0:
+      job.logs.append("No valid audio files.")
+      yield "\n".join(job.logs)
+    else:
+      job.logs.append(f"{total_files} audio files found")
+
+      with job.timer.stage("manifest"):
+        manifest = Manifest(path_output, model, output_format, with_silence(params, skip_silence))
+        file_paths = [os.path.join(path_input, audio_files) for audio_files in job.found_files]
+        file_paths = [file_path for file_path in file_paths if manifest.needs_processing(file_path)]
+
+      if len(file_paths) < total_files:
+        job.logs.append(f"{total_files - len(file_paths)} files already processed with these settings, skipping them")
+        yield "\n".join(job.logs)
+
+      with job.timer.stage("probe_durations"):
+        durations = probe_durations(file_paths)
+
+      duplicates = None
+
+      if dedup:
+        with job.timer.stage("fingerprint"):
+          duplicates = Duplicates(file_paths, durations)
+          file_paths = duplicates.unique()
+
+        if duplicates.copies:
+          job.logs.append(f"{len(durations) - len(file_paths)} files are copies of another one, they'll get its stems")
+
+      # Before the first file is done the estimate comes from previous runs of the model with these settings
+      progress = BatchProgress({file_path: durations[file_path] for file_path in file_paths}, batch.seconds_per_second(model, params))
+
+      if report is not None:
+        report(0, desc=progress.message())
+
+      yield "\n".join(job.logs + [progress.message()])
+      yield from batch_files(job, manifest, longest_first(file_paths, durations), model, path_input, path_output, output_format, params, progress, skip_silence, duplicates, report)
+
+      if duplicates is not None and duplicates.copies:
+        job.logs.extend(duplicates.summary(progress.seconds_per_audio_second()))
+        yield "\n".join(job.logs)
+
+def watch_batch(path_input, path_output, model, output_format, params, skip_silence=False):
+  manifest = Manifest(path_output, model, output_format, with_silence(params, skip_silence))
+  watcher = FolderWatcher(path_input, extensions)
+  job = Job(output_root=directory, handler="watch")
+  job.timer.model = model
+
+  try:
+    with job.timer:
+      job.logs.append(f"Watching {path_input} for new audio files ({watcher.mode})")
+      yield "\n".join(job.logs)
+
+      for file_paths in watcher.batches():
+        file_paths = [file_path for file_path in file_paths if manifest.needs_processing(file_path)]
+        yield from batch_files(job, manifest, file_paths, model, path_input, path_output, output_format, params, skip_silence=skip_silence)
+        # Also yields while idle so a stop request is handled within one poll interval
+        yield "\n".join(job.logs)
+  finally:
+    watcher.close()
+
+def roformer_batch(path_input, path_output, model, output_format, overlap, segment_size, auto_segment, recursive, include, exclude, skip_silence, dedup, progress=gr.Progress()):
+  params = roformer_params(overlap, "auto" if auto_segment else segment_size)
+  yield from run_batch(path_input, path_output, roformer_models[model], output_format, params, recursive, include, exclude, skip_silence, dedup, progress)
+
+def mdx23c_batch(path_input, path_output, model, output_format, overlap, segment_size, denoise, auto_segment, recursive, include, exclude, skip_silence, dedup, progress=gr.Progress()):
+  params = mdx23c_params(overlap, "auto" if auto_segment else segment_size, denoise)
+  yield from run_batch(path_input, path_output, model, output_format, params, recursive, include, exclude, skip_silence, dedup, progress)
+
+def mdxnet_batch(path_input, path_output, model, output_format, overlap, segment_size, denoise, recursive, include, exclude, skip_silence, dedup, progress=gr.Progress()):
+  params = mdxnet_params(overlap, segment_size, denoise)
+  yield from run_batch(path_input, path_output, model, output_format, params, recursive, include, exclude, skip_silence, dedup, progress)
+
+def vrarch_batch(path_input, path_output, model, output_format, window_size, agression, tta, high_end_process, recursive, include, exclude, skip_silence, dedup, progress=gr.Progress()):
+  params = vrarch_params(window_size, agression, tta, high_end_process)
+  yield from run_batch(path_input, path_output, model, output_format, params, recursive, include, exclude, skip_silence, dedup, progress)
+
+def demucs_batch(path_input, path_output, model, output_format, shifts, overlap, recursive, include, exclude, skip_silence, dedup, progress=gr.Progress()):
+  params = demucs_params(shifts, overlap)
+  yield from run_batch(path_input, path_output, model, output_format, params, recursive, include, exclude, skip_silence, dedup, progress)
+
+def roformer_watch(path_input, path_output, model, output_format, overlap, segment_size, auto_segment, skip_silence):
+  params = roformer_params(overlap, "auto" if auto_segment else segment_size)
+  yield from watch_batch(path_input, path_output, roformer_models[model], output_format, params, skip_silence)
+
+def mdx23c_watch(path_input, path_output, model, output_format, overlap, segment_size, denoise, auto_segment, skip_silence):
+  params = mdx23c_params(overlap, "auto" if auto_segment else segment_size, denoise)
+  yield from watch_batch(path_input, path_output, model, output_format, params, skip_silence)
+
+def mdxnet_watch(path_input, path_output, model, output_format, overlap, segment_size, denoise, skip_silence):
+  params = mdxnet_params(overlap, segment_size, denoise)
+  yield from watch_batch(path_input, path_output, model, output_format, params, skip_silence)
+
+def vrarch_watch(path_input, path_output, model, output_format, window_size, agression, tta, high_end_process, skip_silence):
+  params = vrarch_params(window_size, agression, tta, high_end_process)
+  yield from watch_batch(path_input, path_output, model, output_format, params, skip_silence)
+
+def demucs_watch(path_input, path_output, model, output_format, shifts, overlap, skip_silence):
+  params = demucs_params(shifts, overlap)
+  yield from watch_batch(path_input, path_output, model, output_format, params, skip_silence)
+
+def run_links(links, model, output_format, params, skip_silence=False):
+  job = Job(output_root=directory, handler="links")
+  job.timer.model = model
+
+  with job.timer:
+    with job.timer.stage("expand_links"):
+      try:
+        urls = expand_links(parse_links(links or ""))
+      except Exception as e:
+        raise gr.Error(str(e))
+
+    if not urls:
+      job.logs.append("No links found.")
+      yield "\n".join(job.logs)
+      return
+
+    job.logs.append(f"{len(urls)} links found")
+    yield "\n".join(job.logs)
+
+    # Downloads keep running while the separator works on the links that are already on disk
+    for event, url, result in separate_links(worker, urls, model, job.output_dir, output_format, params, args.download_workers, timer=job.timer, skip_silence=skip_silence):
+      if event == "downloaded":
+        job.logs.append(f"Downloaded: {os.path.basename(result)}")
+      elif event == "processed":
+        job.files.extend(result)
+        job.logs.append(f"Link: {url} processed!")
+      else:
+        job.logs.append(f"Link: {url} failed: {result}")
+      yield "\n".join(job.logs)
+
+    job.logs.append(f"Stems saved in {job.output_dir}")
+    yield "\n".join(job.logs)
+
+def roformer_links(links, model, output_format, overlap, segment_size, auto_segment, skip_silence):
+  params = roformer_params(overlap, "auto" if auto_segment else segment_size)
+  yield from run_links(links, roformer_models[model], output_format, params, skip_silence)
+
+def mdx23c_links(links, model, output_format, overlap, segment_size, denoise, auto_segment, skip_silence):
+  params = mdx23c_params(overlap, "auto" if auto_segment else segment_size, denoise)
+  yield from run_links(links, model, output_format, params, skip_silence)
+
+def mdxnet_links(links, model, output_format, overlap, segment_size, denoise, skip_silence):
+  params = mdxnet_params(overlap, segment_size, denoise)
+  yield from run_links(links, model, output_format, params, skip_silence)
+
+def vrarch_links(links, model, output_format, window_size, agression, tta, high_end_process, skip_silence):
+  params = vrarch_params(window_size, agression, tta, high_end_process)
+  yield from run_links(links, model, output_format, params, skip_silence)
+
+def demucs_links(links, model, output_format, shifts, overlap, skip_silence):
+  params = demucs_params(shifts, overlap)
+  yield from run_links(links, model, output_format, params, skip_silence)
+
+pipeline_example = json.dumps([
+  {"model": "BS-Roformer-Viperx-1297.ckpt", "stem": "Vocals"},
+  {"model": "BS-Roformer-De-Reverb-Anvuew", "stem": "noreverb", "save": True},
+  {"model": "Mel-Roformer-Denoise-Aufr33"}
+], indent = 2)
+
+def pipeline_separator(pipeline_audio, pipeline_steps, pipeline_output_format):
+  job = Job(output_root=directory, handler="pipeline")
+
+  with job.timer:
+    try:
+      steps = parse_steps(json.loads(pipeline_steps), all_models, roformer_models)
+    except ValueError as e:
+      raise gr.Error(str(e))
+
+    with job.timer.stage("read_input"):
+      sample_rate, audio = read_audio(pipeline_audio)
+
+    try:
+      job.files.extend(run_pipeline(worker, steps, sample_rate, audio, job.output_dir, pipeline_output_format, job.id, job.timer))
+    except ValueError as e:
+      raise gr.Error(str(e))
+
+  return job.files
+
+def ensemble_separator(ensemble_audio, ensemble_models, ensemble_method, ensemble_output_format, roformer_overlap, roformer_segment_size, roformer_auto_segment, mdx23c_segment_size, mdx23c_overlap, mdx23c_denoise, mdx23c_auto_segment, mdxnet_segment_size, mdxnet_overlap, mdxnet_denoise, vrarch_window_size, vrarch_agression, vrarch_tta, vrarch_high_end_process, demucs_shifts, demucs_overlap):
+  if not ensemble_models:
+    raise gr.Error(_("Select at least one model"))
+
+  job = Job(output_root=directory, handler="ensemble")
+
+  with job.timer:
+    # Every model runs with the settings of its own tab, the same ones a single separation would use
+    tab_params = {
+      "roformer": roformer_params(roformer_overlap, "auto" if roformer_auto_segment else roformer_segment_size),
+      "mdx23c": mdx23c_params(mdx23c_overlap, "auto" if mdx23c_auto_segment else mdx23c_segment_size, mdx23c_denoise),
+      "mdxnet": mdxnet_params(mdxnet_overlap, mdxnet_segment_size, mdxnet_denoise),
+      "vrarch": vrarch_params(vrarch_window_size, vrarch_agression, vrarch_tta, vrarch_high_end_process),
+      "demucs": demucs_params(demucs_shifts, demucs_overlap),
+    }
+    models = [(roformer_models.get(model, model), tab_params[model_arch(model)]) for model in ensemble_models]
 
-  stem1_file = files_list[0]
-  stem2_file = files_list[1]
-  stem3_file = files_list[2]
-  stem4_file = files_list[3]
+    with job.timer.stage("read_input"):
+      sample_rate, audio = read_audio(ensemble_audio)
 
-  return stem1_file, stem2_file, stem3_file, stem4_file
+    stems = ensemble(worker, stem_cache, sample_rate, audio, models, ensemble_method, job.timer, batch)
+    job.timer.model = "+".join(model for model, _ in models)
+    method_name = ensemble_method.lower().replace(" ", "_")
+
+    with job.timer.stage("encode"):
+      for stem, (sample_rate, data) in stems.items():
+        job.files.append(write_stem(os.path.join(job.output_dir, f"{job.id}_({stem})_ensemble_{method_name}.{ensemble_output_format}"), sample_rate, data))
 
-def roformer_batch(path_input, path_output, model, output_format, overlap, segment_size):
-  found_files.clear()
-  logs.clear()
-
-  full_roformer_model = roformer_models[model]
-
-  for audio_files in os.listdir(path_input):
-    if audio_files.endswith(extensions):
-      found_files.append(audio_files)
-  total_files = len(found_files)
-
-  if total_files == 0:
-    logs.append("No valid audio files.")
-    yield "\n".join(logs)
-  else:
-    logs.append(f"{total_files} audio files found")
-    found_files.sort()
-
-    for audio_files in found_files:
-      file_path = os.path.join(path_input, audio_files)
-      prompt = [separator_location, file_path, "-m", f"{full_roformer_model}", f"--output_dir={path_output}", f"--output_format={output_format}", "--normalization=0.9", f"--mdxc_overlap={overlap}", f"--mdxc_segment_size={segment_size}", "--model_file_dir=./models"]
-      logs.append(f"Processing file: {audio_files}")
-      yield "\n".join(logs)
-      subprocess.run(prompt)
-      logs.append(f"File: {audio_files} processed!")
-      yield "\n".join(logs)
-
-def mdx23c_batch(path_input, path_output, model, output_format, overlap, segment_size, denoise):
-  found_files.clear()
-  logs.clear()
-
-  for audio_files in os.listdir(path_input):
-    if audio_files.endswith(extensions):
-      found_files.append(audio_files)
-  total_files = len(found_files)
-
-  if total_files == 0:
-    logs.append("No valid audio files.")
-    yield "\n".join(logs)
-  else:
-    logs.append(f"{total_files} audio files found")
-    found_files.sort()
-
-    for audio_files in found_files:
-      file_path = os.path.join(path_input, audio_files)
-      prompt = [separator_location, file_path, "-m", f"{model}", f"--output_dir={path_output}", f"--output_format={output_format}", "--normalization=0.9", f"--mdxc_overlap={overlap}", f"--mdxc_segment_size={segment_size}", "--model_file_dir=./models"]
-
-      if denoise:
-        prompt.append("--mdx_enable_denoise")
-
-      logs.append(f"Processing file: {audio_files}")
-      yield "\n".join(logs)
-      subprocess.run(prompt)
-      logs.append(f"File: {audio_files} processed!")
-      yield "\n".join(logs)
-
-def mdxnet_batch(path_input, path_output, model, output_format, overlap, segment_size, denoise):
-  found_files.clear()
-  logs.clear()
-
-  for audio_files in os.listdir(path_input):
-    if audio_files.endswith(extensions):
-      found_files.append(audio_files)
-  total_files = len(found_files)
-
-  if total_files == 0:
-    logs.append("No valid audio files.")
-    yield "\n".join(logs)
-  else:
-    logs.append(f"{total_files} audio files found")
-    found_files.sort()
-
-    for audio_files in found_files:
-      file_path = os.path.join(path_input, audio_files)
-      prompt = [separator_location, file_path, "-m", f"{model}", f"--output_dir={path_output}", f"--output_format={output_format}", "--normalization=0.9", f"--mdx_overlap={overlap}", f"--mdx_segment_size={segment_size}", "--model_file_dir=./models"]
-
-      if denoise:
-        prompt.append("--mdx_enable_denoise")
-
-      logs.append(f"Processing file: {audio_files}")
-      yield "\n".join(logs)
-      subprocess.run(prompt)
-      logs.append(f"File: {audio_files} processed!")
-      yield "\n".join(logs)
-
-def vrarch_batch(path_input, path_output, model, output_format, window_size, agression, tta, high_end_process):
-  found_files.clear()
-  logs.clear()
-
-  for audio_files in os.listdir(path_input):
-    if audio_files.endswith(extensions):
-      found_files.append(audio_files)
-  total_files = len(found_files)
-
-  if total_files == 0:
-    logs.append("No valid audio files.")
-    yield "\n".join(logs)
-  else:
-    logs.append(f"{total_files} audio files found")
-    found_files.sort()
-
-    for audio_files in found_files:
-      file_path = os.path.join(path_input, audio_files)
-      prompt = [separator_location, file_path, "-m", f"{model}", f"--output_dir={path_output}", f"--output_format={output_format}", "--normalization=0.9", f"--vr_window_size={window_size}", f"--vr_aggression={agression}", "--model_file_dir=./models"]
-
-      if tta:
-        prompt.append("--vr_enable_tta")
-      if high_end_process:
-         prompt.append("--vr_high_end_process")
-
-      logs.append(f"Processing file: {audio_files}")
-      yield "\n".join(logs)
-      subprocess.run(prompt)
-      logs.append(f"File: {audio_files} processed!")
-      yield "\n".join(logs)
-
-def demucs_batch(path_input, path_output, model, output_format, shifts, overlap):
-  found_files.clear()
-  logs.clear()
-
-  for audio_files in os.listdir(path_input):
-    if audio_files.endswith(extensions):
-      found_files.append(audio_files)
-  total_files = len(found_files)
-
-  if total_files == 0:
-    logs.append("No valid audio files.")
-    yield "\n".join(logs)
-  else:
-    logs.append(f"{total_files} audio files found")
-    found_files.sort()
-
-    for audio_files in found_files:
-      file_path = os.path.join(path_input, audio_files)
-      prompt = [separator_location, file_path, "-m", f"{model}", f"--output_dir={path_output}", f"--output_format={output_format}", "--normalization=0.9", f"--demucs_shifts={shifts}", f"--demucs_overlap={overlap}", "--model_file_dir=./models"]
-
-      logs.append(f"Processing file: {audio_files}")
-      yield "\n".join(logs)
-      subprocess.run(prompt)
-      logs.append(f"File: {audio_files} processed!")
-      yield "\n".join(logs)
+  return job.files
 
 with gr.Blocks(theme = loadThemes.load_json() or "NoCrypt/miku", title = "🎵 UVR5 UI 🎵") as app:
     with Translate("assets/languages/translation.yaml", placeholder_langs = ["en", "es", "it", "pt", "ms", "id", "ru", "uk", "th", "zh", "ja", "ko"]) as lang:
@@ -438,14 +473,23 @@ with gr.Blocks(theme = loadThemes.load_json() or "NoCrypt/miku", title = "🎵 U
                 with gr.Row():
                     roformer_model = gr.Dropdown(
                         label = _("Select the model"),
-                        choices = list(roformer_models.keys()),
+                        info = _("✓ downloaded, ⚡ loaded and ready"),
+                        choices = model_choices(tab_models[0]),
                         value = lambda : None,
                         interactive = True
                     )
                     roformer_output_format = gr.Dropdown(
                         label = _("Select the output format"),
+                        info = _("Select several formats to get every stem in each of them from a single separation"),
                         choices = output_format,
                         value = lambda : None,
+                        multiselect = True,
+                        interactive = True
+                    )
+                    roformer_skip_silence = gr.Checkbox(
+                        label = _("Skip silence"),
+                        info = _("Only separate the parts that aren't silent, for podcasts and recordings with long pauses"),
+                        value = False,
                         interactive = True
                     )
                 with gr.Row():
@@ -467,10 +511,16 @@ with gr.Blocks(theme = loadThemes.load_json() or "NoCrypt/miku", title = "🎵 U
                         value = 256,
                         interactive = True
                     )
+                    roformer_auto_segment = gr.Checkbox(
+                        label = _("Auto segment size"),
+                        info = _("Pick the fastest segment size that fits in memory for each input (the first use of a model runs a short calibration)"),
+                        value = False,
+                        interactive = True
+                    )
                 with gr.Row():
                     roformer_audio = gr.Audio(
                         label = _("Input audio"),
-                        type = "numpy",
+                        type = "filepath",
                         interactive = True
                     )
                 with gr.Accordion(_("Separation by link"), open = False):
@@ -487,8 +537,20 @@ with gr.Blocks(theme = loadThemes.load_json() or "NoCrypt/miku", title = "🎵 U
                         _("Download!"),
                         variant = "primary"
                     )
+                        roformer_links_button = gr.Button(
+                        _("Separate all links"),
+                        variant = "secondary"
+                    )
+                    with gr.Row():
+                        gr.Markdown(_("Separate all links downloads and separates every link in the box (playlists too, separate several links with spaces) and saves the stems in the outputs folder."))
+                    with gr.Row():
+                        roformer_links_info = gr.Textbox(
+                            label = _("Output information"),
+                            interactive = False
+                        )
 
                 roformer_download_button.click(download_audio, [roformer_link], [roformer_audio])
+                roformer_links_button.click(roformer_links, [roformer_link, roformer_model, roformer_output_format, roformer_overlap, roformer_segment_size, roformer_auto_segment, roformer_skip_silence], [roformer_links_info], concurrency_limit = args.batch_concurrency or "default", concurrency_id = "batch")
 
                 with gr.Accordion(_("Batch separation"), open = False):
                     with gr.Row():
@@ -502,15 +564,61 @@ with gr.Blocks(theme = loadThemes.load_json() or "NoCrypt/miku", title = "🎵 U
                             placeholder = _("Place the output path here"),
                             interactive = True
                         )
+                    with gr.Row():
+                        roformer_dedup = gr.Checkbox(
+                            label = _("Separate duplicates once"),
+                            info = _("Files with the same audio, like re-encodes or copies under another name, are separated once and the others get links to its stems"),
+                            value = False,
+                            interactive = True
+                        )
+                        roformer_recursive = gr.Checkbox(
+                            label = _("Include subfolders"),
+                            info = _("The output folder mirrors the subfolders of the input folder"),
+                            value = False,
+                            interactive = True
+                        )
+                        roformer_include = gr.Textbox(
+                            label = _("Include"),
+                            placeholder = _("Only these files, e.g. *.flac, albums/*"),
+                            interactive = True
+                        )
+                        roformer_exclude = gr.Textbox(
+                            label = _("Exclude"),
+                            placeholder = _("Skip these files, e.g. *_instrumental.wav"),
+                            interactive = True
+                        )
                     with gr.Row():
                         roformer_bath_button = gr.Button(_("Separate!"), variant = "primary")
+                        roformer_watch_button = gr.Button(_("Watch folder"), variant = "secondary")
+                        roformer_stop_watch_button = gr.Button(_("Stop watching"), variant = "stop")
                     with gr.Row():
                         roformer_info = gr.Textbox(
                             label = _("Output information"),
                             interactive = False
                         )
 
-                roformer_bath_button.click(roformer_batch, [roformer_input_path, roformer_output_path, roformer_model, roformer_output_format, roformer_overlap, roformer_segment_size], [roformer_info])
+                roformer_bath_button.click(roformer_batch, [roformer_input_path, roformer_output_path, roformer_model, roformer_output_format, roformer_overlap, roformer_segment_size, roformer_auto_segment, roformer_recursive, roformer_include, roformer_exclude, roformer_skip_silence, roformer_dedup], [roformer_info], concurrency_limit = args.batch_concurrency or "default", concurrency_id = "batch")
+                roformer_watch_event = roformer_watch_button.click(roformer_watch, [roformer_input_path, roformer_output_path, roformer_model, roformer_output_format, roformer_overlap, roformer_segment_size, roformer_auto_segment, roformer_skip_silence], [roformer_info], concurrency_limit = None)
+                roformer_stop_watch_button.click(None, None, None, cancels = [roformer_watch_event])
+
+                with gr.Accordion(_("Streaming separation"), open = False):
+                    with gr.Row():
+                        gr.Markdown(_("Separates long inputs in overlapping chunks, playback starts as soon as the first chunk is ready. The complete stems are saved in the outputs folder."))
+                    with gr.Row():
+                        roformer_stream_button = gr.Button(_("Stream!"), variant = "primary")
+                    with gr.Row():
+                        roformer_stream_stem1 = gr.Audio(
+                            streaming = True,
+                            interactive = False,
+                            label = _("Stem 1")
+                        )
+                        roformer_stream_stem2 = gr.Audio(
+                            streaming = True,
+                            interactive = False,
+                            label = _("Stem 2")
+                        )
+
+                roformer_stream_button.click(roformer_stream, [roformer_audio, roformer_model, roformer_output_format, roformer_overlap, roformer_segment_size, roformer_auto_segment], [roformer_stream_stem1, roformer_stream_stem2], concurrency_limit = args.separate_concurrency or "default", concurrency_id = "separate")
 
                 with gr.Row():
                     roformer_button = gr.Button(_("Separate!"), variant = "primary")
@@ -528,20 +636,29 @@ with gr.Blocks(theme = loadThemes.load_json() or "NoCrypt/miku", title = "🎵 U
                         type = "filepath"
                     )
 
-                roformer_button.click(roformer_separator, [roformer_audio, roformer_model, roformer_output_format, roformer_overlap, roformer_segment_size], [roformer_stem1, roformer_stem2])
+                roformer_button.click(roformer_separator, [roformer_audio, roformer_model, roformer_output_format, roformer_overlap, roformer_segment_size, roformer_auto_segment, roformer_skip_silence], [roformer_stem1, roformer_stem2], concurrency_limit = args.separate_concurrency or "default", concurrency_id = "separate")
             
             with gr.TabItem("MDX23C"):
                 with gr.Row():
                     mdx23c_model = gr.Dropdown(
                         label = _("Select the model"),
-                        choices = mdx23c_models,
+                        info = _("✓ downloaded, ⚡ loaded and ready"),
+                        choices = model_choices(tab_models[1]),
                         value = lambda : None,
                         interactive = True
                     )
                     mdx23c_output_format = gr.Dropdown(
                         label = _("Select the output format"),
+                        info = _("Select several formats to get every stem in each of them from a single separation"),
                         choices = output_format,
                         value = lambda : None,
+                        multiselect = True,
+                        interactive = True
+                    )
+                    mdx23c_skip_silence = gr.Checkbox(
+                        label = _("Skip silence"),
+                        info = _("Only separate the parts that aren't silent, for podcasts and recordings with long pauses"),
+                        value = False,
                         interactive = True
                     )
                 with gr.Row():
@@ -554,6 +671,12 @@ with gr.Blocks(theme = loadThemes.load_json() or "NoCrypt/miku", title = "🎵 U
                         value = 256,
                         interactive = True
                     )
+                    mdx23c_auto_segment = gr.Checkbox(
+                        label = _("Auto segment size"),
+                        info = _("Pick the fastest segment size that fits in memory for each input (the first use of a model runs a short calibration)"),
+                        value = False,
+                        interactive = True
+                    )
                     mdx23c_overlap = gr.Slider(
                         minimum = 2,
                         maximum = 50,
@@ -572,7 +695,7 @@ with gr.Blocks(theme = loadThemes.load_json() or "NoCrypt/miku", title = "🎵 U
                 with gr.Row():
                     mdx23c_audio = gr.Audio(
                         label = _("Input audio"),
-                        type = "numpy",
+                        type = "filepath",
                         interactive = True
                     )
                 with gr.Accordion(_("Separation by link"), open = False):
@@ -589,8 +712,20 @@ with gr.Blocks(theme = loadThemes.load_json() or "NoCrypt/miku", title = "🎵 U
                         _("Download!"),
                         variant = "primary"
                     )
+                        mdx23c_links_button = gr.Button(
+                        _("Separate all links"),
+                        variant = "secondary"
+                    )
+                    with gr.Row():
+                        gr.Markdown(_("Separate all links downloads and separates every link in the box (playlists too, separate several links with spaces) and saves the stems in the outputs folder."))
+                    with gr.Row():
+                        mdx23c_links_info = gr.Textbox(
+                            label = _("Output information"),
+                            interactive = False
+                        )
 
                 mdx23c_download_button.click(download_audio, [mdx23c_link], [mdx23c_audio])
+                mdx23c_links_button.click(mdx23c_links, [mdx23c_link, mdx23c_model, mdx23c_output_format, mdx23c_overlap, mdx23c_segment_size, mdx23c_denoise, mdx23c_auto_segment, mdx23c_skip_silence], [mdx23c_links_info], concurrency_limit = args.batch_concurrency or "default", concurrency_id = "batch")
 
                 with gr.Accordion(_("Batch separation"), open = False):
                     with gr.Row():
@@ -604,15 +739,61 @@ with gr.Blocks(theme = loadThemes.load_json() or "NoCrypt/miku", title = "🎵 U
                             placeholder = _("Place the output path here"),
                             interactive = True
                         )
+                    with gr.Row():
+                        mdx23c_dedup = gr.Checkbox(
+                            label = _("Separate duplicates once"),
+                            info = _("Files with the same audio, like re-encodes or copies under another name, are separated once and the others get links to its stems"),
+                            value = False,
+                            interactive = True
+                        )
+                        mdx23c_recursive = gr.Checkbox(
+                            label = _("Include subfolders"),
+                            info = _("The output folder mirrors the subfolders of the input folder"),
+                            value = False,
+                            interactive = True
+                        )
+                        mdx23c_include = gr.Textbox(
+                            label = _("Include"),
+                            placeholder = _("Only these files, e.g. *.flac, albums/*"),
+                            interactive = True
+                        )
+                        mdx23c_exclude = gr.Textbox(
+                            label = _("Exclude"),
+                            placeholder = _("Skip these files, e.g. *_instrumental.wav"),
+                            interactive = True
+                        )
                     with gr.Row():
                         mdx23c_bath_button = gr.Button(_("Separate!"), variant = "primary")
+                        mdx23c_watch_button = gr.Button(_("Watch folder"), variant = "secondary")
+                        mdx23c_stop_watch_button = gr.Button(_("Stop watching"), variant = "stop")
                     with gr.Row():
                         mdx23c_info = gr.Textbox(
                             label = _("Output information"),
                             interactive = False
                         )
 
-                mdx23c_bath_button.click(mdx23c_batch, [mdx23c_input_path, mdx23c_output_path, mdx23c_model, mdx23c_output_format, mdx23c_overlap, mdx23c_segment_size, mdx23c_denoise], [mdx23c_info])
+                mdx23c_bath_button.click(mdx23c_batch, [mdx23c_input_path, mdx23c_output_path, mdx23c_model, mdx23c_output_format, mdx23c_overlap, mdx23c_segment_size, mdx23c_denoise, mdx23c_auto_segment, mdx23c_recursive, mdx23c_include, mdx23c_exclude, mdx23c_skip_silence, mdx23c_dedup], [mdx23c_info], concurrency_limit = args.batch_concurrency or "default", concurrency_id = "batch")
+                mdx23c_watch_event = mdx23c_watch_button.click(mdx23c_watch, [mdx23c_input_path, mdx23c_output_path, mdx23c_model, mdx23c_output_format, mdx23c_overlap, mdx23c_segment_size, mdx23c_denoise, mdx23c_auto_segment, mdx23c_skip_silence], [mdx23c_info], concurrency_limit = None)
+                mdx23c_stop_watch_button.click(None, None, None, cancels = [mdx23c_watch_event])
+
+                with gr.Accordion(_("Streaming separation"), open = False):
+                    with gr.Row():
+                        gr.Markdown(_("Separates long inputs in overlapping chunks, playback starts as soon as the first chunk is ready. The complete stems are saved in the outputs folder."))
+                    with gr.Row():
+                        mdx23c_stream_button = gr.Button(_("Stream!"), variant = "primary")
+                    with gr.Row():
+                        mdx23c_stream_stem1 = gr.Audio(
+                            streaming = True,
+                            interactive = False,
+                            label = _("Stem 1")
+                        )
+                        mdx23c_stream_stem2 = gr.Audio(
+                            streaming = True,
+                            interactive = False,
+                            label = _("Stem 2")
+                        )
+
+                mdx23c_stream_button.click(mdxc_stream, [mdx23c_audio, mdx23c_model, mdx23c_output_format, mdx23c_segment_size, mdx23c_overlap, mdx23c_denoise, mdx23c_auto_segment], [mdx23c_stream_stem1, mdx23c_stream_stem2], concurrency_limit = args.separate_concurrency or "default", concurrency_id = "separate")
 
                 with gr.Row():
                     mdx23c_button = gr.Button(_("Separate!"), variant = "primary")
@@ -630,20 +811,29 @@ with gr.Blocks(theme = loadThemes.load_json() or "NoCrypt/miku", title = "🎵 U
                         type = "filepath"
                     )
 
-                mdx23c_button.click(mdxc_separator, [mdx23c_audio, mdx23c_model, mdx23c_output_format, mdx23c_segment_size, mdx23c_overlap, mdx23c_denoise], [mdx23c_stem1, mdx23c_stem2])
+                mdx23c_button.click(mdxc_separator, [mdx23c_audio, mdx23c_model, mdx23c_output_format, mdx23c_segment_size, mdx23c_overlap, mdx23c_denoise, mdx23c_auto_segment, mdx23c_skip_silence], [mdx23c_stem1, mdx23c_stem2], concurrency_limit = args.separate_concurrency or "default", concurrency_id = "separate")
             
             with gr.TabItem("MDX-NET"):
                 with gr.Row():
                     mdxnet_model = gr.Dropdown(
                         label = _("Select the model"),
-                        choices = mdxnet_models,
+                        info = _("✓ downloaded, ⚡ loaded and ready"),
+                        choices = model_choices(tab_models[2]),
                         value = lambda : None,
                         interactive = True
                     )
                     mdxnet_output_format = gr.Dropdown(
                         label = _("Select the output format"),
+                        info = _("Select several formats to get every stem in each of them from a single separation"),
                         choices = output_format,
                         value = lambda : None,
+                        multiselect = True,
+                        interactive = True
+                    )
+                    mdxnet_skip_silence = gr.Checkbox(
+                        label = _("Skip silence"),
+                        info = _("Only separate the parts that aren't silent, for podcasts and recordings with long pauses"),
+                        value = False,
                         interactive = True
                     )
                 with gr.Row():
@@ -671,7 +861,7 @@ with gr.Blocks(theme = loadThemes.load_json() or "NoCrypt/miku", title = "🎵 U
                 with gr.Row():
                     mdxnet_audio = gr.Audio(
                         label = _("Input audio"),
-                        type = "numpy",
+                        type = "filepath",
                         interactive = True
                     )
                 with gr.Accordion(_("Separation by link"), open = False):
@@ -688,8 +878,20 @@ with gr.Blocks(theme = loadThemes.load_json() or "NoCrypt/miku", title = "🎵 U
                         _("Download!"),
                         variant = "primary"
                     )
+                        mdxnet_links_button = gr.Button(
+                        _("Separate all links"),
+                        variant = "secondary"
+                    )
+                    with gr.Row():
+                        gr.Markdown(_("Separate all links downloads and separates every link in the box (playlists too, separate several links with spaces) and saves the stems in the outputs folder."))
+                    with gr.Row():
+                        mdxnet_links_info = gr.Textbox(
+                            label = _("Output information"),
+                            interactive = False
+                        )
 
                 mdxnet_download_button.click(download_audio, [mdxnet_link], [mdxnet_audio])
+                mdxnet_links_button.click(mdxnet_links, [mdxnet_link, mdxnet_model, mdxnet_output_format, mdxnet_overlap, mdxnet_segment_size, mdxnet_denoise, mdxnet_skip_silence], [mdxnet_links_info], concurrency_limit = args.batch_concurrency or "default", concurrency_id = "batch")
 
                 with gr.Accordion(_("Batch separation"), open = False):
                     with gr.Row():
@@ -703,15 +905,61 @@ with gr.Blocks(theme = loadThemes.load_json() or "NoCrypt/miku", title = "🎵 U
                             placeholder = _("Place the output path here"),
                             interactive = True
                         )
+                    with gr.Row():
+                        mdxnet_dedup = gr.Checkbox(
+                            label = _("Separate duplicates once"),
+                            info = _("Files with the same audio, like re-encodes or copies under another name, are separated once and the others get links to its stems"),
+                            value = False,
+                            interactive = True
+                        )
+                        mdxnet_recursive = gr.Checkbox(
+                            label = _("Include subfolders"),
+                            info = _("The output folder mirrors the subfolders of the input folder"),
+                            value = False,
+                            interactive = True
+                        )
+                        mdxnet_include = gr.Textbox(
+                            label = _("Include"),
+                            placeholder = _("Only these files, e.g. *.flac, albums/*"),
+                            interactive = True
+                        )
+                        mdxnet_exclude = gr.Textbox(
+                            label = _("Exclude"),
+                            placeholder = _("Skip these files, e.g. *_instrumental.wav"),
+                            interactive = True
+                        )
                     with gr.Row():
                         mdxnet_bath_button = gr.Button(_("Separate!"), variant = "primary")
+                        mdxnet_watch_button = gr.Button(_("Watch folder"), variant = "secondary")
+                        mdxnet_stop_watch_button = gr.Button(_("Stop watching"), variant = "stop")
                     with gr.Row():
                         mdxnet_info = gr.Textbox(
                             label = _("Output information"),
                             interactive = False
                         )
 
-                mdxnet_bath_button.click(mdxnet_batch, [mdxnet_input_path, mdxnet_output_path, mdxnet_model, mdxnet_output_format, mdxnet_overlap, mdxnet_segment_size, mdxnet_denoise], [mdxnet_info])
+                mdxnet_bath_button.click(mdxnet_batch, [mdxnet_input_path, mdxnet_output_path, mdxnet_model, mdxnet_output_format, mdxnet_overlap, mdxnet_segment_size, mdxnet_denoise, mdxnet_recursive, mdxnet_include, mdxnet_exclude, mdxnet_skip_silence, mdxnet_dedup], [mdxnet_info], concurrency_limit = args.batch_concurrency or "default", concurrency_id = "batch")
+                mdxnet_watch_event = mdxnet_watch_button.click(mdxnet_watch, [mdxnet_input_path, mdxnet_output_path, mdxnet_model, mdxnet_output_format, mdxnet_overlap, mdxnet_segment_size, mdxnet_denoise, mdxnet_skip_silence], [mdxnet_info], concurrency_limit = None)
+                mdxnet_stop_watch_button.click(None, None, None, cancels = [mdxnet_watch_event])
+
+                with gr.Accordion(_("Streaming separation"), open = False):
+                    with gr.Row():
+                        gr.Markdown(_("Separates long inputs in overlapping chunks, playback starts as soon as the first chunk is ready. The complete stems are saved in the outputs folder."))
+                    with gr.Row():
+                        mdxnet_stream_button = gr.Button(_("Stream!"), variant = "primary")
+                    with gr.Row():
+                        mdxnet_stream_stem1 = gr.Audio(
+                            streaming = True,
+                            interactive = False,
+                            label = _("Stem 1")
+                        )
+                        mdxnet_stream_stem2 = gr.Audio(
+                            streaming = True,
+                            interactive = False,
+                            label = _("Stem 2")
+                        )
+
+                mdxnet_stream_button.click(mdxnet_stream, [mdxnet_audio, mdxnet_model, mdxnet_output_format, mdxnet_segment_size, mdxnet_overlap, mdxnet_denoise], [mdxnet_stream_stem1, mdxnet_stream_stem2], concurrency_limit = args.separate_concurrency or "default", concurrency_id = "separate")
 
                 with gr.Row():
                     mdxnet_button = gr.Button(_("Separate!"), variant = "primary")
@@ -729,20 +977,29 @@ with gr.Blocks(theme = loadThemes.load_json() or "NoCrypt/miku", title = "🎵 U
                         type = "filepath"
                     )
 
-                mdxnet_button.click(mdxnet_separator, [mdxnet_audio, mdxnet_model, mdxnet_output_format, mdxnet_segment_size, mdxnet_overlap, mdxnet_denoise], [mdxnet_stem1, mdxnet_stem2])
+                mdxnet_button.click(mdxnet_separator, [mdxnet_audio, mdxnet_model, mdxnet_output_format, mdxnet_segment_size, mdxnet_overlap, mdxnet_denoise, mdxnet_skip_silence], [mdxnet_stem1, mdxnet_stem2], concurrency_limit = args.separate_concurrency or "default", concurrency_id = "separate")
 
             with gr.TabItem("VR ARCH"):
                 with gr.Row():
                     vrarch_model = gr.Dropdown(
                         label = _("Select the model"),
-                        choices = vrarch_models,
+                        info = _("✓ downloaded, ⚡ loaded and ready"),
+                        choices = model_choices(tab_models[3]),
                         value = lambda : None,
                         interactive = True
                     )
                     vrarch_output_format = gr.Dropdown(
                         label = _("Select the output format"),
+                        info = _("Select several formats to get every stem in each of them from a single separation"),
                         choices = output_format,
                         value = lambda : None,
+                        multiselect = True,
+                        interactive = True
+                    )
+                    vrarch_skip_silence = gr.Checkbox(
+                        label = _("Skip silence"),
+                        info = _("Only separate the parts that aren't silent, for podcasts and recordings with long pauses"),
+                        value = False,
                         interactive = True
                     )
                 with gr.Row():
@@ -778,7 +1035,7 @@ with gr.Blocks(theme = loadThemes.load_json() or "NoCrypt/miku", title = "🎵 U
                 with gr.Row():
                     vrarch_audio = gr.Audio(
                         label = _("Input audio"),
-                        type = "numpy",
+                        type = "filepath",
                         interactive = True
                     )
                 with gr.Accordion(_("Separation by link"), open = False):
@@ -795,8 +1052,20 @@ with gr.Blocks(theme = loadThemes.load_json() or "NoCrypt/miku", title = "🎵 U
                         _("Download!"),
                         variant = "primary"
                     )
+                        vrarch_links_button = gr.Button(
+                        _("Separate all links"),
+                        variant = "secondary"
+                    )
+                    with gr.Row():
+                        gr.Markdown(_("Separate all links downloads and separates every link in the box (playlists too, separate several links with spaces) and saves the stems in the outputs folder."))
+                    with gr.Row():
+                        vrarch_links_info = gr.Textbox(
+                            label = _("Output information"),
+                            interactive = False
+                        )
 
                 vrarch_download_button.click(download_audio, [vrarch_link], [vrarch_audio])
+                vrarch_links_button.click(vrarch_links, [vrarch_link, vrarch_model, vrarch_output_format, vrarch_window_size, vrarch_agression, vrarch_tta, vrarch_high_end_process, vrarch_skip_silence], [vrarch_links_info], concurrency_limit = args.batch_concurrency or "default", concurrency_id = "batch")
 
                 with gr.Accordion(_("Batch separation"), open = False):
                     with gr.Row():
@@ -810,15 +1079,61 @@ with gr.Blocks(theme = loadThemes.load_json() or "NoCrypt/miku", title = "🎵 U
                             placeholder = _("Place the output path here"),
                             interactive = True
                         )
+                    with gr.Row():
+                        vrarch_dedup = gr.Checkbox(
+                            label = _("Separate duplicates once"),
+                            info = _("Files with the same audio, like re-encodes or copies under another name, are separated once and the others get links to its stems"),
+                            value = False,
+                            interactive = True
+                        )
+                        vrarch_recursive = gr.Checkbox(
+                            label = _("Include subfolders"),
+                            info = _("The output folder mirrors the subfolders of the input folder"),
+                            value = False,
+                            interactive = True
+                        )
+                        vrarch_include = gr.Textbox(
+                            label = _("Include"),
+                            placeholder = _("Only these files, e.g. *.flac, albums/*"),
+                            interactive = True
+                        )
+                        vrarch_exclude = gr.Textbox(
+                            label = _("Exclude"),
+                            placeholder = _("Skip these files, e.g. *_instrumental.wav"),
+                            interactive = True
+                        )
                     with gr.Row():
                         vrarch_bath_button = gr.Button(_("Separate!"), variant = "primary")
+                        vrarch_watch_button = gr.Button(_("Watch folder"), variant = "secondary")
+                        vrarch_stop_watch_button = gr.Button(_("Stop watching"), variant = "stop")
                     with gr.Row():
                         vrarch_info = gr.Textbox(
                             label = _("Output information"),
                             interactive = False
                         )
 
-                vrarch_bath_button.click(vrarch_batch, [vrarch_input_path, vrarch_output_path, vrarch_model, vrarch_output_format, vrarch_window_size, vrarch_agression, vrarch_tta, vrarch_high_end_process], [vrarch_info])
+                vrarch_bath_button.click(vrarch_batch, [vrarch_input_path, vrarch_output_path, vrarch_model, vrarch_output_format, vrarch_window_size, vrarch_agression, vrarch_tta, vrarch_high_end_process, vrarch_recursive, vrarch_include, vrarch_exclude, vrarch_skip_silence, vrarch_dedup], [vrarch_info], concurrency_limit = args.batch_concurrency or "default", concurrency_id = "batch")
+                vrarch_watch_event = vrarch_watch_button.click(vrarch_watch, [vrarch_input_path, vrarch_output_path, vrarch_model, vrarch_output_format, vrarch_window_size, vrarch_agression, vrarch_tta, vrarch_high_end_process, vrarch_skip_silence], [vrarch_info], concurrency_limit = None)
+                vrarch_stop_watch_button.click(None, None, None, cancels = [vrarch_watch_event])
+
+                with gr.Accordion(_("Streaming separation"), open = False):
+                    with gr.Row():
+                        gr.Markdown(_("Separates long inputs in overlapping chunks, playback starts as soon as the first chunk is ready. The complete stems are saved in the outputs folder."))
+                    with gr.Row():
+                        vrarch_stream_button = gr.Button(_("Stream!"), variant = "primary")
+                    with gr.Row():
+                        vrarch_stream_stem1 = gr.Audio(
+                            streaming = True,
+                            interactive = False,
+                            label = _("Stem 1")
+                        )
+                        vrarch_stream_stem2 = gr.Audio(
+                            streaming = True,
+                            interactive = False,
+                            label = _("Stem 2")
+                        )
+
+                vrarch_stream_button.click(vrarch_stream, [vrarch_audio, vrarch_model, vrarch_output_format, vrarch_window_size, vrarch_agression, vrarch_tta, vrarch_high_end_process], [vrarch_stream_stem1, vrarch_stream_stem2], concurrency_limit = args.separate_concurrency or "default", concurrency_id = "separate")
 
                 with gr.Row():
                     vrarch_button = gr.Button(_("Separate!"), variant = "primary")
@@ -836,20 +1151,29 @@ with gr.Blocks(theme = loadThemes.load_json() or "NoCrypt/miku", title = "🎵 U
                         label = _("Stem 2")
                     )
 
-                vrarch_button.click(vrarch_separator, [vrarch_audio, vrarch_model, vrarch_output_format, vrarch_window_size, vrarch_agression, vrarch_tta, vrarch_high_end_process], [vrarch_stem1, vrarch_stem2])
+                vrarch_button.click(vrarch_separator, [vrarch_audio, vrarch_model, vrarch_output_format, vrarch_window_size, vrarch_agression, vrarch_tta, vrarch_high_end_process, vrarch_skip_silence], [vrarch_stem1, vrarch_stem2], concurrency_limit = args.separate_concurrency or "default", concurrency_id = "separate")
 
             with gr.TabItem("Demucs"):
                 with gr.Row():
                     demucs_model = gr.Dropdown(
                         label = _("Select the model"),
-                        choices = demucs_models,
+                        info = _("✓ downloaded, ⚡ loaded and ready"),
+                        choices = model_choices(tab_models[4]),
                         value = lambda : None,
                         interactive = True
                     )
                     demucs_output_format = gr.Dropdown(
                         label = _("Select the output format"),
+                        info = _("Select several formats to get every stem in each of them from a single separation"),
                         choices = output_format,
                         value = lambda : None,
+                        multiselect = True,
+                        interactive = True
+                    )
+                    demucs_skip_silence = gr.Checkbox(
+                        label = _("Skip silence"),
+                        info = _("Only separate the parts that aren't silent, for podcasts and recordings with long pauses"),
+                        value = False,
                         interactive = True
                     )
                 with gr.Row():
@@ -871,7 +1195,7 @@ with gr.Blocks(theme = loadThemes.load_json() or "NoCrypt/miku", title = "🎵 U
                 with gr.Row():
                     demucs_audio = gr.Audio(
                         label = _("Input audio"),
-                        type = "numpy",
+                        type = "filepath",
                         interactive = True
                     )
                 with gr.Accordion(_("Separation by link"), open = False):
@@ -888,8 +1212,20 @@ with gr.Blocks(theme = loadThemes.load_json() or "NoCrypt/miku", title = "🎵 U
                         _("Download!"),
                         variant = "primary"
                     )
+                        demucs_links_button = gr.Button(
+                        _("Separate all links"),
+                        variant = "secondary"
+                    )
+                    with gr.Row():
+                        gr.Markdown(_("Separate all links downloads and separates every link in the box (playlists too, separate several links with spaces) and saves the stems in the outputs folder."))
+                    with gr.Row():
+                        demucs_links_info = gr.Textbox(
+                            label = _("Output information"),
+                            interactive = False
+                        )
 
                 demucs_download_button.click(download_audio, [demucs_link], [demucs_audio])
+                demucs_links_button.click(demucs_links, [demucs_link, demucs_model, demucs_output_format, demucs_shifts, demucs_overlap, demucs_skip_silence], [demucs_links_info], concurrency_limit = args.batch_concurrency or "default", concurrency_id = "batch")
 
                 with gr.Accordion(_("Batch separation"), open = False):
                     with gr.Row():
@@ -903,15 +1239,72 @@ with gr.Blocks(theme = loadThemes.load_json() or "NoCrypt/miku", title = "🎵 U
                             placeholder = _("Place the output path here"),
                             interactive = True
                         )
+                    with gr.Row():
+                        demucs_dedup = gr.Checkbox(
+                            label = _("Separate duplicates once"),
+                            info = _("Files with the same audio, like re-encodes or copies under another name, are separated once and the others get links to its stems"),
+                            value = False,
+                            interactive = True
+                        )
+                        demucs_recursive = gr.Checkbox(
+                            label = _("Include subfolders"),
+                            info = _("The output folder mirrors the subfolders of the input folder"),
+                            value = False,
+                            interactive = True
+                        )
+                        demucs_include = gr.Textbox(
+                            label = _("Include"),
+                            placeholder = _("Only these files, e.g. *.flac, albums/*"),
+                            interactive = True
+                        )
+                        demucs_exclude = gr.Textbox(
+                            label = _("Exclude"),
+                            placeholder = _("Skip these files, e.g. *_instrumental.wav"),
+                            interactive = True
+                        )
                     with gr.Row():
                         demucs_bath_button = gr.Button(_("Separate!"), variant = "primary")
+                        demucs_watch_button = gr.Button(_("Watch folder"), variant = "secondary")
+                        demucs_stop_watch_button = gr.Button(_("Stop watching"), variant = "stop")
                     with gr.Row():
                         demucs_info = gr.Textbox(
                             label = _("Output information"),
                             interactive = False
                         )
 
-                demucs_bath_button.click(demucs_batch, [demucs_input_path, demucs_output_path, demucs_model, demucs_output_format, demucs_shifts, demucs_overlap], [demucs_info])
+                demucs_bath_button.click(demucs_batch, [demucs_input_path, demucs_output_path, demucs_model, demucs_output_format, demucs_shifts, demucs_overlap, demucs_recursive, demucs_include, demucs_exclude, demucs_skip_silence, demucs_dedup], [demucs_info], concurrency_limit = args.batch_concurrency or "default", concurrency_id = "batch")
+                demucs_watch_event = demucs_watch_button.click(demucs_watch, [demucs_input_path, demucs_output_path, demucs_model, demucs_output_format, demucs_shifts, demucs_overlap, demucs_skip_silence], [demucs_info], concurrency_limit = None)
+                demucs_stop_watch_button.click(None, None, None, cancels = [demucs_watch_event])
+
+                with gr.Accordion(_("Streaming separation"), open = False):
+                    with gr.Row():
+                        gr.Markdown(_("Separates long inputs in overlapping chunks, playback starts as soon as the first chunk is ready. The complete stems are saved in the outputs folder."))
+                    with gr.Row():
+                        demucs_stream_button = gr.Button(_("Stream!"), variant = "primary")
+                    with gr.Row():
+                        demucs_stream_stem1 = gr.Audio(
+                            streaming = True,
+                            interactive = False,
+                            label = _("Stem 1")
+                        )
+                        demucs_stream_stem2 = gr.Audio(
+                            streaming = True,
+                            interactive = False,
+                            label = _("Stem 2")
+                        )
+                    with gr.Row():
+                        demucs_stream_stem3 = gr.Audio(
+                            streaming = True,
+                            interactive = False,
+                            label = _("Stem 3")
+                        )
+                        demucs_stream_stem4 = gr.Audio(
+                            streaming = True,
+                            interactive = False,
+                            label = _("Stem 4")
+                        )
+
+                demucs_stream_button.click(demucs_stream, [demucs_audio, demucs_model, demucs_output_format, demucs_shifts, demucs_overlap], [demucs_stream_stem1, demucs_stream_stem2, demucs_stream_stem3, demucs_stream_stem4], concurrency_limit = args.separate_concurrency or "default", concurrency_id = "separate")
 
                 with gr.Row():
                     demucs_button = gr.Button(_("Separate!"), variant = "primary")
@@ -942,8 +1335,83 @@ with gr.Blocks(theme = loadThemes.load_json() or "NoCrypt/miku", title = "🎵 U
                         label = _("Stem 4")
                     )
                 
-                demucs_button.click(demucs_separator, [demucs_audio, demucs_model, demucs_output_format, demucs_shifts, demucs_overlap], [demucs_stem1, demucs_stem2, demucs_stem3, demucs_stem4])
+                demucs_button.click(demucs_separator, [demucs_audio, demucs_model, demucs_output_format, demucs_shifts, demucs_overlap, demucs_skip_silence], [demucs_stem1, demucs_stem2, demucs_stem3, demucs_stem4], concurrency_limit = args.separate_concurrency or "default", concurrency_id = "separate")
                 
+            with gr.TabItem(_("Ensemble")):
+                with gr.Row():
+                    gr.Markdown(_("Runs several models on the same input and combines the stems with the same name. Each model's stems are cached, adding a model to an ensemble only runs the new one. Every model uses the settings of its own tab."))
+                with gr.Row():
+                    ensemble_models = gr.Dropdown(
+                        label = _("Select the models"),
+                        choices = list(roformer_models.keys()) + mdx23c_models + mdxnet_models + vrarch_models + demucs_models,
+                        value = lambda : [],
+                        multiselect = True,
+                        interactive = True
+                    )
+                with gr.Row():
+                    ensemble_method = gr.Dropdown(
+                        label = _("Ensemble method"),
+                        choices = ensemble_methods,
+                        value = ensemble_methods[0],
+                        interactive = True
+                    )
+                    ensemble_output_format = gr.Dropdown(
+                        label = _("Select the output format"),
+                        choices = output_format,
+                        value = lambda : None,
+                        interactive = True
+                    )
+                with gr.Row():
+                    ensemble_audio = gr.Audio(
+                        label = _("Input audio"),
+                        type = "filepath",
+                        interactive = True
+                    )
+                with gr.Row():
+                    ensemble_button = gr.Button(_("Separate!"), variant = "primary")
+                with gr.Row():
+                    ensemble_files = gr.File(
+                        label = _("Output files"),
+                        file_count = "multiple",
+                        interactive = False
+                    )
+
+                ensemble_button.click(ensemble_separator, [ensemble_audio, ensemble_models, ensemble_method, ensemble_output_format, roformer_overlap, roformer_segment_size, roformer_auto_segment, mdx23c_segment_size, mdx23c_overlap, mdx23c_denoise, mdx23c_auto_segment, mdxnet_segment_size, mdxnet_overlap, mdxnet_denoise, vrarch_window_size, vrarch_agression, vrarch_tta, vrarch_high_end_process, demucs_shifts, demucs_overlap], [ensemble_files], concurrency_limit = args.separate_concurrency or "default", concurrency_id = "separate")
+
+            with gr.TabItem(_("Pipeline")):
+                with gr.Row():
+                    gr.Markdown(_("Chains several models, each step separates the stem chosen in the previous one. Intermediate stems stay in memory, only the last step and the steps marked with \"save\" are written to the outputs folder."))
+                with gr.Row():
+                    pipeline_steps = gr.Code(
+                        label = _("Steps"),
+                        language = "json",
+                        value = pipeline_example,
+                        interactive = True
+                    )
+                with gr.Row():
+                    pipeline_output_format = gr.Dropdown(
+                        label = _("Select the output format"),
+                        choices = output_format,
+                        value = lambda : None,
+                        interactive = True
+                    )
+                with gr.Row():
+                    pipeline_audio = gr.Audio(
+                        label = _("Input audio"),
+                        type = "filepath",
+                        interactive = True
+                    )
+                with gr.Row():
+                    pipeline_button = gr.Button(_("Separate!"), variant = "primary")
+                with gr.Row():
+                    pipeline_files = gr.File(
+                        label = _("Output files"),
+                        file_count = "multiple",
+                        interactive = False
+                    )
+
+                pipeline_button.click(pipeline_separator, [pipeline_audio, pipeline_steps, pipeline_output_format], [pipeline_files], concurrency_limit = args.separate_concurrency or "default", concurrency_id = "separate")
+
             with gr.TabItem(_("Themes")):
                 themes_select = gr.Dropdown(
                     label = _("Theme"),
@@ -979,8 +1447,27 @@ with gr.Blocks(theme = loadThemes.load_json() or "NoCrypt/miku", title = "🎵 U
                     """
                     )
 
-app.launch(
-    share=args.share_enabled,
-    server_name="",
-    server_port=9999,
-)
\ No newline at end of file
+        app.load(refresh_model_choices, None, [roformer_model, mdx23c_model, mdxnet_model, vrarch_model, demucs_model])
+
+app.queue(default_concurrency_limit=args.concurrency_limit)
+print(f"Startup took {time.perf_counter() - startup:.1f}s")
+
+if args.api or args.metrics:
+    server = FastAPI()
+
+    if args.api:
+        server.include_router(create_router(worker, all_models, roformer_models, retention=retention))
+    if args.metrics:
+        server.include_router(create_metrics_router())
+
+    uvicorn.run(
+        gr.mount_gradio_app(server, app, path="/"),
+        host=os.getenv("GRADIO_SERVER_NAME", "127.0.0.1"),
+        port=args.listen_port or 9999,
+    )
+else:
+    app.launch(
+        share=args.share_enabled,
+        server_name="",
+        server_port=args.listen_port or 9999,
+    )
\ No newline at end of file
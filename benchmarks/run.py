@@ -0,0 +1,257 @@
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import subprocess
+import resource
+import tempfile
+import multiprocessing
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stub_models import build_stub_models, stub_models
+from core.models import arch_params as tab_params
+
+# Built by the same functions as the tabs with their defaults, so the benchmark runs what a user gets out of the box
+arch_params = {arch: tab_params["vrarch" if arch == "vr" else arch]() for arch in stub_models}
+
+
+def synthetic_audio(file_path, seconds, sample_rate):
+    import numpy as np
+    import soundfile as sf
+
+    # Fixed seed so every run separates exactly the same signal
+    rng = np.random.default_rng(0)
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    tones = sum(np.sin(2 * np.pi * frequency * t) for frequency in (110, 220, 440, 880)) / 8
+    audio = np.stack([tones, np.roll(tones, sample_rate // 100)], axis=1) + rng.normal(0, 0.05, (len(t), 2))
+    sf.write(file_path, audio.astype(np.float32), sample_rate, subtype="PCM_16")
+    return file_path
+
+
+def bytes_written(path):
+    return sum(os.path.getsize(os.path.join(root, file)) for root, _, files in os.walk(path) for file in files)
+
+
+def peak_rss():
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage if sys.platform == "darwin" else usage * 1024
+
+
+def run_single(worker, model, params, input_file, output_dir):
+    worker.separate(input_file, model, output_dir, "wav", params)
+
+
+def run_batch(worker, model, params, input_file, output_dir, files=4, workers=1, model_dir=None):
+    from core.batch import BatchEngine
+
+    input_dir = os.path.join(output_dir, "input")
+    os.makedirs(input_dir, exist_ok=True)
+    input_files = [shutil.copy(input_file, os.path.join(input_dir, f"{index}.wav")) for index in range(files)]
+
+    for event, file_path, result in BatchEngine(workers=workers, model_file_dir=model_dir).run(input_files, model, output_dir, "wav", params):
+        if event == "failed":
+            raise result
+
+
+def serve_directory(path):
+    # A local HTTP server stands in for the sites yt-dlp downloads from
+    import threading
+    from functools import partial
+    from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+    class QuietHandler(SimpleHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+    class QuietServer(ThreadingHTTPServer):
+        # yt-dlp probes direct links and closes the connection early
+        def handle_error(self, request, client_address):
+            pass
+
+    server = QuietServer(("127.0.0.1", 0), partial(QuietHandler, directory=path))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def run_link(worker, model, params, input_file, output_dir):
+    from core.download import download_audio
+
+    server, base_url = serve_directory(os.path.dirname(input_file))
+
+    try:
+        download_audio(f"{base_url}/{os.path.basename(input_file)}", os.path.join(output_dir, "ytdl"), quiet=True)
+    finally:
+        server.shutdown()
+
+
+def run_links(worker, model, params, input_file, output_dir, files=4, workers=2):
+    from core.download import separate_links
+
+    input_dir = os.path.join(output_dir, "input")
+    os.makedirs(input_dir, exist_ok=True)
+    input_files = [shutil.copy(input_file, os.path.join(input_dir, f"{index}.wav")) for index in range(files)]
+    server, base_url = serve_directory(input_dir)
+
+    try:
+        urls = [f"{base_url}/{os.path.basename(file_path)}" for file_path in input_files]
+        events = separate_links(worker, urls, model, output_dir, "wav", params, workers, os.path.join(output_dir, "ytdl"), quiet=True)
+
+        for event, url, result in events:
+            if event == "failed":
+                raise RuntimeError(f"{url}: {result}")
+    finally:
+        server.shutdown()
+
+
+cases = {"single": run_single, "batch": run_batch, "link": run_link, "links": run_links}
+
+
+def run_case(case, arch, seconds, sample_rate, model_dir, work_dir, options):
+    # Demucs checkpoints pickle their model class, which torch >= 2.6 refuses by default; the stubs are built locally
+    os.environ.setdefault("TORCH_FORCE_NO_WEIGHTS_ONLY_LOAD", "1")
+
+    from core.worker import get_worker
+
+    case_dir = os.path.join(work_dir, f"{case}-{arch}-{seconds}s-{sample_rate}")
+    input_file = synthetic_audio(os.path.join(work_dir, f"input-{seconds}s-{sample_rate}.wav"), seconds, sample_rate)
+    worker = get_worker(model_file_dir=model_dir)
+    model, params = stub_models[arch], arch_params[arch]
+
+    result = {"case": case, "arch": arch, "model": model, "seconds": seconds, "sample_rate": sample_rate}
+
+    # The first run pays for the model load, the second one is the steady state
+    timings = []
+    for run in ("cold", "warm"):
+        output_dir = os.path.join(case_dir, run)
+        os.makedirs(output_dir, exist_ok=True)
+        start = time.perf_counter()
+
+        try:
+            cases[case](worker, model, params, input_file, output_dir, **options.get(case, {}))
+        except Exception as error:
+            # Some errors (yt-dlp's) can't be pickled back to the parent, so only the message is returned
+            shutil.rmtree(case_dir, ignore_errors=True)
+            return {**result, "error": f"{type(error).__name__}: {error}"}
+
+        timings.append(time.perf_counter() - start)
+
+    files = options.get(case, {}).get("files", 1)
+    result.update({
+        "cold_wall": timings[0],
+        "wall": timings[1],
+        "rtf": timings[1] / (seconds * files),
+        "peak_rss": peak_rss(),
+        "bytes_written": bytes_written(os.path.join(case_dir, "warm")),
+    })
+
+    shutil.rmtree(case_dir, ignore_errors=True)
+    return result
+
+
+def startup_time(command, runs=3):
+    # Best of a few fresh interpreters, the first one mostly warms the file cache
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    timings = []
+
+    for _ in range(runs):
+        start = time.perf_counter()
+
+        if subprocess.run(command, cwd=root, capture_output=True).returncode != 0:
+            return None
+
+        timings.append(time.perf_counter() - start)
+
+    return min(timings)
+
+
+def startup_times():
+    return {
+        "cli": startup_time([sys.executable, "-m", "core", "--help"]),
+        "cli_separate": startup_time([sys.executable, "-c", "from core.cli import model_params, separate_command; import core.worker, core.models"]),
+        # Everything app.py imports before building the tabs, None when the UI dependencies aren't installed
+        "ui_imports": startup_time([sys.executable, "app.py", "--help"]),
+    }
+
+
+def versions():
+    from importlib import metadata
+
+    packages = {}
+    for package in ("audio-separator", "torch", "onnxruntime", "numpy", "yt-dlp"):
+        try:
+            packages[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            packages[package] = None
+    return packages
+
+
+def main(argv=None):
+    parser = ArgumentParser(description="Benchmark every separation path with stub models and synthetic audio")
+    parser.add_argument("--cases", nargs="+", choices=list(cases), default=list(cases))
+    parser.add_argument("--archs", nargs="+", choices=list(stub_models), default=list(stub_models))
+    parser.add_argument("--lengths", nargs="+", type=float, default=[10, 60], help="Input lengths in seconds.")
+    parser.add_argument("--sample-rates", nargs="+", type=int, default=[44100, 48000])
+    parser.add_argument("--batch-files", type=int, default=4)
+    parser.add_argument("--batch-workers", type=int, default=1)
+    parser.add_argument("--download-workers", type=int, default=2, help="Concurrent downloads of the links case.")
+    parser.add_argument("--work-dir", help="Where stub models, inputs and outputs are written (a temporary directory by default).")
+    parser.add_argument("--output", default=os.path.join("benchmarks", "results", f"{datetime.now(timezone.utc):%Y%m%d-%H%M%S}.json"))
+    args = parser.parse_args(argv)
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="uvr5-bench-")
+    model_dir = os.path.join(work_dir, "models")
+    build_stub_models(model_dir)
+
+    options = {
+        "batch": {"files": args.batch_files, "workers": args.batch_workers, "model_dir": model_dir},
+        "links": {"files": args.batch_files, "workers": args.download_workers},
+    }
+    results = []
+    context = multiprocessing.get_context("spawn")
+
+    for case in args.cases:
+        # The link path never touches a model, one architecture is enough
+        for arch in (args.archs[:1] if case == "link" else args.archs):
+            for seconds in args.lengths:
+                for sample_rate in args.sample_rates:
+                    # A fresh process per case so peak RSS belongs to that case alone
+                    with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                        try:
+                            result = pool.submit(run_case, case, arch, seconds, sample_rate, model_dir, work_dir, options).result()
+                        except Exception as error:
+                            result = {"case": case, "arch": arch, "seconds": seconds, "sample_rate": sample_rate, "error": f"{type(error).__name__}: {error}"}
+
+                    if case == "link":
+                        result.pop("arch")
+                        result.pop("model", None)
+
+                    results.append(result)
+                    print(json.dumps(result))
+
+    report = {
+        "created": datetime.now(timezone.utc).isoformat(),
+        "machine": {"platform": platform.platform(), "python": platform.python_version(), "processor": platform.processor(), "cpus": os.cpu_count()},
+        "packages": versions(),
+        "startup": startup_times(),
+        "results": results,
+    }
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w", encoding="utf8") as report_file:
+        json.dump(report, report_file, indent=2)
+
+    if not args.work_dir:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(f"Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+import os
+import json
+import hashlib
+
+# Tiny randomly initialised models built from audio-separator's own architecture classes, with the
+# download list and model data files audio-separator looks for, so loading them never reaches the network
+stub_models = {
+    "roformer": "stub_bs_roformer.ckpt",
+    "mdx23c": "stub_mdx23c.ckpt",
+    "mdxnet": "stub_mdxnet.onnx",
+    "vr": "stub_vr.pth",
+    "demucs": "stub_htdemucs.yaml",
+}
+
+demucs_signature = "0badc0de"
+
+roformer_config = {
+    "audio": {"chunk_size": 131584, "dim_f": 1024, "dim_t": 257, "hop_length": 512, "n_fft": 2048, "num_channels": 2, "sample_rate": 44100, "min_mean_abs": 0.0},
+    "model": {
+        "dim": 16,
+        "depth": 1,
+        "stereo": True,
+        "num_stems": 1,
+        "time_transformer_depth": 1,
+        "freq_transformer_depth": 1,
+        "linear_transformer_depth": 0,
+        "freqs_per_bands": (64,) * 16 + (1,),
+        "dim_head": 8,
+        "heads": 2,
+        "attn_dropout": 0.0,
+        "ff_dropout": 0.0,
+        "flash_attn": False,
+        "dim_freqs_in": 1025,
+        "stft_n_fft": 2048,
+        "stft_hop_length": 512,
+        "stft_win_length": 2048,
+        "stft_normalized": False,
+        "mask_estimator_depth": 1,
+    },
+    "training": {"instruments": ["Vocals", "Instrumental"], "target_instrument": "Vocals"},
+    "inference": {"batch_size": 1, "dim_t": 257, "num_overlap": 2},
+}
+
+mdx23c_config = {
+    "audio": {"chunk_size": 261120, "dim_f": 1024, "dim_t": 256, "hop_length": 1024, "n_fft": 2048, "num_channels": 2, "sample_rate": 44100, "min_mean_abs": 0.001},
+    "model": {"act": "gelu", "bottleneck_factor": 4, "growth": 8, "norm": "InstanceNorm", "num_blocks_per_scale": 1, "num_channels": 8, "num_scales": 2, "num_subbands": 4, "scale": [2, 2]},
+    "training": {"instruments": ["Vocals", "Instrumental"], "target_instrument": None},
+    "inference": {"batch_size": 1, "dim_t": 256, "num_overlap": 2},
+}
+
+mdxnet_data = {"compensate": 1.0, "mdx_dim_f_set": 1024, "mdx_dim_t_set": 8, "mdx_n_fft_scale_set": 2048, "primary_stem": "Vocals"}
+vr_data = {"vr_model_param": "1band_sr44100_hl512", "primary_stem": "Vocals", "nout": 8, "nout_lstm": 16}
+
+
+def file_hash(file_path):
+    # Same hash audio-separator uses to look models up in the UVR model data files
+    with open(file_path, "rb") as model_file:
+        try:
+            model_file.seek(-10000 * 1024, 2)
+        except OSError:
+            model_file.seek(0)
+        return hashlib.md5(model_file.read()).hexdigest()
+
+
+def write_yaml(file_path, data):
+    import yaml
+
+    # Plain dump keeps tuples as !!python/tuple, the same way the released Roformer configs store freqs_per_bands
+    with open(file_path, "w", encoding="utf8") as yaml_file:
+        yaml.dump(data, yaml_file)
+
+
+def build_roformer(model_dir):
+    import torch
+    from ml_collections import ConfigDict
+    from audio_separator.separator.uvr_lib_v5.roformer.bs_roformer import BSRoformer
+
+    torch.manual_seed(0)
+    model = BSRoformer(**ConfigDict(roformer_config).model)
+    torch.save(model.state_dict(), os.path.join(model_dir, stub_models["roformer"]))
+    # audio-separator only treats a config as a Roformer one when "roformer" is in its file name
+    write_yaml(os.path.join(model_dir, "stub_bs_roformer.yaml"), roformer_config)
+
+
+def build_mdx23c(model_dir):
+    import torch
+    from ml_collections import ConfigDict
+    from audio_separator.separator.uvr_lib_v5.tfc_tdf_v3 import TFC_TDF_net
+
+    torch.manual_seed(0)
+    model = TFC_TDF_net(ConfigDict(mdx23c_config), device="cpu")
+    torch.save(model.state_dict(), os.path.join(model_dir, stub_models["mdx23c"]))
+    write_yaml(os.path.join(model_dir, "stub_mdx23c.yaml"), mdx23c_config)
+
+
+def build_mdxnet(model_dir):
+    import numpy as np
+    from onnx import TensorProto, helper, numpy_helper, save
+
+    # A single 1x1 convolution over the (batch, 4, dim_f, dim_t) spectrogram the MDX-Net models take
+    rng = np.random.default_rng(0)
+    dim_f, dim_t = mdxnet_data["mdx_dim_f_set"], 2 ** mdxnet_data["mdx_dim_t_set"]
+    weight = numpy_helper.from_array(rng.normal(0, 0.5, (4, 4, 1, 1)).astype(np.float32), "weight")
+    graph = helper.make_graph(
+        [helper.make_node("Conv", ["input", "weight"], ["output"])],
+        "stub_mdxnet",
+        [helper.make_tensor_value_info("input", TensorProto.FLOAT, ["batch", 4, dim_f, dim_t])],
+        [helper.make_tensor_value_info("output", TensorProto.FLOAT, ["batch", 4, dim_f, dim_t])],
+        [weight],
+    )
+    save(helper.make_model(graph, ir_version=8, opset_imports=[helper.make_opsetid("", 13)]), os.path.join(model_dir, stub_models["mdxnet"]))
+
+
+def build_vr(model_dir):
+    import torch
+    from audio_separator.separator.uvr_lib_v5.vr_network import nets_new
+    from audio_separator.separator.uvr_lib_v5.vr_network.model_param_init import ModelParameters
+
+    package_dir = os.path.dirname(nets_new.__file__)
+    model_params = ModelParameters(os.path.join(package_dir, "modelparams", f"{vr_data['vr_model_param']}.json"))
+
+    torch.manual_seed(0)
+    model = nets_new.CascadedNet(model_params.param["bins"] * 2, nout=vr_data["nout"], nout_lstm=vr_data["nout_lstm"])
+    torch.save(model.state_dict(), os.path.join(model_dir, stub_models["vr"]))
+
+
+def build_demucs(model_dir):
+    import torch
+    from audio_separator.separator.uvr_lib_v5.demucs.htdemucs import HTDemucs
+
+    kwargs = {"sources": ["drums", "bass", "other", "vocals"], "channels": 8, "depth": 4, "t_layers": 1, "t_heads": 2, "samplerate": 44100, "segment": 4}
+
+    torch.manual_seed(0)
+    model = HTDemucs(**kwargs)
+    torch.save({"klass": HTDemucs, "args": [], "kwargs": kwargs, "state": model.state_dict()}, os.path.join(model_dir, f"{demucs_signature}.th"))
+    write_yaml(os.path.join(model_dir, stub_models["demucs"]), {"models": [demucs_signature]})
+
+
+def build_stub_models(model_dir):
+    os.makedirs(model_dir, exist_ok=True)
+
+    for build in (build_roformer, build_mdx23c, build_mdxnet, build_vr, build_demucs):
+        build(model_dir)
+
+    download_checks = {
+        "vr_download_list": {"VR Arch Single Model v5: Stub": stub_models["vr"]},
+        "mdx_download_list": {"MDX-Net Model: Stub": stub_models["mdxnet"]},
+        "mdx_download_vip_list": {},
+        "demucs_download_list": {"Demucs v4: stub_htdemucs": {f"{demucs_signature}.th": f"https://localhost/{demucs_signature}.th", stub_models["demucs"]: f"https://localhost/{stub_models['demucs']}"}},
+        "mdx23c_download_list": {"MDX23C Model: Stub": {stub_models["mdx23c"]: "stub_mdx23c.yaml"}},
+        "mdx23c_download_vip_list": {},
+        "roformer_download_list": {"Roformer Model: Stub": {stub_models["roformer"]: "stub_bs_roformer.yaml"}},
+    }
+
+    model_data = {
+        "download_checks.json": download_checks,
+        "mdx_model_data.json": {file_hash(os.path.join(model_dir, stub_models["mdxnet"])): mdxnet_data},
+        "vr_model_data.json": {file_hash(os.path.join(model_dir, stub_models["vr"])): vr_data},
+    }
+
+    for file_name, data in model_data.items():
+        with open(os.path.join(model_dir, file_name), "w", encoding="utf8") as data_file:
+            json.dump(data, data_file, indent=2)
+
+    return stub_models
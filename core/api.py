@@ -0,0 +1,183 @@
+import os
+import json
+import time
+import shutil
+import threading
+from fastapi import APIRouter, File, Form, HTTPException, UploadFile
+from fastapi.responses import FileResponse
+from core.jobs import Job
+from core.encoder import output_formats
+from core.models import model_params, output_format as output_format_choices
+from core.worker import stem_name, interactive_priority, batch_priority
+
+priorities = {"interactive": interactive_priority, "batch": batch_priority}
+
+
+def job_status(job, future):
+    now = time.time()
+
+    if future.cancelled():
+        status = "cancelled"
+    elif future.done():
+        status = "failed" if future.exception() else "done"
+    elif future.started:
+        status = "running"
+    else:
+        status = "queued"
+
+    info = {
+        "id": job.id,
+        "status": status,
+        "model": job.model,
+        "wait_time": (future.started or future.finished or now) - future.submitted,
+        "run_time": (future.finished or now) - future.started if future.started else None,
+        "skipped_seconds": round(job.timer.skipped_seconds, 3),
+        "stems": [],
+    }
+
+    if status == "done":
+        info["stems"] = [{"name": stem_name(file), "format": os.path.splitext(file)[1][1:], "url": f"/api/jobs/{job.id}/stems/{index}"} for index, file in enumerate(future.result())]
+    elif status == "failed":
+        info["error"] = str(future.exception())
+
+    return info
+
+
+def input_path(path, input_root):
+    # Files already on the server are only read from the input folder, never from anywhere else the process can reach
+    path = os.path.realpath(path)
+    input_root = os.path.realpath(input_root)
+
+    if os.path.commonpath([path, input_root]) != input_root or not os.path.isfile(path):
+        return None
+
+    return path
+
+
+def finish_status(future):
+    if future.cancelled():
+        return "cancelled", None
+    if future.exception():
+        return "failed", future.exception()
+    return "done", None
+
+
+def create_router(worker, models, model_aliases=None, input_root="inputs", output_root="outputs", keep_seconds=3600, retention=None):
+    router = APIRouter(prefix="/api")
+    model_aliases = model_aliases or {}
+    jobs = {}
+    jobs_lock = threading.Lock()
+
+    def get_job(job_id):
+        with jobs_lock:
+            if job_id not in jobs:
+                raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+            return jobs[job_id]
+
+    def forget_old_jobs():
+        now = time.time()
+
+        for job_id, (job, future) in list(jobs.items()):
+            if future.done() and now - (future.finished or future.submitted) > keep_seconds:
+                del jobs[job_id]
+
+    @router.post("/jobs")
+    def submit_job(
+        model: str = Form(...),
+        output_format: str = Form("wav"),
+        params: str = Form("{}"),
+        priority: str = Form("interactive"),
+        skip_silence: bool = Form(False),
+        path: str = Form(None),
+        file: UploadFile = File(None),
+    ):
+        model = model_aliases.get(model, model)
+
+        if model not in models:
+            raise HTTPException(status_code=400, detail=f"Unknown model {model}")
+        if priority not in priorities:
+            raise HTTPException(status_code=400, detail=f"Priority must be one of {', '.join(priorities)}")
+
+        # Several formats separated by commas are all written from the same inference
+        output_format = output_formats(output_format.split(","))
+
+        if any(value not in output_format_choices for value in output_format):
+            raise HTTPException(status_code=400, detail=f"Output format must be one or more of {', '.join(output_format_choices)}")
+
+        # Checked like the options of the model's tab, the separator never sees a value the UI wouldn't accept
+        try:
+            params = model_params(model, json.loads(params))
+        except ValueError as error:
+            raise HTTPException(status_code=400, detail=f"Invalid params: {error}")
+
+        if file is None:
+            path = path and input_path(path, input_root)
+
+            if not path:
+                raise HTTPException(status_code=400, detail=f"Send an audio file or the path of an existing file in {input_root}")
+
+        job = Job(input_root, output_root, handler="api")
+        job.model = job.timer.model = model
+
+        if file is not None:
+            job.input_file = os.path.join(input_root, f"{job.id}{os.path.splitext(file.filename or '')[1] or '.wav'}")
+
+            with job.timer.stage("write_input"), open(job.input_file, "wb") as input_file:
+                shutil.copyfileobj(file.file, input_file)
+        else:
+            job.input_file = path
+
+        future = worker.submit(job.input_file, model, job.output_dir, output_format, params, priorities[priority], timer=job.timer, skip_silence=skip_silence)
+        future.add_done_callback(lambda future: job.timer.finish(*finish_status(future)))
+
+        with jobs_lock:
+            forget_old_jobs()
+            jobs[job.id] = (job, future)
+
+        return job_status(job, future)
+
+    @router.get("/jobs/{job_id}")
+    def get_job_status(job_id: str):
+        return job_status(*get_job(job_id))
+
+    @router.get("/jobs/{job_id}/stems/{index}")
+    def get_stem(job_id: str, index: int):
+        job, future = get_job(job_id)
+
+        if not future.done() or future.cancelled() or future.exception():
+            raise HTTPException(status_code=409, detail=f"Job {job_id} has no stems")
+
+        files = future.result()
+
+        if not 0 <= index < len(files) or not os.path.isfile(files[index]):
+            raise HTTPException(status_code=404, detail=f"Stem {index} not found")
+
+        return FileResponse(files[index], filename=os.path.basename(files[index]))
+
+    @router.delete("/jobs/{job_id}")
+    def cancel_job(job_id: str):
+        job, future = get_job(job_id)
+
+        if not future.cancel() and not future.cancelled():
+            raise HTTPException(status_code=409, detail=f"Job {job_id} is already {job_status(job, future)['status']}")
+
+        return job_status(job, future)
+
+    @router.get("/queue")
+    def queue_status():
+        with jobs_lock:
+            statuses = [job_status(job, future) for job, future in jobs.values()]
+
+        return {
+            **worker.stats(),
+            "jobs": statuses,
+        }
+
+    @router.get("/storage")
+    def storage_status():
+        if retention is None:
+            raise HTTPException(status_code=404, detail="Retention is disabled")
+
+        return retention.stats()
+
+    return router
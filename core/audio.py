@@ -0,0 +1,80 @@
+import os
+import uuid
+import tempfile
+import numpy as np
+
+
+def scratch_dir():
+    # tmpfs where available, so handing arrays to the separator never touches the disk
+    root = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    path = os.path.join(root, "uvr5-ui")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def read_audio(file_path, seconds=None):
+    import soundfile as sf
+
+    try:
+        with sf.SoundFile(file_path) as audio_file:
+            sample_rate = audio_file.samplerate
+            audio = audio_file.read(-1 if seconds is None else int(seconds * sample_rate), dtype="float32", always_2d=True)
+    except RuntimeError:
+        import librosa
+
+        # Formats libsndfile can't read (m4a, older builds without mp3) go through ffmpeg
+        audio, sample_rate = librosa.load(file_path, sr=None, mono=False, duration=seconds)
+        audio = np.atleast_2d(audio).T
+
+    return sample_rate, audio
+
+
+def sndfile_input(file_path):
+    import soundfile as sf
+
+    # libsndfile reads wav, flac, ogg and mp3 in place, anything else is decoded once into tmpfs
+    try:
+        sf.info(file_path)
+        return file_path, None
+    except RuntimeError:
+        sample_rate, audio = read_audio(file_path)
+        decoded_file = os.path.join(scratch_dir(), f"{uuid.uuid4().hex}.wav")
+        sf.write(decoded_file, audio, sample_rate, subtype="FLOAT")
+        return decoded_file, decoded_file
+
+
+def separate_array(worker, sample_rate, audio, model, params, priority=0, timer=None):
+    import soundfile as sf
+
+    input_file = os.path.join(scratch_dir(), f"{uuid.uuid4().hex}.wav")
+    sf.write(input_file, audio, sample_rate, subtype="FLOAT")
+
+    try:
+        return worker.separate(input_file, model, scratch_dir(), "wav", params, priority, capture=True, timer=timer)
+    finally:
+        os.remove(input_file)
+
+
+def write_stem(file_path, sample_rate, data, normalization=0.9):
+    import soundfile as sf
+
+    data = np.asarray(data, dtype=np.float32)
+    peak = np.abs(data).max() if data.size else 0
+
+    if peak > normalization:
+        data = data * (normalization / peak)
+
+    output_format = os.path.splitext(file_path)[1][1:].lower()
+    os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+
+    if output_format.upper() in sf.available_formats():
+        sf.write(file_path, data, sample_rate, subtype="PCM_16" if output_format == "wav" else None)
+    else:
+        from pydub import AudioSegment
+
+        samples = (data * 32767).astype(np.int16)
+        channels = samples.shape[1] if samples.ndim == 2 else 1
+        segment = AudioSegment(samples.tobytes(), frame_rate=sample_rate, sample_width=2, channels=channels)
+        segment.export(file_path, format=output_format, bitrate="320k" if output_format == "mp3" else None)
+
+    return file_path
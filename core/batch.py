@@ -0,0 +1,270 @@
+import os
+import time
+import fnmatch
+import subprocess
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from core.worker import get_worker, batch_priority
+from core.audio import scratch_dir
+from core.models import extensions
+from core.progress import format_duration
+from core.pinning import init_process
+
+
+def parse_globs(text):
+    return [pattern.strip() for pattern in (text or "").split(",") if pattern.strip()]
+
+
+def matches(file, patterns):
+    # A pattern without a folder applies to the file name wherever it is, "live/*" to the relative path
+    return any(fnmatch.fnmatch(file, pattern) or fnmatch.fnmatch(os.path.basename(file), pattern) for pattern in patterns)
+
+
+def find_audio_files(path_input, recursive=False, include=(), exclude=(), skip=()):
+    # Paths are relative to path_input, so the output tree can mirror the input tree
+    skip = {os.path.abspath(path) for path in skip}
+    files = []
+
+    for root, folders, names in os.walk(path_input):
+        # Folders in skip (usually the output folder inside the input) are never entered
+        folders[:] = sorted(folder for folder in folders if os.path.abspath(os.path.join(root, folder)) not in skip) if recursive else []
+        relative_root = os.path.relpath(root, path_input)
+
+        for name in names:
+            file = name if relative_root == "." else os.path.join(relative_root, name).replace(os.sep, "/")
+
+            if name.endswith(extensions) and (not include or matches(file, include)) and not matches(file, exclude):
+                files.append(file)
+
+    return sorted(files)
+
+
+def probe_duration(file_path):
+    import soundfile as sf
+
+    # Only the header is read, wav and flac without decoding anything
+    try:
+        return sf.info(file_path).duration
+    except RuntimeError:
+        pass
+
+    try:
+        probe = subprocess.run(["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "csv=p=0", file_path], capture_output=True, text=True, timeout=30)
+        return float(probe.stdout.strip())
+    except (OSError, ValueError, subprocess.TimeoutExpired):
+        return 0
+
+
+def probe_durations(file_paths, threads=8):
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        return dict(zip(file_paths, pool.map(probe_duration, file_paths)))
+
+
+def longest_first(file_paths, durations):
+    # Longest processing time first, the short files fill the gaps at the end instead of one long straggler
+    return sorted(file_paths, key=lambda file_path: durations.get(file_path, 0), reverse=True)
+
+
+def mirrored_dir(file_path, input_root, output_root):
+    if input_root is None:
+        return output_root
+
+    return os.path.normpath(os.path.join(output_root, os.path.relpath(os.path.dirname(os.path.abspath(file_path)), os.path.abspath(input_root))))
+
+
+class BatchProgress:
+    def __init__(self, durations, seconds_per_second=None):
+        self.durations = durations
+        # Separation seconds per second of audio from previous runs, the estimate until the first file is done
+        self.seconds_per_second = seconds_per_second
+        self.total = sum(durations.values())
+        self.done = 0
+        self.start = time.perf_counter()
+
+    def update(self, file_path):
+        self.done += self.durations.get(file_path, 0)
+
+    def eta(self):
+        elapsed = time.perf_counter() - self.start
+
+        if self.done <= 0 and self.seconds_per_second is not None:
+            return max(0, self.total * self.seconds_per_second - elapsed)
+
+        # Audio separated per second of wall time so far, it already covers every worker running at once
+        if self.done <= 0 or elapsed <= 0:
+            return None
+
+        observed = elapsed / self.done
+
+        # The first files also pay for loading the model, previous runs weigh less as more of the batch is done
+        if self.seconds_per_second is not None:
+            observed = self.seconds_per_second + (observed - self.seconds_per_second) * self.fraction()
+
+        return (self.total - self.done) * observed
+
+    def fraction(self):
+        return min(1, self.done / self.total) if self.total > 0 else 0
+
+    def seconds_per_audio_second(self):
+        return (time.perf_counter() - self.start) / self.done if self.done > 0 else None
+
+    def message(self):
+        eta = self.eta()
+        left = f"{format_duration(self.total - self.done)} of {format_duration(self.total)} of audio left"
+        return f"{left}, about {format_duration(eta)} remaining" if eta is not None else left
+
+
+def batch_message(event, file_path, result):
+    audio_files = os.path.basename(file_path)
+
+    if event == "processing":
+        return f"Processing file: {audio_files}"
+    elif event == "processed":
+        return f"File: {audio_files} processed!"
+    elif event == "duplicate":
+        return f"File: {audio_files} is a copy of {os.path.basename(result)}, stems linked"
+    else:
+        return f"File: {audio_files} failed: {result}"
+
+
+def available_cores():
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def core_slices(workers, threads=None):
+    cores = available_cores()
+    threads = threads or max(1, len(cores) // workers)
+    return [[cores[(index * threads + offset) % len(cores)] for offset in range(threads)] for index in range(workers)]
+
+
+def separate_file(file_path, model, output_dir, output_format, params, **options):
+    return get_worker().separate(file_path, model, output_dir, output_format, params, **options)
+
+
+class BatchEngine:
+    def __init__(self, workers=1, threads=None, model_cache_size=4 * 1024 ** 3, model_file_dir="./models"):
+        self.workers = max(1, workers)
+        self.threads = threads
+        self.model_cache_size = model_cache_size
+        self.model_file_dir = model_file_dir
+        self.pool = None
+
+    def get_pool(self):
+        if self.pool is None:
+            context = multiprocessing.get_context("spawn")
+            slices = context.Queue()
+
+            for cores in core_slices(self.workers, self.threads):
+                slices.put(cores)
+
+            self.pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=context,
+                initializer=init_process,
+                initargs=(slices, self.model_cache_size // self.workers, self.model_file_dir),
+            )
+
+        return self.pool
+
+    def submit_capture(self, file_path, model, params):
+        # The stems come back as arrays, so several models of an ensemble run at once on their own share of the cores
+        pool = self.get_pool()
+        future = pool.submit(separate_file, file_path, model, scratch_dir(), "wav", params, capture=True)
+
+        def discard(future):
+            # A worker died (usually OOM), the next submit starts a fresh pool
+            if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool) and self.pool is pool:
+                self.pool = None
+
+        future.add_done_callback(discard)
+        return future
+
+    def seconds_per_second(self, model, params):
+        # What previous runs of the model took on this host, shared by every worker
+        history = get_worker().history
+        history.refresh()
+        rate = history.seconds_per_second(model, params)
+        return None if rate is None else rate / self.workers
+
+    def run(self, files, model, output_dir, output_format, params, input_root=None, **options):
+        # With input_root, the stems of input_root/a/b.wav land in output_dir/a
+        if self.workers == 1:
+            worker = get_worker()
+            pending = iter(files)
+            queued = deque()
+
+            def submit():
+                file_path = next(pending, None)
+
+                if file_path is not None:
+                    queued.append((file_path, worker.submit(file_path, model, mirrored_dir(file_path, input_root, output_dir), output_format, params, batch_priority, **options)))
+
+            # The next file waits in the worker queue, its inference starts while the stems of the current one are encoded
+            submit()
+            submit()
+
+            try:
+                while queued:
+                    file_path, future = queued.popleft()
+                    yield "processing", file_path, None
+
+                    try:
+                        yield "processed", file_path, future.result()
+                    except Exception as error:
+                        yield "failed", file_path, error
+
+                    submit()
+            finally:
+                for _, future in queued:
+                    future.cancel()
+            return
+
+        pending = iter(files)
+        running = {}
+
+        def dispatch():
+            file_path = next(pending, None)
+
+            if file_path is not None:
+                pool = self.get_pool()
+                running[pool.submit(separate_file, file_path, model, mirrored_dir(file_path, input_root, output_dir), output_format, params, **options)] = (file_path, pool)
+
+            return file_path
+
+        try:
+            # Only as many files as workers are in flight, so "processing" always means a worker has it
+            for _ in range(self.workers):
+                file_path = dispatch()
+
+                if file_path is not None:
+                    yield "processing", file_path, None
+
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    file_path, pool = running.pop(future)
+
+                    try:
+                        yield "processed", file_path, future.result()
+                    except BrokenProcessPool as error:
+                        # A worker died (usually OOM), the next dispatch starts a fresh pool
+                        if self.pool is pool:
+                            self.pool = None
+                        yield "failed", file_path, error
+                    except Exception as error:
+                        yield "failed", file_path, error
+
+                    file_path = dispatch()
+
+                    if file_path is not None:
+                        yield "processing", file_path, None
+        finally:
+            # Closing the generator (a cancelled batch) drops the files not picked up yet,
+            # the ones already running finish in their worker but aren't recorded, the next run separates them again
+            for future in running:
+                future.cancel()
@@ -0,0 +1,240 @@
+import os
+import sys
+import json
+from argparse import ArgumentParser, BooleanOptionalAction
+
+# Settings of each architecture, only the ones the model's builder accepts may be given
+param_options = ["overlap", "segment_size", "denoise", "window_size", "aggression", "tta", "high_end_process", "shifts"]
+
+
+def segment_size(value):
+    return value if value == "auto" else int(value)
+
+
+def add_model_arguments(parser):
+    parser.add_argument("--model", required=True, help="Model file name, or the name of a Roformer model as shown in the UI.")
+    parser.add_argument("--output-format", nargs="+", choices=["wav", "flac", "mp3"], default=["wav"], help="One or more formats, all written from the same separation.")
+    parser.add_argument("--model-dir", default="./models", help="Where models are downloaded and loaded from.")
+    parser.add_argument("--skip-silence", action="store_true", help="Only run the model on the parts of the input that aren't silent, the gaps are silent in the stems.")
+    parser.add_argument("--memory-budget", type=float, help="Memory in GB an auto segment size may use (defaults to most of the free memory).")
+    parser.add_argument("--overlap", type=float, help="Roformer, MDX23C, MDX-Net and Demucs.")
+    parser.add_argument("--segment-size", type=segment_size, help="Roformer, MDX23C and MDX-Net, \"auto\" picks the fastest one that fits in memory (Roformer and MDX23C).")
+    parser.add_argument("--denoise", action=BooleanOptionalAction, help="MDX23C and MDX-Net.")
+    parser.add_argument("--window-size", type=int, help="VR Arch.")
+    parser.add_argument("--aggression", type=int, help="VR Arch.")
+    parser.add_argument("--tta", action=BooleanOptionalAction, help="VR Arch.")
+    parser.add_argument("--high-end-process", action=BooleanOptionalAction, help="VR Arch.")
+    parser.add_argument("--shifts", type=int, help="Demucs.")
+
+
+def model_params(parser, args):
+    import inspect
+    from core.models import arch_params, model_arch, resolve_model
+
+    try:
+        model = resolve_model(args.model)
+    except ValueError as error:
+        parser.error(str(error))
+
+    arch = model_arch(model)
+    builder = arch_params[arch]
+    accepted = inspect.signature(builder).parameters
+    given = {option: getattr(args, option) for option in param_options if getattr(args, option) is not None}
+    unsupported = [option for option in given if option not in accepted]
+
+    if unsupported:
+        parser.error(f"{', '.join('--' + option.replace('_', '-') for option in unsupported)} can't be used with {arch} models")
+
+    try:
+        return model, builder(**given)
+    except ValueError as error:
+        parser.error(str(error))
+
+
+def memory_budget(args):
+    return int(args.memory_budget * 1024 ** 3) if args.memory_budget else None
+
+
+def separate_command(parser, args):
+    from core.worker import get_worker
+
+    model, params = model_params(parser, args)
+    worker = get_worker(model_file_dir=args.model_dir, memory_budget=memory_budget(args))
+    failed = 0
+
+    for input_file in args.inputs:
+        try:
+            for stem in worker.separate(input_file, model, args.output_dir, args.output_format, params, skip_silence=args.skip_silence):
+                print(stem)
+        except Exception as error:
+            failed += 1
+            print(f"File: {os.path.basename(input_file)} failed: {error}", file=sys.stderr)
+
+    return 1 if failed else 0
+
+
+def batch_command(parser, args):
+    from core.batch import BatchEngine, BatchProgress, batch_message, find_audio_files, longest_first, probe_durations
+    from core.manifest import Manifest
+    from core.silence import with_silence
+    from core.worker import get_worker
+
+    model, params = model_params(parser, args)
+
+    if not os.path.isdir(args.input_dir):
+        parser.error(f"{args.input_dir} is not a folder")
+
+    # The single worker path of the engine uses the resident worker, it must load from --model-dir too
+    get_worker(model_file_dir=args.model_dir, memory_budget=memory_budget(args))
+    engine = BatchEngine(workers=args.workers, threads=args.threads, model_file_dir=args.model_dir)
+    manifest = Manifest(args.output_dir, model, args.output_format, with_silence(params, args.skip_silence))
+    files = find_audio_files(args.input_dir, args.recursive, args.include, args.exclude, skip=[args.output_dir])
+    file_paths = [os.path.join(args.input_dir, file) for file in files]
+    total_files = len(file_paths)
+
+    if not args.force:
+        file_paths = [file_path for file_path in file_paths if manifest.needs_processing(file_path)]
+
+    print(f"{total_files} audio files found")
+
+    if len(file_paths) < total_files:
+        print(f"{total_files - len(file_paths)} files already processed with these settings, skipping them")
+
+    durations = probe_durations(file_paths)
+    duplicates = None
+
+    if args.dedup:
+        from core.fingerprint import Duplicates
+
+        duplicates = Duplicates(file_paths, durations)
+        file_paths = duplicates.unique()
+
+    progress = BatchProgress({file_path: durations[file_path] for file_path in file_paths}, engine.seconds_per_second(model, params))
+    print(progress.message())
+    failed = 0
+
+    for event, file_path, result in engine.run(longest_first(file_paths, durations), model, args.output_dir, args.output_format, params, input_root=args.input_dir, skip_silence=args.skip_silence):
+        if event == "processed":
+            manifest.record(file_path, stems=result)
+        elif event == "failed":
+            manifest.record(file_path, error=result)
+            failed += 1
+
+        print(batch_message(event, file_path, result))
+
+        if event == "processed" and duplicates is not None:
+            for copy, stems in duplicates.link(file_path, result, args.input_dir, args.output_dir).items():
+                manifest.record(copy, stems=stems)
+                print(batch_message("duplicate", copy, file_path))
+
+        if event != "processing":
+            progress.update(file_path)
+            print(progress.message())
+
+    if duplicates is not None:
+        for line in duplicates.summary(progress.seconds_per_audio_second()):
+            print(line)
+
+    return 1 if failed else 0
+
+
+def pipeline_command(parser, args):
+    from core.audio import read_audio
+    from core.models import all_models, roformer_models
+    from core.pipeline import parse_steps, run_pipeline
+    from core.worker import get_worker
+
+    try:
+        if os.path.isfile(args.steps):
+            with open(args.steps, "r", encoding="utf8") as steps_file:
+                steps = json.load(steps_file)
+        else:
+            steps = json.loads(args.steps)
+
+        steps = parse_steps(steps, all_models, roformer_models)
+    except ValueError as error:
+        parser.error(f"Invalid steps: {error}")
+
+    # Read like the Pipeline tab does, mono files keep a channel axis and formats libsndfile can't open go through ffmpeg
+    sample_rate, audio = read_audio(args.input)
+    worker = get_worker(model_file_dir=args.model_dir)
+    name = os.path.splitext(os.path.basename(args.input))[0]
+
+    for stem in run_pipeline(worker, steps, sample_rate, audio, args.output_dir, args.output_format, name):
+        print(stem)
+
+    return 0
+
+
+def models_command(parser, args):
+    from datetime import datetime
+    from core.model_index import ModelIndex
+
+    index = ModelIndex(args.model_dir)
+    entries = index.scan()
+
+    if args.verify:
+        index.verify()
+
+    for file, entry in entries.items():
+        last_used = datetime.fromtimestamp(entry["last_used"]).strftime("%Y-%m-%d %H:%M") if entry["last_used"] else "never"
+        print(f"{file:<60} {entry['arch'] or '-':<9} {entry['size'] / 1024 ** 2:>9.1f} MB  {entry['status']:<8} {last_used}")
+
+    return 1 if any(entry["status"] != "ok" for entry in entries.values()) else 0
+
+
+def bench_command(parser, args):
+    from benchmarks.run import main
+
+    main(args.args)
+    return 0
+
+
+def main(argv=None):
+    parser = ArgumentParser(prog="python -m core", description="Separate audio into multiple stems without the UI")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    separate_parser = commands.add_parser("separate", help="Separate one or more audio files.")
+    separate_parser.add_argument("inputs", nargs="+")
+    separate_parser.add_argument("--output-dir", default="outputs")
+    add_model_arguments(separate_parser)
+    separate_parser.set_defaults(handler=separate_command)
+
+    batch_parser = commands.add_parser("batch", help="Separate every audio file of a folder, skipping the ones already processed with the same settings.")
+    batch_parser.add_argument("input_dir")
+    batch_parser.add_argument("output_dir")
+    batch_parser.add_argument("--workers", type=int, default=1, help="Number of worker processes.")
+    batch_parser.add_argument("--threads", type=int, help="Intra-op threads per worker (defaults to the available cores divided by the number of workers).")
+    batch_parser.add_argument("--force", action="store_true", help="Separate files already in the manifest again.")
+    batch_parser.add_argument("--recursive", action="store_true", help="Also separate the files in subfolders, the output folder mirrors the input folder.")
+    batch_parser.add_argument("--include", action="append", default=[], help="Only separate files matching this glob (by name, or by path relative to the input folder), may be repeated.")
+    batch_parser.add_argument("--exclude", action="append", default=[], help="Skip files matching this glob, may be repeated.")
+    batch_parser.add_argument("--dedup", action="store_true", help="Fingerprint the files first and separate copies of the same track once, the other copies get links to its stems.")
+    add_model_arguments(batch_parser)
+    batch_parser.set_defaults(handler=batch_command)
+
+    pipeline_parser = commands.add_parser("pipeline", help="Chain several models on one file, see the Pipeline tab of the UI.")
+    pipeline_parser.add_argument("input")
+    pipeline_parser.add_argument("--steps", required=True, help="Steps as JSON, or the path of a JSON file.")
+    pipeline_parser.add_argument("--output-dir", default="outputs")
+    pipeline_parser.add_argument("--output-format", choices=["wav", "flac", "mp3"], default="wav")
+    pipeline_parser.add_argument("--model-dir", default="./models")
+    pipeline_parser.set_defaults(handler=pipeline_command)
+
+    models_parser = commands.add_parser("models", help="Index the downloaded models: architecture, size, checksum and last use.")
+    models_parser.add_argument("--model-dir", default="./models")
+    models_parser.add_argument("--verify", action="store_true", help="Check every model against its recorded checksum.")
+    models_parser.set_defaults(handler=models_command)
+
+    bench_parser = commands.add_parser("bench", help="Run the benchmark suite, the arguments are passed to benchmarks.run.", add_help=False)
+    bench_parser.set_defaults(handler=bench_command)
+
+    # Everything after "bench" belongs to the benchmark's own parser
+    args, extra = parser.parse_known_args(argv)
+
+    if extra and args.command != "bench":
+        parser.error(f"unrecognized arguments: {' '.join(extra)}")
+
+    args.args = extra
+
+    return args.handler(commands.choices[args.command], args)
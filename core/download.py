@@ -0,0 +1,159 @@
+import os
+import queue
+import shutil
+import hashlib
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from core.metrics import JobTimer
+from core.worker import audio_duration, batch_priority
+
+
+def parse_links(text):
+    # One link per line or several separated by spaces, lines starting with # are skipped
+    return [link for line in text.splitlines() if not line.strip().startswith("#") for link in line.split()]
+
+
+def link_dir(url, output_dir="ytdl"):
+    return os.path.join(output_dir, hashlib.blake2b(url.encode(), digest_size=8).hexdigest())
+
+
+def cached_download(url, output_dir="ytdl"):
+    entry_dir = link_dir(url, output_dir)
+
+    try:
+        files = [file for file in os.listdir(entry_dir) if file.endswith(".wav")]
+    except FileNotFoundError:
+        return None
+
+    if not files:
+        return None
+
+    # Marks the download as used so the retention manager keeps it
+    os.utime(entry_dir)
+    return os.path.join(entry_dir, files[0])
+
+
+def download_file(url, output_dir="ytdl", **options):
+    import yt_dlp
+
+    file_path = cached_download(url, output_dir)
+
+    if file_path is not None:
+        return file_path
+
+    os.makedirs(output_dir, exist_ok=True)
+    entry_dir = link_dir(url, output_dir)
+    # Downloads land in a temporary folder first, a folder named after the link always holds a finished file
+    temp_dir = tempfile.mkdtemp(prefix=f"{os.path.basename(entry_dir)}.", suffix=".part", dir=output_dir)
+
+    ydl_opts = {
+        'format': 'bestaudio/best',
+        'outtmpl': f'{temp_dir}/%(title)s.%(ext)s',
+        'noplaylist': True,
+        'postprocessors': [{
+            'key': 'FFmpegExtractAudio',
+            'preferredcodec': 'wav',
+            'preferredquality': '192',
+        }],
+        **options,
+    }
+
+    try:
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            ydl.extract_info(url, download=True)
+
+        os.replace(temp_dir, entry_dir)
+    except OSError:
+        # The same link finished in another thread first
+        if cached_download(url, output_dir) is None:
+            raise
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    return cached_download(url, output_dir)
+
+
+def download_audio(url, output_dir="ytdl", **options):
+    with JobTimer("download") as timer:
+        with timer.stage("download"):
+            file_path = download_file(url, output_dir, **options)
+
+        timer.audio_seconds = audio_duration(file_path)
+
+    # The audio component reads the file itself, no need to load and convert it here
+    return file_path
+
+
+def expand_links(links, output_dir="ytdl", **options):
+    import yt_dlp
+
+    urls = []
+
+    with yt_dlp.YoutubeDL({"extract_flat": "in_playlist", "quiet": True, **options}) as ydl:
+        for link in links:
+            if cached_download(link, output_dir) is not None:
+                urls.append(link)
+                continue
+
+            info = ydl.extract_info(link, download=False, process=False)
+
+            if info.get("_type") == "playlist":
+                urls.extend(entry["url"] for entry in info.get("entries") or [] if entry and entry.get("url"))
+            else:
+                urls.append(link)
+
+    return list(dict.fromkeys(urls))
+
+
+def separate_links(worker, urls, model, output_dir, output_format, params, workers=2, download_dir="ytdl", timer=None, skip_silence=None, **options):
+    events = queue.Queue()
+    pending = iter(urls)
+    separations = []
+    pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="download")
+
+    def separated(url, future):
+        if future.cancelled():
+            events.put(("failed", url, "cancelled"))
+        elif future.exception() is not None:
+            events.put(("failed", url, future.exception()))
+        else:
+            events.put(("processed", url, future.result()))
+
+    def downloaded(url, future):
+        try:
+            file_path = future.result()
+        except Exception as error:
+            events.put(("failed", url, error))
+            return
+
+        events.put(("downloaded", url, file_path))
+        separation = worker.submit(file_path, model, output_dir, output_format, params, batch_priority, timer=timer, skip_silence=skip_silence)
+        separations.append(separation)
+        separation.add_done_callback(lambda future: separated(url, future))
+
+    def dispatch():
+        url = next(pending, None)
+
+        if url is not None:
+            pool.submit(download_file, url, download_dir, **options).add_done_callback(lambda future: downloaded(url, future))
+
+    # Only a few links are downloaded ahead of the separator, the next download starts when a separation finishes
+    for _ in range(max(1, workers)):
+        dispatch()
+
+    finished = 0
+
+    try:
+        while finished < len(urls):
+            event = events.get()
+
+            if event[0] != "downloaded":
+                finished += 1
+                dispatch()
+
+            yield event
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+        for separation in separations:
+            separation.cancel()
@@ -0,0 +1,97 @@
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from core.metrics import encode_queue
+
+
+def output_formats(output_format):
+    # One format or several from a single inference, the first one is the one the UI plays back
+    formats = [output_format] if isinstance(output_format, str) else list(output_format or [])
+    return list(dict.fromkeys(output_format.lower() for output_format in formats)) or ["wav"]
+
+
+def encode_stem(file_path, sample_rate, source, normalization=0.9, amplification=0, bitrate=None):
+    import numpy as np
+    import soundfile as sf
+
+    # Same normalisation and encoders as audio-separator's own writer, so the stems don't change
+    peak = np.abs(source).max() if source.size else 0
+
+    if peak > normalization:
+        source = source * (normalization / peak)
+    elif amplification and 0 < peak < amplification:
+        source = source * (amplification / peak)
+
+    if np.abs(source).max(initial=0) < 1e-6:
+        return None
+
+    samples = (source * 32767).astype(np.int16)
+    output_format = os.path.splitext(file_path)[1][1:].lower()
+
+    if output_format in ("wav", "flac"):
+        sf.write(file_path, samples, sample_rate, subtype="PCM_16")
+    else:
+        from pydub import AudioSegment
+
+        segment = AudioSegment(samples.tobytes(), frame_rate=sample_rate, sample_width=2, channels=samples.shape[1])
+        segment.export(file_path, format={"m4a": "mp4", "mka": "matroska"}.get(output_format, output_format), bitrate="320k" if output_format == "mp3" and bitrate is None else bitrate)
+
+    return file_path
+
+
+class EncoderPool:
+    def __init__(self, workers=2):
+        self.workers = max(1, workers)
+        self.pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="encoder")
+        self.pending = 0
+        self.lock = threading.Lock()
+
+    def encode(self, file_path, sample_rate, source, timer=None, **options):
+        try:
+            if timer is None:
+                return encode_stem(file_path, sample_rate, source, **options)
+
+            with timer.stage("encode"):
+                return encode_stem(file_path, sample_rate, source, **options)
+        finally:
+            self.track(-1)
+
+    def track(self, change):
+        with self.lock:
+            self.pending += change
+            encode_queue.set(self.pending)
+
+    def submit(self, file_path, sample_rate, source, timer=None, **options):
+        self.track(1)
+        return self.pool.submit(self.encode, file_path, sample_rate, source, timer, **options)
+
+    def gather(self, futures):
+        # Resolves once every stem is on disk, with the written files in submission order
+        gathered = Future()
+        remaining = [len(futures)]
+        lock = threading.Lock()
+
+        def done(_):
+            with lock:
+                remaining[0] -= 1
+
+                if remaining[0]:
+                    return
+
+            errors = [future.exception() for future in futures if future.exception() is not None]
+
+            if errors:
+                gathered.set_exception(errors[0])
+            else:
+                gathered.set_result([future.result() for future in futures if future.result() is not None])
+
+        if not futures:
+            gathered.set_result([])
+
+        for future in futures:
+            future.add_done_callback(done)
+
+        return gathered
+
+    def stats(self):
+        return {"pending": self.pending, "workers": self.workers}
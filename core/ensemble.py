@@ -0,0 +1,132 @@
+import os
+import uuid
+import numpy as np
+from concurrent.futures import wait
+from core.audio import scratch_dir
+from core.worker import stem_name
+from core.metrics import JobTimer
+
+ensemble_methods = ["Average", "Max Spec", "Min Spec"]
+
+n_fft = 2048
+hop_length = 512
+# Frames transformed at once, the spectrogram of a whole track for every model would take gigabytes
+block_frames = 256
+
+
+def spectral_pick(stacked, method):
+    # stacked is (models, samples, channels), every bin keeps the model with the loudest (or quietest) one
+    models, length, channels = stacked.shape
+    pad = n_fft // 2
+    audio = np.pad(stacked, ((0, 0), (pad, pad + n_fft), (0, 0)))
+    frames = np.lib.stride_tricks.sliding_window_view(audio, n_fft, axis=1)[:, ::hop_length]
+    count = frames.shape[1]
+    window = np.hanning(n_fft).astype(np.float32)
+    hops = n_fft // hop_length
+
+    # Overlap-add in hops: frame i covers hops i to i + 3, so each block is added in four slices
+    output = np.zeros((count + hops - 1, hop_length, channels), dtype=np.float32)
+    norm = np.zeros((count + hops - 1, hop_length), dtype=np.float32)
+    window_hops = (window ** 2).reshape(hops, hop_length)
+
+    for start in range(0, count, block_frames):
+        spec = np.fft.rfft(frames[:, start:start + block_frames] * window, axis=-1).astype(np.complex64)
+        magnitude = np.abs(spec)
+        pick = magnitude.argmax(axis=0) if method == "Max Spec" else magnitude.argmin(axis=0)
+        picked = np.take_along_axis(spec, pick[None], axis=0)[0]
+        block = (np.fft.irfft(picked, n=n_fft, axis=-1).astype(np.float32) * window).transpose(0, 2, 1)
+        block = block.reshape(len(block), hops, hop_length, channels)
+
+        for offset in range(hops):
+            output[start + offset:start + offset + len(block)] += block[:, offset]
+            norm[start + offset:start + offset + len(block)] += window_hops[offset]
+
+    output = output.reshape(-1, channels) / np.maximum(norm.reshape(-1), 1e-8)[:, None]
+    return output[pad:pad + length]
+
+
+def combine(sources, method):
+    length = min(source.shape[0] for source in sources)
+    stacked = np.stack([source[:length] if source.ndim == 2 else source[:length, None] for source in sources]).astype(np.float32)
+
+    if method == "Average" or len(sources) == 1:
+        return stacked.mean(axis=0)
+
+    return spectral_pick(stacked, method)
+
+
+def load_cached(files):
+    stems = {}
+
+    for file in files:
+        sample_rate = int(os.path.splitext(file)[0].rsplit("_", 1)[1])
+        stems[stem_name(file)] = (sample_rate, np.load(file))
+
+    return stems
+
+
+def save_cached(entry_dir, stems):
+    os.makedirs(entry_dir, exist_ok=True)
+    files = []
+
+    for stem, (sample_rate, data) in stems.items():
+        file = os.path.join(entry_dir, f"ensemble_({stem})_{sample_rate}.npy")
+        np.save(file, np.asarray(data, dtype=np.float32))
+        files.append(file)
+
+    return files
+
+
+def separate_models(worker, stem_cache, sample_rate, audio, models, timer=None, engine=None):
+    import soundfile as sf
+
+    results = {}
+    futures = {}
+    input_file = None
+
+    for model, params in models:
+        key = stem_cache.key(sample_rate, audio, model, "npy", params)
+        cached_files = stem_cache.get(key)
+
+        if cached_files:
+            results[model] = load_cached(cached_files)
+            continue
+
+        if input_file is None:
+            input_file = os.path.join(scratch_dir(), f"{uuid.uuid4().hex}.wav")
+            sf.write(input_file, audio, sample_rate, subtype="FLOAT")
+
+        # With several batch workers every model runs in a pinned process of its own, otherwise they are all
+        # queued on the resident worker, which runs them side by side only with several separator threads
+        if engine is not None and engine.workers > 1:
+            futures[model] = (key, engine.submit_capture(input_file, model, params))
+        else:
+            futures[model] = (key, worker.submit(input_file, model, scratch_dir(), "wav", params, capture=True, timer=timer))
+
+    try:
+        wait([future for _, future in futures.values()])
+
+        for model, (key, future) in futures.items():
+            results[model] = future.result()
+
+            if stem_cache.enabled:
+                stem_cache.put(key, save_cached(stem_cache.entry_dir(key), results[model]))
+    finally:
+        if input_file is not None:
+            os.remove(input_file)
+
+    return results
+
+
+def ensemble(worker, stem_cache, sample_rate, audio, models, method, timer=None, engine=None):
+    timer = timer or JobTimer()
+    results = separate_models(worker, stem_cache, sample_rate, audio, models, timer, engine)
+    grouped = {}
+
+    # Stems are matched by name, so "Vocals" from a Roformer and from MDX23C land in the same group
+    for stems in results.values():
+        for stem, (stem_rate, data) in stems.items():
+            grouped.setdefault(stem.lower(), (stem, stem_rate, []))[2].append(np.asarray(data))
+
+    with timer.stage("combine"):
+        return {stem: (stem_rate, combine(sources, method)) for stem, stem_rate, sources in grouped.values()}
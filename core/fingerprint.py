@@ -0,0 +1,185 @@
+import os
+import shutil
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from core.audio import read_audio
+from core.batch import mirrored_dir
+
+# Files are first compared on their start, long enough to tell apart tracks that open the same way,
+# and the few that match are then compared over their whole length, 30 second stretch by stretch
+excerpt_seconds = 120
+confirm_seconds = 30
+target_rate = 11025
+frame_seconds = 0.2
+hop_seconds = 0.05
+band_edges = np.geomspace(300, 3000, 34)
+# Frames this far below the loudest one (-60 dB) count as silence
+min_energy = 1e-6
+max_offset = 10
+max_bit_errors = 0.2
+
+
+def fingerprint(file_path, seconds=excerpt_seconds):
+    sample_rate, audio = read_audio(file_path, seconds)
+    mono = audio.mean(axis=1)
+
+    # Averaging blocks of samples is a crude low-pass, enough for bands that stop at 3 kHz
+    factor = max(1, sample_rate // target_rate)
+    mono = mono[:len(mono) // factor * factor].reshape(-1, factor).mean(axis=1)
+    rate = sample_rate / factor
+    frame, hop = int(frame_seconds * rate), int(hop_seconds * rate)
+
+    if len(mono) < frame + hop:
+        return np.zeros(0, dtype=np.uint32)
+
+    frames = np.lib.stride_tricks.sliding_window_view(mono, frame)[::hop]
+    bins = np.searchsorted(np.fft.rfftfreq(frame, 1 / rate), band_edges)
+    energies = np.empty((len(frames), len(band_edges) - 1), dtype=np.float32)
+    window = np.hanning(frame).astype(np.float32)
+
+    # In blocks of frames so a long excerpt never holds its whole spectrogram
+    for start in range(0, len(frames), 512):
+        power = np.abs(np.fft.rfft(frames[start:start + 512] * window, axis=1)) ** 2
+        energies[start:start + 512] = np.add.reduceat(power, bins, axis=1)[:, :-1]
+
+    # Silence has no band energy to compare and gives nothing but 0 bits, so any two tracks that open with it
+    # would look alike; hashing starts at the first frame with sound, a file that never gets there has no fingerprint
+    loudness = energies.sum(axis=1)
+    loud = np.flatnonzero(loudness > max(loudness.max() * min_energy, 1e-6))
+
+    if len(loud) == 0 or len(energies) - loud[0] < 2:
+        return np.zeros(0, dtype=np.uint32)
+
+    energies = energies[loud[0]:]
+    # One bit per band pair: does the energy difference between neighbouring bands grow from the previous frame
+    differences = np.diff(energies, axis=1)
+    bits = (differences[1:] - differences[:-1]) > 0
+    return np.packbits(bits, axis=1, bitorder="little").view(np.uint32).ravel()
+
+
+def bit_errors(first, second):
+    best = 1.0
+
+    # Re-encodes may start a few milliseconds apart, a few frames of offset are tried both ways
+    for offset in range(-max_offset, max_offset + 1):
+        a, b = (first[offset:], second) if offset >= 0 else (first, second[-offset:])
+        count = min(len(a), len(b))
+
+        if count == 0:
+            continue
+
+        errors = np.unpackbits(np.bitwise_xor(a[:count], b[:count]).view(np.uint8)).sum()
+        best = min(best, errors / (count * 32))
+
+    return best
+
+
+def same_throughout(first, second):
+    # Both whole fingerprints must cover the same length and match in every stretch, not just on average
+    count = min(len(first), len(second))
+    window = int(confirm_seconds / hop_seconds)
+
+    if count == 0 or abs(len(first) - len(second)) > 2 / hop_seconds:
+        return False
+
+    bounds = np.linspace(0, count, max(1, count // window) + 1).astype(int)
+    return all(bit_errors(first[start:end + max_offset], second[start:end + max_offset]) <= max_bit_errors for start, end in zip(bounds[:-1], bounds[1:]))
+
+
+def safe_fingerprint(file_path, seconds=excerpt_seconds):
+    # A file that can't be decoded is never grouped, its separation reports the error
+    try:
+        return fingerprint(file_path, seconds)
+    except Exception:
+        return np.zeros(0, dtype=np.uint32)
+
+
+def find_duplicates(file_paths, durations=None, threads=4):
+    durations = durations or {}
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        fingerprints = dict(zip(file_paths, pool.map(safe_fingerprint, file_paths)))
+
+    groups = []
+    whole = {}
+
+    def whole_fingerprint(file_path):
+        # Only decoded in full for the files whose start matched another one
+        if file_path not in whole:
+            whole[file_path] = safe_fingerprint(file_path, None)
+
+        return whole[file_path]
+
+    for file_path in file_paths:
+        for group in groups:
+            first = group[0]
+
+            # Copies of a track last as long as each other, give or take an encoder's padding
+            if abs(durations.get(file_path, 0) - durations.get(first, 0)) > 2:
+                continue
+            if not len(fingerprints[file_path]) or not len(fingerprints[first]) or bit_errors(fingerprints[file_path], fingerprints[first]) > max_bit_errors:
+                continue
+            if same_throughout(whole_fingerprint(file_path), whole_fingerprint(first)):
+                group.append(file_path)
+                break
+        else:
+            groups.append([file_path])
+
+    return groups
+
+
+def link_stems(stems, source_file, target_file, output_dir):
+    source_name = os.path.splitext(os.path.basename(source_file))[0]
+    target_name = os.path.splitext(os.path.basename(target_file))[0]
+    os.makedirs(output_dir, exist_ok=True)
+    linked = []
+
+    for stem in stems:
+        stem_file = os.path.basename(stem)
+        target = os.path.join(output_dir, target_name + stem_file[len(source_name):] if stem_file.startswith(source_name) else stem_file)
+
+        if os.path.abspath(target) != os.path.abspath(stem):
+            if os.path.exists(target):
+                os.remove(target)
+
+            # A hard link costs no space, copies are only made across file systems
+            try:
+                os.link(stem, target)
+            except OSError:
+                shutil.copy2(stem, target)
+
+        linked.append(target)
+
+    return linked
+
+
+class Duplicates:
+    def __init__(self, file_paths, durations=None):
+        self.durations = durations or {}
+        # The biggest file of a group is separated, usually the lossless one
+        self.groups = [sorted(group, key=os.path.getsize, reverse=True) for group in find_duplicates(file_paths, self.durations)]
+        self.copies = {group[0]: group[1:] for group in self.groups if len(group) > 1}
+
+    def unique(self):
+        return [group[0] for group in self.groups]
+
+    def link(self, file_path, stems, input_root, output_root):
+        # The stems of the separated file, under the name and output folder of each copy
+        return {copy: link_stems(stems, file_path, copy, mirrored_dir(copy, input_root, output_root)) for copy in self.copies.get(file_path, [])}
+
+    def saved_seconds(self):
+        return sum(self.durations.get(copy, 0) for copies in self.copies.values() for copy in copies)
+
+    def summary(self, seconds_per_audio_second=None):
+        if not self.copies:
+            return []
+
+        lines = [f"{sum(len(copies) for copies in self.copies.values())} duplicates in {len(self.copies)} groups, each group was separated once:"]
+
+        for first, copies in self.copies.items():
+            lines.append(f"  {os.path.basename(first)}: {', '.join(os.path.basename(copy) for copy in copies)}")
+
+        saved = self.saved_seconds()
+        estimate = f", about {saved * seconds_per_audio_second:.0f}s of separation" if seconds_per_audio_second else ""
+        lines.append(f"Skipped {saved:.0f}s of audio{estimate}")
+        return lines
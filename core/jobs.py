@@ -0,0 +1,32 @@
+import os
+import uuid
+import threading
+from core.metrics import JobTimer
+
+active_jobs = {}
+active_jobs_lock = threading.Lock()
+
+
+def active_paths():
+    # Inputs and output folders of jobs that haven't finished yet, the retention manager never removes these
+    with active_jobs_lock:
+        return {os.path.abspath(path) for job in active_jobs.values() for path in (job.input_file, job.output_dir)}
+
+
+class Job:
+    def __init__(self, input_root="inputs", output_root="outputs", handler=None):
+        self.id = uuid.uuid4().hex
+        self.input_file = os.path.join(input_root, f"{self.id}.wav")
+        self.output_dir = os.path.join(output_root, self.id)
+        self.model = None
+        self.files = []
+        self.found_files = []
+        self.logs = []
+        self.timer = JobTimer(handler, self.id, on_finish=self.close)
+
+        with active_jobs_lock:
+            active_jobs[self.id] = self
+
+    def close(self):
+        with active_jobs_lock:
+            active_jobs.pop(self.id, None)
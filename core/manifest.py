@@ -0,0 +1,77 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from core.encoder import output_formats
+
+
+def file_hash(file_path):
+    digest = hashlib.blake2b(digest_size=16)
+
+    with open(file_path, "rb") as file:
+        for block in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(block)
+
+    return digest.hexdigest()
+
+
+class Manifest:
+    def __init__(self, output_dir, model, output_format, params, file_name="uvr5-manifest.json"):
+        self.path = os.path.join(output_dir, file_name)
+        # A single format hashes like before several could be picked, so existing manifests still match
+        formats = output_formats(output_format)
+        output_format = formats[0] if len(formats) == 1 else formats
+        self.settings = hashlib.blake2b(json.dumps([model, output_format, params], sort_keys=True).encode(), digest_size=16).hexdigest()
+        self.lock = threading.Lock()
+        os.makedirs(output_dir, exist_ok=True)
+
+        try:
+            with open(self.path, "r", encoding="utf8") as manifest_file:
+                self.files = json.load(manifest_file)["files"]
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            self.files = {}
+
+    def needs_processing(self, file_path):
+        entry = self.files.get(os.path.abspath(file_path))
+
+        if entry is None or entry["status"] != "done" or entry["settings"] != self.settings:
+            return True
+        if not all(os.path.isfile(stem) for stem in entry["stems"]):
+            return True
+
+        stat = os.stat(file_path)
+
+        if (stat.st_size, stat.st_mtime) == (entry["size"], entry["mtime"]):
+            return False
+
+        # Touched but maybe not changed (copied, restored from backup...), only the content decides
+        if stat.st_size == entry["size"] and file_hash(file_path) == entry["hash"]:
+            entry["mtime"] = stat.st_mtime
+            return False
+
+        return True
+
+    def record(self, file_path, stems=None, error=None):
+        stat = os.stat(file_path)
+
+        with self.lock:
+            self.files[os.path.abspath(file_path)] = {
+                "size": stat.st_size,
+                "mtime": stat.st_mtime,
+                "hash": file_hash(file_path),
+                "settings": self.settings,
+                "status": "failed" if error else "done",
+                "stems": [os.path.abspath(stem) for stem in stems or [] if os.path.isfile(stem)],
+                "error": str(error) if error else None,
+                "processed_at": time.time(),
+            }
+            self.save()
+
+    def save(self):
+        temp_path = f"{self.path}.tmp"
+
+        with open(temp_path, "w", encoding="utf8") as manifest_file:
+            json.dump({"version": 1, "files": self.files}, manifest_file, indent=2)
+
+        os.replace(temp_path, self.path)
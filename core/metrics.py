@@ -0,0 +1,224 @@
+import json
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+
+default_buckets = (0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+
+
+def format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+
+    if not pairs:
+        return ""
+
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+class Counter:
+    type = "counter"
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, value=1, **labels):
+        key = tuple(str(labels.get(label, "")) for label in self.labels)
+
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + value
+
+    def samples(self):
+        with self.lock:
+            return [f"{self.name}{format_labels(self.labels, key)} {value}" for key, value in sorted(self.values.items())]
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def set(self, value, **labels):
+        key = tuple(str(labels.get(label, "")) for label in self.labels)
+
+        with self.lock:
+            self.values[key] = value
+
+
+class Histogram:
+    type = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=default_buckets):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(label, "")) for label in self.labels)
+
+        with self.lock:
+            # One slot per bucket plus one for values above the last bucket
+            counts, total = self.values.get(key, ([0] * (len(self.buckets) + 1), 0))
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.values[key] = (counts, total + value)
+
+    def samples(self):
+        lines = []
+
+        with self.lock:
+            for key, (counts, total) in sorted(self.values.items()):
+                cumulative = 0
+
+                for bucket, count in zip(self.buckets, counts):
+                    cumulative += count
+                    lines.append(f"{self.name}_bucket{format_labels(self.labels, key, [('le', bucket)])} {cumulative}")
+
+                lines.append(f"{self.name}_bucket{format_labels(self.labels, key, [('le', '+Inf')])} {sum(counts)}")
+                lines.append(f"{self.name}_sum{format_labels(self.labels, key)} {total}")
+                lines.append(f"{self.name}_count{format_labels(self.labels, key)} {sum(counts)}")
+
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def counter(self, name, help, labels=()):
+        metric = Counter(name, help, labels)
+        self.metrics.append(metric)
+        return metric
+
+    def gauge(self, name, help, labels=()):
+        metric = Gauge(name, help, labels)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help, labels=(), buckets=default_buckets):
+        metric = Histogram(name, help, labels, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.samples())
+
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+jobs_total = registry.counter("uvr5_jobs_total", "Finished jobs by handler and status.", ("handler", "status"))
+job_failures_total = registry.counter("uvr5_job_failures_total", "Failed jobs by handler.", ("handler",))
+audio_seconds_total = registry.counter("uvr5_audio_seconds_total", "Seconds of input audio separated.", ("model",))
+job_seconds = registry.histogram("uvr5_job_seconds", "End to end handler time.", ("handler",))
+stage_seconds = registry.histogram("uvr5_stage_seconds", "Time spent in each stage of a handler.", ("handler", "stage"))
+model_seconds = registry.histogram("uvr5_model_seconds", "Separation time per model, from worker pickup to stems on disk.", ("model",))
+queue_wait_seconds = registry.histogram("uvr5_queue_wait_seconds", "Time jobs wait in the separator queue.", ("priority",))
+encode_queue = registry.gauge("uvr5_encode_queue", "Stems waiting for or being encoded by the encoder pool.")
+silence_skipped_seconds_total = registry.counter("uvr5_silence_skipped_seconds_total", "Seconds of silent input that skipped inference.", ("model",))
+disk_bytes = registry.gauge("uvr5_disk_bytes", "Bytes used by each folder under retention.", ("root",))
+evictions_total = registry.counter("uvr5_retention_evictions_total", "Files and job folders removed by the retention manager.", ("root", "reason"))
+evicted_bytes_total = registry.counter("uvr5_retention_evicted_bytes_total", "Bytes freed by the retention manager.", ("root",))
+model_cache_hits_total = registry.counter("uvr5_model_cache_hits_total", "Separations that found their model already loaded.", ("model",))
+model_cache_misses_total = registry.counter("uvr5_model_cache_misses_total", "Separations that had to load their model.", ("model",))
+model_cache_evictions_total = registry.counter("uvr5_model_cache_evictions_total", "Models unloaded to stay within the model cache budget.", ("model",))
+model_cache_bytes = registry.gauge("uvr5_model_cache_bytes", "Estimated memory held by the loaded models.")
+
+
+class JobTimer:
+    def __init__(self, handler=None, job_id=None, on_finish=None):
+        self.handler = handler
+        self.job_id = job_id
+        self.on_finish = on_finish
+        self.model = None
+        self.audio_seconds = 0
+        self.skipped_seconds = 0
+        self.stages = {}
+        self.start = time.perf_counter()
+        self.lock = threading.Lock()
+
+    def add(self, stage, seconds):
+        with self.lock:
+            self.stages[stage] = self.stages.get(stage, 0) + seconds
+
+    @contextmanager
+    def stage(self, stage):
+        start = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start)
+
+    def finish(self, status="done", error=None):
+        total = time.perf_counter() - self.start
+
+        if self.on_finish is not None:
+            self.on_finish()
+
+        # Timers the worker creates for itself have no handler and are never reported
+        if self.handler is None:
+            return
+
+        for stage, seconds in self.stages.items():
+            stage_seconds.observe(seconds, handler=self.handler, stage=stage)
+
+        job_seconds.observe(total, handler=self.handler)
+        jobs_total.inc(handler=self.handler, status=status)
+
+        if status == "failed":
+            job_failures_total.inc(handler=self.handler)
+
+        record = {
+            "event": "job_timing",
+            "job": self.job_id,
+            "handler": self.handler,
+            "model": self.model,
+            "status": status,
+            "audio_seconds": round(self.audio_seconds, 3),
+            "skipped_seconds": round(self.skipped_seconds, 3),
+            "total": round(total, 3),
+            "stages": {stage: round(seconds, 3) for stage, seconds in self.stages.items()},
+        }
+
+        if error is not None:
+            record["error"] = str(error)
+
+        print(json.dumps(record))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, error_type, error, traceback):
+        if error_type is None:
+            self.finish()
+        elif issubclass(error_type, GeneratorExit):
+            self.finish("cancelled")
+        else:
+            self.finish("failed", error)
+
+        return False
+
+
+def create_metrics_router():
+    from fastapi import APIRouter
+    from fastapi.responses import PlainTextResponse
+
+    router = APIRouter()
+
+    @router.get("/metrics", response_class=PlainTextResponse)
+    def metrics():
+        return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+    return router
@@ -0,0 +1,119 @@
+import gc
+import os
+import threading
+from collections import OrderedDict
+from core.metrics import model_cache_bytes, model_cache_evictions_total, model_cache_hits_total, model_cache_misses_total
+
+
+def resident_size(separator):
+    instance = separator.model_instance
+    size = 0
+
+    for value in vars(instance).values():
+        if callable(getattr(value, "parameters", None)) and callable(getattr(value, "buffers", None)):
+            for tensor in list(value.parameters()) + list(value.buffers()):
+                size += tensor.numel() * tensor.element_size()
+
+    # ONNX sessions don't expose their weights, the checkpoint size is the closest estimate
+    if size == 0 and instance.model_path and os.path.isfile(instance.model_path):
+        size = os.path.getsize(instance.model_path)
+
+    return size
+
+
+class ModelCache:
+    def __init__(self, budget, model_file_dir="./models"):
+        self.budget = budget
+        self.model_file_dir = model_file_dir
+        self.entries = OrderedDict()
+        self.expected_sizes = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.RLock()
+
+    def register(self, models):
+        for model in models:
+            model_path = os.path.join(self.model_file_dir, model)
+
+            if model not in self.expected_sizes and os.path.isfile(model_path):
+                self.expected_sizes[model] = os.path.getsize(model_path)
+
+    def plan(self, models):
+        # The models that fit in the budget together, in order; one not downloaded yet has no size and is kept
+        planned = []
+        total = 0
+
+        for model in models:
+            size = self.expected_sizes.get(model)
+
+            if size is None:
+                planned.append(model)
+            elif total + size <= self.budget:
+                planned.append(model)
+                total += size
+
+        return planned
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+
+            if entry is None:
+                self.misses += 1
+                model_cache_misses_total.inc(model=key[0])
+                return None
+
+            self.entries.move_to_end(key)
+            self.hits += 1
+            model_cache_hits_total.inc(model=key[0])
+            return entry[0]
+
+    def reserve(self, model):
+        # Make room before loading so the new checkpoint and the evicted ones are never resident together
+        with self.lock:
+            self.evict(self.budget - self.expected_sizes.get(model, 0))
+
+    def put(self, key, separator):
+        size = resident_size(separator)
+
+        with self.lock:
+            self.expected_sizes[key[0]] = size
+
+            if size > self.budget:
+                print(f"Model {key[0]} ({size / 1024 ** 2:.0f} MB) is larger than the model cache budget, it won't be kept loaded.")
+                return
+
+            self.entries[key] = (separator, size)
+            self.evict(self.budget)
+            model_cache_bytes.set(self.used())
+
+    def evict(self, limit):
+        evicted = False
+
+        while self.entries and self.used() > limit:
+            key, (separator, size) = self.entries.popitem(last=False)
+            separator.model_instance.clear_gpu_cache()
+            del separator
+            self.evictions += 1
+            model_cache_evictions_total.inc(model=key[0])
+            evicted = True
+            print(f"Model {key[0]} evicted from the model cache ({size / 1024 ** 2:.0f} MB freed).")
+
+        if evicted:
+            model_cache_bytes.set(self.used())
+            gc.collect()
+
+    def used(self):
+        return sum(size for _, size in self.entries.values())
+
+    def stats(self):
+        with self.lock:
+            return {
+                "models": [key[0] for key in self.entries],
+                "used": self.used(),
+                "budget": self.budget,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
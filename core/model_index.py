@@ -0,0 +1,148 @@
+import os
+import json
+import time
+import threading
+from core.manifest import file_hash
+from core.models import arch_models, arch_params, model_arch, resolve_model
+
+model_extensions = (".ckpt", ".onnx", ".pth", ".th", ".yaml")
+
+
+def file_arch(file):
+    return next((arch for arch, models in arch_models.items() if file in models), None)
+
+
+class ModelIndex:
+    def __init__(self, model_file_dir="./models", file_name="uvr5-model-index.json"):
+        self.model_file_dir = model_file_dir
+        self.path = os.path.join(model_file_dir, file_name)
+        self.lock = threading.Lock()
+
+        try:
+            with open(self.path, "r", encoding="utf8") as index_file:
+                self.entries = json.load(index_file)["models"]
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            self.entries = {}
+
+    def scan(self):
+        found = {}
+
+        if os.path.isdir(self.model_file_dir):
+            for file in sorted(os.listdir(self.model_file_dir)):
+                file_path = os.path.join(self.model_file_dir, file)
+
+                if file.endswith(model_extensions) and os.path.isfile(file_path):
+                    found[file] = os.stat(file_path)
+
+        with self.lock:
+            known = dict(self.entries)
+
+        entries = {}
+
+        for file, stat in found.items():
+            entry = known.get(file)
+
+            # Checksums are only computed for new or changed files, a full rescan stays cheap
+            if entry is None or (entry["size"], entry["mtime"]) != (stat.st_size, stat.st_mtime):
+                entry = {
+                    "arch": file_arch(file),
+                    "size": stat.st_size,
+                    "mtime": stat.st_mtime,
+                    "checksum": file_hash(os.path.join(self.model_file_dir, file)),
+                    "status": "ok" if stat.st_size > 0 else "corrupt",
+                    "last_used": entry["last_used"] if entry else None,
+                }
+
+            entries[file] = entry
+
+        with self.lock:
+            # Keep uses recorded while the scan was hashing
+            for file, entry in entries.items():
+                entry["last_used"] = self.entries.get(file, entry)["last_used"]
+
+            self.entries = entries
+            self.save()
+
+        return entries
+
+    def verify(self, files=None):
+        corrupt = []
+
+        for file in files or list(self.entries):
+            entry = self.entries.get(file)
+            file_path = os.path.join(self.model_file_dir, file)
+
+            if entry is None or entry["checksum"] is None or not os.path.isfile(file_path):
+                continue
+
+            # Same size and date but a different checksum means the file changed on disk without being replaced
+            if os.path.getsize(file_path) == 0 or file_hash(file_path) != entry["checksum"]:
+                entry["status"] = "corrupt"
+                corrupt.append(file)
+                print(f"Model {file} doesn't match its checksum, delete it so it's downloaded again.")
+            else:
+                entry["status"] = "ok"
+
+        with self.lock:
+            self.save()
+
+        return corrupt
+
+    def available(self, model):
+        entry = self.entries.get(model)
+        return entry is not None and entry["status"] == "ok"
+
+    def touch(self, model):
+        with self.lock:
+            # Models downloaded since the last scan get their size and checksum on the next one
+            entry = self.entries.setdefault(model, {"arch": file_arch(model), "size": None, "mtime": None, "checksum": None, "status": "ok", "last_used": None})
+            entry["last_used"] = time.time()
+            self.save()
+
+    def recent(self, count=1):
+        used = [(entry["last_used"], file) for file, entry in self.entries.items() if entry["last_used"] and file_arch(file)]
+        return [file for _, file in sorted(used, reverse=True)[:count]]
+
+    def save(self):
+        os.makedirs(self.model_file_dir, exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+
+        with open(temp_path, "w", encoding="utf8") as index_file:
+            json.dump({"version": 1, "models": self.entries}, index_file, indent=2)
+
+        os.replace(temp_path, self.path)
+
+
+def warm_up(worker, index, models=None):
+    index.scan()
+
+    # Without a list, the model used last is loaded so returning users start warm
+    models = index.recent() if models is None else [resolve_model(model) for model in models]
+    # Only the ones that fit in the model cache together, loading more would evict the first ones again
+    planned = worker.models.plan(models)
+
+    for model in models:
+        if model not in planned:
+            print(f"Model {model} isn't warmed up, it doesn't fit in the model cache with the ones before it")
+            continue
+
+        start = time.perf_counter()
+
+        try:
+            # With the tab's default settings, which is what the first request most likely uses
+            worker.warm(model, arch_params[model_arch(model)]())
+        except Exception as error:
+            print(f"Warm-up of {model} failed: {error}")
+            continue
+
+        print(f"Model {model} warmed up in {time.perf_counter() - start:.1f}s")
+
+    # A model that was missing is downloaded by the warm-up, index it too
+    if models:
+        index.scan()
+
+
+def start_warm_up(worker, index, models=None):
+    thread = threading.Thread(target=warm_up, args=(worker, index, models), name="warm-up", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,243 @@
+import inspect
+from core.worker import separator_params
+
+roformer_models = {
+        'BS-Roformer-Viperx-1297.ckpt': 'model_bs_roformer_ep_317_sdr_12.9755.ckpt',
+        'BS-Roformer-Viperx-1296.ckpt': 'model_bs_roformer_ep_368_sdr_12.9628.ckpt',
+        'BS-Roformer-Viperx-1053.ckpt': 'model_bs_roformer_ep_937_sdr_10.5309.ckpt',
+        'Mel-Roformer-Viperx-1143.ckpt': 'model_mel_band_roformer_ep_3005_sdr_11.4360.ckpt',
+        'BS-Roformer-De-Reverb-Anvuew': 'deverb_bs_roformer_8_384dim_10depth.ckpt',
+        'Mel-Roformer-Crowd-Aufr33-Viperx': 'mel_band_roformer_crowd_aufr33_viperx_sdr_8.7144.ckpt',
+        'Mel-Roformer-Denoise-Aufr33': 'denoise_mel_band_roformer_aufr33_sdr_27.9959.ckpt',
+        'Mel-Roformer-Denoise-Aufr33-Aggr' : 'denoise_mel_band_roformer_aufr33_aggr_sdr_27.9768.ckpt',
+        'Mel-Roformer-Karaoke-Aufr33-Viperx': 'mel_band_roformer_karaoke_aufr33_viperx_sdr_10.1956.ckpt'
+}
+
+mdx23c_models = [
+    'MDX23C_D1581.ckpt',
+    'MDX23C-8KFFT-InstVoc_HQ.ckpt',
+    'MDX23C-8KFFT-InstVoc_HQ_2.ckpt',
+]
+
+mdxnet_models = [
+    'UVR-MDX-NET-Inst_full_292.onnx',
+    'UVR-MDX-NET_Inst_187_beta.onnx',
+    'UVR-MDX-NET_Inst_82_beta.onnx',
+    'UVR-MDX-NET_Inst_90_beta.onnx',
+    'UVR-MDX-NET_Main_340.onnx',
+    'UVR-MDX-NET_Main_390.onnx',
+    'UVR-MDX-NET_Main_406.onnx',
+    'UVR-MDX-NET_Main_427.onnx',
+    'UVR-MDX-NET_Main_438.onnx',
+    'UVR-MDX-NET-Inst_HQ_1.onnx',
+    'UVR-MDX-NET-Inst_HQ_2.onnx',
+    'UVR-MDX-NET-Inst_HQ_3.onnx',
+    'UVR-MDX-NET-Inst_HQ_4.onnx',
+    'UVR_MDXNET_Main.onnx',
+    'UVR-MDX-NET-Inst_Main.onnx',
+    'UVR_MDXNET_1_9703.onnx',
+    'UVR_MDXNET_2_9682.onnx',
+    'UVR_MDXNET_3_9662.onnx',
+    'UVR-MDX-NET-Inst_1.onnx',
+    'UVR-MDX-NET-Inst_2.onnx',
+    'UVR-MDX-NET-Inst_3.onnx',
+    'UVR_MDXNET_KARA.onnx',
+    'UVR_MDXNET_KARA_2.onnx',
+    'UVR_MDXNET_9482.onnx',
+    'UVR-MDX-NET-Voc_FT.onnx',
+    'Kim_Vocal_1.onnx',
+    'Kim_Vocal_2.onnx',
+    'Kim_Inst.onnx',
+    'Reverb_HQ_By_FoxJoy.onnx',
+    'UVR-MDX-NET_Crowd_HQ_1.onnx',
+    'kuielab_a_vocals.onnx',
+    'kuielab_a_other.onnx',
+    'kuielab_a_bass.onnx',
+    'kuielab_a_drums.onnx',
+    'kuielab_b_vocals.onnx',
+    'kuielab_b_other.onnx',
+    'kuielab_b_bass.onnx',
+    'kuielab_b_drums.onnx',
+]
+
+vrarch_models = [
+    '1_HP-UVR.pth',
+    '2_HP-UVR.pth',
+    '3_HP-Vocal-UVR.pth',
+    '4_HP-Vocal-UVR.pth',
+    '5_HP-Karaoke-UVR.pth',
+    '6_HP-Karaoke-UVR.pth',
+    '7_HP2-UVR.pth',
+    '8_HP2-UVR.pth',
+    '9_HP2-UVR.pth',
+    '10_SP-UVR-2B-32000-1.pth',
+    '11_SP-UVR-2B-32000-2.pth',
+    '12_SP-UVR-3B-44100.pth',
+    '13_SP-UVR-4B-44100-1.pth',
+    '14_SP-UVR-4B-44100-2.pth',
+    '15_SP-UVR-MID-44100-1.pth',
+    '16_SP-UVR-MID-44100-2.pth',
+    '17_HP-Wind_Inst-UVR.pth',
+    'UVR-De-Echo-Aggressive.pth',
+    'UVR-De-Echo-Normal.pth',
+    'UVR-DeEcho-DeReverb.pth',
+    'UVR-DeNoise-Lite.pth',
+    'UVR-DeNoise.pth',
+    'UVR-BVE-4B_SN-44100-1.pth',
+    'MGM_HIGHEND_v4.pth',
+    'MGM_LOWEND_A_v4.pth',
+    'MGM_LOWEND_B_v4.pth',
+    'MGM_MAIN_v4.pth',
+]
+
+demucs_models = [
+    'htdemucs_ft.yaml', 
+    'htdemucs.yaml',
+    'hdemucs_mmi.yaml',
+]
+
+all_models = list(roformer_models.values()) + mdx23c_models + mdxnet_models + vrarch_models + demucs_models
+
+output_format = [
+    'wav',
+    'flac',
+    'mp3',
+]
+
+mdxnet_overlap_values = [
+    '0.25',
+    '0.5',
+    '0.75',
+    '0.99',
+]
+
+vrarch_window_size_values = [
+    '320',
+    '512',
+    '1024',
+]
+
+demucs_overlap_values = [
+    '0.25',
+    '0.50',
+    '0.75',
+    '0.99',
+]
+
+extensions = (".mp3", ".wav", ".flac")
+
+arch_models = {
+    "roformer": list(roformer_models.values()),
+    "mdx23c": mdx23c_models,
+    "mdxnet": mdxnet_models,
+    "vrarch": vrarch_models,
+    "demucs": demucs_models,
+}
+
+
+def resolve_model(model):
+    # Roformer models are shown by name, the separator wants the file name
+    model = roformer_models.get(model, model)
+
+    if model not in all_models:
+        raise ValueError(f"Unknown model {model}")
+
+    return model
+
+
+def model_arch(model):
+    model = resolve_model(model)
+    return next(arch for arch, models in arch_models.items() if model in models)
+
+
+def check_range(name, value, minimum, maximum):
+    if not minimum <= value <= maximum:
+        raise ValueError(f"{name} must be between {minimum} and {maximum}, got {value}")
+
+    return value
+
+
+def check_choice(name, value, choices):
+    if float(value) not in [float(choice) for choice in choices]:
+        raise ValueError(f"{name} must be one of {', '.join(choices)}, got {value}")
+
+    return value
+
+
+def mdxc_segment(segment_size):
+    # "auto" lets the worker pick a segment size for each input from a calibration run, see core.tuning
+    if segment_size == "auto":
+        return {"segment_size": "auto", "override_model_segment_size": True}
+
+    return {"segment_size": check_range("segment_size", int(segment_size), 32, 4000)}
+
+
+# Same ranges and defaults as the sliders and dropdowns of each tab
+def roformer_params(overlap=4, segment_size=256):
+    return separator_params(mdxc={
+        "overlap": check_range("overlap", int(overlap), 2, 4),
+        **mdxc_segment(segment_size),
+    })
+
+
+def mdx23c_params(overlap=8, segment_size=256, denoise=False):
+    return separator_params(mdx={"enable_denoise": bool(denoise)}, mdxc={
+        **mdxc_segment(segment_size),
+        "overlap": check_range("overlap", int(overlap), 2, 50),
+    })
+
+
+def mdxnet_params(overlap=0.25, segment_size=256, denoise=True):
+    if segment_size == "auto":
+        raise ValueError("Auto segment size is only available for Roformer and MDX23C models")
+
+    return separator_params(mdx={
+        "segment_size": check_range("segment_size", int(segment_size), 32, 4000),
+        "overlap": float(check_choice("overlap", overlap, mdxnet_overlap_values)),
+        "enable_denoise": bool(denoise),
+    })
+
+
+def vrarch_params(window_size=320, aggression=5, tta=True, high_end_process=False):
+    return separator_params(vr={
+        "window_size": int(check_choice("window_size", window_size, vrarch_window_size_values)),
+        "aggression": check_range("aggression", int(aggression), 1, 50),
+        "enable_tta": bool(tta),
+        "high_end_process": bool(high_end_process),
+    })
+
+
+def demucs_params(shifts=2, overlap=0.25):
+    return separator_params(demucs={
+        "shifts": check_range("shifts", int(shifts), 1, 20),
+        "overlap": float(check_choice("overlap", overlap, demucs_overlap_values)),
+    })
+
+
+arch_params = {
+    "roformer": roformer_params,
+    "mdx23c": mdx23c_params,
+    "mdxnet": mdxnet_params,
+    "vrarch": vrarch_params,
+    "demucs": demucs_params,
+}
+
+
+def model_params(model, params=None):
+    # Settings named like the options of the model's tab, checked against the same ranges; missing ones get the tab defaults
+    params = params or {}
+
+    if not isinstance(params, dict):
+        raise ValueError("Settings must be an object such as {\"overlap\": 8}")
+
+    arch = model_arch(model)
+    builder = arch_params[arch]
+    unsupported = [name for name in params if name not in inspect.signature(builder).parameters]
+
+    if unsupported:
+        raise ValueError(f"{', '.join(unsupported)} can't be used with {arch} models")
+
+    try:
+        return builder(**params)
+    except TypeError as error:
+        raise ValueError(str(error))
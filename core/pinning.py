@@ -0,0 +1,62 @@
+import os
+import sys
+import importlib.util
+
+# Only the standard library is imported here, the spawned batch workers load this module before anything else
+# and the thread settings below must be in place before numpy, torch or onnxruntime are first imported
+thread_variables = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS", "NUMEXPR_NUM_THREADS", "VECLIB_MAXIMUM_THREADS")
+
+
+def cap_torch(threads):
+    try:
+        import torch
+    except ImportError:
+        return
+
+    torch.set_num_threads(threads)
+
+
+def cap_onnxruntime(threads):
+    try:
+        import onnxruntime as ort
+    except ImportError:
+        return
+
+    session_options = ort.SessionOptions
+
+    # MDX-Net builds its own SessionOptions, whose default is a thread per core of the whole machine
+    def capped_session_options():
+        options = session_options()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        return options
+
+    ort.SessionOptions = capped_session_options
+
+
+def spawn_entry():
+    # Spawned processes import the main module again before running their task. app.py started as a script would
+    # build the whole UI in each of them (and load numpy first), so they import this module in its place, as they
+    # already do for `python -m core` whose main module is named
+    main = sys.modules["__main__"]
+
+    if getattr(main, "__spec__", None) is None:
+        main.__spec__ = importlib.util.find_spec(__name__)
+
+
+def init_process(slices, model_cache_size, model_file_dir):
+    cores = slices.get()
+
+    for variable in thread_variables:
+        os.environ[variable] = str(len(cores))
+
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+
+    # The libraries that don't read the variables are capped explicitly, this process only ever runs batch jobs
+    cap_torch(len(cores))
+    cap_onnxruntime(len(cores))
+
+    from core.worker import get_worker
+
+    get_worker(model_file_dir=model_file_dir, model_cache_size=model_cache_size)
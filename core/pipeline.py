@@ -0,0 +1,66 @@
+import os
+from core.audio import separate_array, write_stem
+from core.models import model_params
+from core.metrics import JobTimer
+
+
+def parse_steps(steps, models, model_aliases=None):
+    model_aliases = model_aliases or {}
+    parsed = []
+
+    if not steps:
+        raise ValueError("The pipeline has no steps")
+
+    for index, step in enumerate(steps, start=1):
+        if not isinstance(step, dict):
+            raise ValueError(f"Step {index}: must be an object with a model")
+
+        model = model_aliases.get(step.get("model"), step.get("model"))
+
+        if model not in models:
+            raise ValueError(f"Step {index}: unknown model {step.get('model')}")
+        if index < len(steps) and not step.get("stem"):
+            raise ValueError(f"Step {index}: choose the stem passed on to the next step")
+
+        try:
+            params = model_params(model, step.get("params"))
+        except ValueError as error:
+            raise ValueError(f"Step {index}: {error}")
+
+        parsed.append({
+            "model": model,
+            "params": params,
+            "stem": step.get("stem"),
+            "save": bool(step.get("save")) or index == len(steps),
+        })
+
+    return parsed
+
+
+def pick_stem(stems, name, index):
+    for stem, value in stems.items():
+        if stem.lower() == name.lower():
+            return value
+
+    raise ValueError(f"Step {index}: the model has no stem {name} (available: {', '.join(stems)})")
+
+
+def run_pipeline(worker, steps, sample_rate, audio, output_dir, output_format, name="pipeline", timer=None):
+    # Stems travel between steps as float arrays, only the saved steps are encoded
+    timer = timer or JobTimer()
+    output_files = []
+
+    for index, step in enumerate(steps, start=1):
+        stems = separate_array(worker, sample_rate, audio, step["model"], step["params"], timer=timer)
+
+        if step["save"]:
+            model_name = os.path.splitext(step["model"])[0]
+
+            with timer.stage("encode"):
+                for stem, (stem_rate, data) in stems.items():
+                    output_files.append(write_stem(os.path.join(output_dir, f"{name}_{index}_({stem})_{model_name}.{output_format}"), stem_rate, data))
+
+        if index < len(steps):
+            sample_rate, audio = pick_stem(stems, step["stem"], index)
+
+    return output_files
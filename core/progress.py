@@ -0,0 +1,192 @@
+import os
+import sys
+import json
+import time
+import types
+import platform
+import itertools
+import threading
+from contextlib import contextmanager
+
+local = threading.local()
+tracked_bar = None
+hook_lock = threading.Lock()
+bar_numbers = itertools.count()
+# The modules whose loops over the chunks of a separation draw the tqdm bars followed here,
+# every other bar in the process (model downloads, other libraries) is left alone
+chunk_loops = (
+    "audio_separator.separator.architectures.mdx_separator",
+    "audio_separator.separator.architectures.mdxc_separator",
+    "audio_separator.separator.architectures.vr_separator",
+    "audio_separator.separator.uvr_lib_v5.demucs.apply",
+)
+
+
+def format_duration(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h {minutes:02d}m {seconds:02d}s" if hours else f"{minutes}m {seconds:02d}s"
+
+
+def report_bar(bar):
+    callback = getattr(local, "callback", None)
+
+    if callback is not None and bar.total and not bar.disable:
+        # Numbered on first sight, an id() would be reused by the next bar once this one is collected
+        if not hasattr(bar, "progress_number"):
+            bar.progress_number = next(bar_numbers)
+
+        callback(bar.progress_number, min(bar.n, bar.total), bar.total)
+
+
+def tracked_tqdm():
+    global tracked_bar
+
+    if tracked_bar is None:
+        from tqdm import tqdm
+
+        # The architectures only report their chunks through tqdm bars, the ones of a tracked thread are followed
+        class TrackedBar(tqdm):
+            def update(self, n=1):
+                displayed = super().update(n)
+                report_bar(self)
+                return displayed
+
+            def close(self):
+                report_bar(self)
+                super().close()
+
+        tracked_bar = TrackedBar
+
+    return tracked_bar
+
+
+def track_chunk_loops():
+    with hook_lock:
+        for name in chunk_loops:
+            module = sys.modules.get(name)
+
+            # Imported with the model, a module that isn't loaded yet has no separation running in it
+            if module is None or getattr(module, "tracked_bars", False):
+                continue
+
+            bar = tracked_tqdm()
+            # Demucs imports the tqdm module rather than the class
+            module.tqdm = bar if isinstance(module.tqdm, type) else types.SimpleNamespace(**{**vars(module.tqdm), "tqdm": bar})
+            module.tracked_bars = True
+
+
+@contextmanager
+def chunk_progress(callback):
+    track_chunk_loops()
+    previous = getattr(local, "callback", None)
+    local.callback = callback
+
+    try:
+        yield
+    finally:
+        local.callback = previous
+
+
+class SeparationProgress:
+    # Turns the chunk counts of a separation into a fraction and the time left, report(fraction, message)
+    def __init__(self, report, estimate=None, passes=None):
+        self.report = report
+        self.estimate = estimate
+        # Most models go over the input more than once (MDX-Net per stem, Demucs shifts, VR bands then patches),
+        # each pass is a tqdm bar of its own and previous runs tell how many there will be
+        self.passes = passes or 1
+        self.start = time.perf_counter()
+        self.bars = {}
+
+    def remaining(self, index, passes, done, total):
+        now = time.perf_counter()
+        pass_elapsed = now - list(self.bars.values())[index]
+
+        # The first chunks of a pass are too few to extrapolate from when previous runs have a better idea
+        if done and (done / total >= 0.1 or self.estimate is None):
+            return pass_elapsed * total / done * (passes - index) - pass_elapsed
+        if self.estimate is not None:
+            return max(0, self.estimate - (now - self.start))
+
+        return None
+
+    def started(self):
+        self.report(0, f"About {format_duration(self.estimate)} based on previous runs" if self.estimate is not None else "Separating")
+
+    def __call__(self, bar, done, total):
+        self.bars.setdefault(bar, time.perf_counter())
+        index = list(self.bars).index(bar)
+        passes = max(self.passes, len(self.bars))
+        left = self.remaining(index, passes, done, total)
+        message = f"Pass {index + 1}/{passes}, chunk {done}/{total}" if passes > 1 else f"Chunk {done}/{total}"
+        self.report(min(1, (index + done / total) / passes), f"{message}, about {format_duration(left)} left" if left is not None else message)
+
+
+class ThroughputHistory:
+    def __init__(self, model_file_dir="./models", file_name="uvr5-throughput.json"):
+        self.path = os.path.join(model_file_dir, file_name)
+        self.lock = threading.Lock()
+        self.host = platform.node()
+        self.rates = self.load()
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf8") as history_file:
+                return json.load(history_file)["rates"]
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            return {}
+
+    def refresh(self):
+        # Batch workers in other processes write the same file, their entries are picked up on the way
+        self.rates = {**self.rates, **self.load()}
+
+    def key(self, model, params):
+        # The settings change the speed as much as the model does, every combination on every host is its own entry
+        return json.dumps([self.host, model, params], sort_keys=True)
+
+    def seconds_per_second(self, model, params):
+        entry = self.rates.get(self.key(model, params))
+        return None if entry is None else entry["seconds_per_second"]
+
+    def passes(self, model, params):
+        entry = self.rates.get(self.key(model, params))
+        return None if entry is None else entry.get("passes")
+
+    def estimate(self, model, params, audio_seconds):
+        rate = self.seconds_per_second(model, params)
+        return None if rate is None or not audio_seconds else rate * audio_seconds
+
+    def record(self, model, params, seconds, audio_seconds, passes=None):
+        if audio_seconds <= 0:
+            return
+
+        key = self.key(model, params)
+        rate = seconds / audio_seconds
+
+        with self.lock:
+            self.refresh()
+            entry = self.rates.get(key, {"runs": 0, "seconds_per_second": rate})
+            runs = entry["runs"] + 1
+            # The plain mean for the first runs, then a moving average that follows driver or hardware changes
+            weight = max(1 / runs, 0.2)
+            self.rates[key] = {
+                "runs": runs,
+                "seconds_per_second": entry["seconds_per_second"] * (1 - weight) + rate * weight,
+                "passes": passes or entry.get("passes"),
+                "updated_at": time.time(),
+            }
+            self.save()
+
+    def save(self):
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+
+            with open(temp_path, "w", encoding="utf8") as history_file:
+                json.dump({"version": 1, "rates": self.rates}, history_file, indent=2)
+
+            os.replace(temp_path, self.path)
+        except OSError as error:
+            print(f"Couldn't save the throughput history: {error}")
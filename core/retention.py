@@ -0,0 +1,158 @@
+import os
+import re
+import time
+import shutil
+import threading
+from core.jobs import active_paths
+from core.metrics import disk_bytes, evictions_total, evicted_bytes_total
+
+# Job folders and inputs are named after the job id (32 hex digits), downloaded links after a hash of the link (16)
+app_entry = re.compile(r"[0-9a-f]{32}|[0-9a-f]{16}")
+
+
+def entry_usage(path):
+    # Size and last access of a file or a whole job folder
+    if os.path.isfile(path):
+        stat = os.stat(path)
+        return stat.st_size, max(stat.st_atime, stat.st_mtime)
+
+    size = 0
+    last_used = os.stat(path).st_mtime
+
+    for root, _, files in os.walk(path):
+        for file in files:
+            try:
+                stat = os.stat(os.path.join(root, file))
+            except FileNotFoundError:
+                continue
+
+            size += stat.st_size
+            last_used = max(last_used, stat.st_atime, stat.st_mtime)
+
+    return size, last_used
+
+
+class RetentionManager:
+    def __init__(self, roots, max_size=0, max_age=0, interval=300, grace=600, exclude=()):
+        self.roots = roots
+        self.max_size = max_size
+        self.max_age = max_age
+        self.interval = interval
+        self.grace = grace
+        self.exclude = {os.path.abspath(path) for path in exclude}
+        self.lock = threading.Lock()
+        self.usage = {root: {"bytes": 0, "entries": 0} for root in roots}
+        self.evicted = 0
+        self.evicted_bytes = 0
+        self.last_sweep = None
+        self.thread = None
+
+    @property
+    def enabled(self):
+        return self.max_size > 0 or self.max_age > 0
+
+    def entries(self):
+        entries = []
+
+        # Entries are reported under the name of their root, the folder itself is the one configured (--output-dir)
+        for root, directory in self.roots.items():
+            if not os.path.isdir(directory):
+                continue
+
+            for name in os.listdir(directory):
+                path = os.path.join(directory, name)
+
+                # Only what the app created itself, a batch output folder a user picked inside outputs is never touched
+                if not app_entry.fullmatch(os.path.splitext(name)[0]) or os.path.abspath(path) in self.exclude:
+                    continue
+
+                try:
+                    size, last_used = entry_usage(path)
+                except FileNotFoundError:
+                    continue
+
+                entries.append((last_used, size, root, path))
+
+        return entries
+
+    def remove(self, root, path, size, reason):
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+        self.evicted += 1
+        self.evicted_bytes += size
+        evictions_total.inc(root=root, reason=reason)
+        evicted_bytes_total.inc(size, root=root)
+
+    def sweep(self):
+        with self.lock:
+            now = time.time()
+            entries = sorted(self.entries())
+            in_use = active_paths()
+            kept = []
+
+            for last_used, size, root, path in entries:
+                # Files of running jobs and anything touched in the last few minutes (a stem Gradio is still serving) stay
+                if os.path.abspath(path) in in_use or now - last_used < self.grace:
+                    kept.append((last_used, size, root, path))
+                elif self.max_age > 0 and now - last_used > self.max_age:
+                    self.remove(root, path, size, "age")
+                else:
+                    kept.append((last_used, size, root, path))
+
+            used = sum(size for _, size, _, _ in kept)
+
+            # Least recently used first, protected entries are skipped again
+            for last_used, size, root, path in list(kept):
+                if self.max_size <= 0 or used <= self.max_size:
+                    break
+                if os.path.abspath(path) in in_use or now - last_used < self.grace:
+                    continue
+
+                self.remove(root, path, size, "size")
+                kept.remove((last_used, size, root, path))
+                used -= size
+
+            self.usage = {root: {"bytes": 0, "entries": 0} for root in self.roots}
+
+            for _, size, root, _ in kept:
+                self.usage[root]["bytes"] += size
+                self.usage[root]["entries"] += 1
+
+            for root, usage in self.usage.items():
+                disk_bytes.set(usage["bytes"], root=root)
+
+            self.last_sweep = now
+
+    def stats(self):
+        with self.lock:
+            return {
+                "roots": {root: dict(usage) for root, usage in self.usage.items()},
+                "used": sum(usage["bytes"] for usage in self.usage.values()),
+                "max_size": self.max_size,
+                "max_age": self.max_age,
+                "evicted": self.evicted,
+                "evicted_bytes": self.evicted_bytes,
+                "last_sweep": self.last_sweep,
+            }
+
+    def run(self):
+        while True:
+            try:
+                self.sweep()
+            except Exception as error:
+                print(f"Retention sweep failed: {error}")
+
+            time.sleep(self.interval)
+
+    def start(self):
+        if self.enabled and self.thread is None:
+            self.thread = threading.Thread(target=self.run, name="retention", daemon=True)
+            self.thread.start()
+
+        return self
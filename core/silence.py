@@ -0,0 +1,102 @@
+import os
+import uuid
+import numpy as np
+from core.audio import read_audio, scratch_dir
+from core.encoder import output_formats
+from core.metrics import silence_skipped_seconds_total
+
+frame_seconds = 0.05
+
+
+def with_silence(params, skip_silence):
+    # Skipping silence changes the stems, so it's part of the settings caches and manifests are keyed on
+    return {**params, "skip_silence": skip_silence} if skip_silence else params
+
+
+def active_regions(audio, sample_rate, threshold_db=-50, min_silence=2.0, padding=0.5):
+    if not len(audio):
+        return []
+
+    frame = max(1, int(frame_seconds * sample_rate))
+    count = -(-len(audio) // frame)
+    frames = np.pad(audio, ((0, count * frame - len(audio)), (0, 0))).reshape(count, frame, -1)
+
+    # RMS of every frame at once, over all channels
+    rms = np.sqrt(np.mean(np.square(frames, dtype=np.float32), axis=(1, 2)))
+    loud = 20 * np.log10(np.maximum(rms, 1e-10)) > threshold_db
+
+    # Quiet stretches shorter than min_silence are pauses inside a region, they stay in
+    edges = np.flatnonzero(np.diff(np.concatenate(([True], loud, [True])).astype(np.int8)))
+
+    for start, end in zip(edges[::2], edges[1::2]):
+        if end - start < min_silence / frame_seconds:
+            loud[start:end] = True
+
+    edges = np.flatnonzero(np.diff(np.concatenate(([False], loud, [False])).astype(np.int8)))
+    pad = int(padding / frame_seconds)
+    regions = []
+
+    for start, end in zip(edges[::2], edges[1::2]):
+        start, end = max(0, start - pad) * frame, min(len(audio), (end + pad) * frame)
+
+        if regions and start <= regions[-1][1]:
+            regions[-1] = (regions[-1][0], end)
+        else:
+            regions.append((start, end))
+
+    return regions
+
+
+def restore_timeline(source, regions, length, ratio):
+    # Stems come back at the model's sample rate, the regions are in samples of the input
+    timeline = np.zeros((round(length * ratio), source.shape[1]), dtype=np.float32)
+    offset = 0
+
+    for start, end in regions:
+        source_start, target_start = round(offset * ratio), round(start * ratio)
+        count = min(round((end - start) * ratio), len(source) - source_start, len(timeline) - target_start)
+        timeline[target_start:target_start + count] = source[source_start:source_start + count]
+        offset += end - start
+
+    return timeline
+
+
+def separate_active(worker, audio_file, model, output_dir, output_format, params, amplification=None, timer=None, progress=None, threshold_db=-50, min_silence=2.0, padding=0.5):
+    with timer.stage("silence_scan"):
+        sample_rate, audio = read_audio(audio_file)
+        regions = active_regions(audio, sample_rate, threshold_db, min_silence, padding)
+        skipped = (len(audio) - sum(end - start for start, end in regions)) / sample_rate
+
+    # Nothing to skip, or nothing but silence which still needs the model to name the stems
+    if not regions or skipped <= 0:
+        return worker.process(audio_file, model, output_dir, output_format, params, amplification, timer=timer, progress=progress)
+
+    timer.skipped_seconds += skipped
+    silence_skipped_seconds_total.inc(skipped, model=model)
+    compact_file = os.path.join(scratch_dir(), f"{uuid.uuid4().hex}.wav")
+
+    with timer.stage("write_input"):
+        import soundfile as sf
+
+        sf.write(compact_file, np.concatenate([audio[start:end] for start, end in regions]), sample_rate, subtype="FLOAT")
+
+    try:
+        # Only the regions with sound go through the model, back to back in a single file
+        stems = worker.process(compact_file, model, scratch_dir(), "wav", params, amplification, capture=True, timer=timer, progress=progress)
+    finally:
+        os.remove(compact_file)
+
+    os.makedirs(output_dir, exist_ok=True)
+    # The same quiet stem boost as a separation of the whole file unless the caller picked one
+    amplification = worker.amplification if amplification is None else amplification
+    base_name = os.path.splitext(os.path.basename(audio_file))[0]
+    model_name = os.path.splitext(model)[0]
+    timelines = {stem: (stem_rate, restore_timeline(np.asarray(source, dtype=np.float32), regions, len(audio), stem_rate / sample_rate)) for stem, (stem_rate, source) in stems.items()}
+    encodes = []
+
+    for output_format in output_formats(output_format):
+        for stem, (stem_rate, timeline) in timelines.items():
+            file_path = os.path.join(output_dir, f"{base_name}_({stem})_{model_name}.{output_format}")
+            encodes.append(worker.encoder.submit(file_path, stem_rate, timeline, timer, normalization=worker.normalization, amplification=amplification))
+
+    return worker.encoder.gather(encodes)
@@ -0,0 +1,106 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+import numpy as np
+
+
+class StemCache:
+    def __init__(self, root="outputs/cache", max_size=10 * 1024 ** 3):
+        self.root = root
+        self.max_size = max_size
+        self.index_path = os.path.join(root, "index.json")
+        self.lock = threading.Lock()
+        self.index = {}
+
+        if self.enabled:
+            os.makedirs(root, exist_ok=True)
+
+            try:
+                with open(self.index_path, "r", encoding="utf8") as index_file:
+                    self.index = json.load(index_file)
+            except (FileNotFoundError, json.JSONDecodeError):
+                self.index = {}
+
+    @property
+    def enabled(self):
+        return self.max_size > 0
+
+    def key(self, sample_rate, audio, model, output_format, params):
+        audio = np.ascontiguousarray(audio)
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{sample_rate}:{audio.dtype.str}:{audio.shape}".encode())
+        digest.update(memoryview(audio).cast("B"))
+        digest.update(json.dumps([model, output_format, params], sort_keys=True).encode())
+        return digest.hexdigest()
+
+    def file_key(self, file_path, model, output_format, params):
+        # Keyed on the bytes of the uploaded file, so a lookup never has to decode it
+        digest = hashlib.blake2b(digest_size=16)
+
+        with open(file_path, "rb") as audio_file:
+            for block in iter(lambda: audio_file.read(1024 * 1024), b""):
+                digest.update(block)
+
+        digest.update(json.dumps([model, output_format, params], sort_keys=True).encode())
+        return digest.hexdigest()
+
+    def entry_dir(self, key):
+        return os.path.join(self.root, key)
+
+    def get(self, key):
+        if not self.enabled:
+            return None
+
+        with self.lock:
+            entry = self.index.get(key)
+
+            if entry is None:
+                return None
+
+            files = [os.path.join(self.entry_dir(key), file) for file in entry["files"]]
+
+            if not all(os.path.isfile(file) for file in files):
+                self.remove(key)
+                self.save()
+                return None
+
+            entry["last_used"] = time.time()
+            self.save()
+            return files
+
+    def put(self, key, files):
+        if not self.enabled:
+            return files
+
+        with self.lock:
+            files = [file for file in files if os.path.isfile(file)]
+            self.index[key] = {
+                "files": [os.path.relpath(file, self.entry_dir(key)) for file in files],
+                "size": sum(os.path.getsize(file) for file in files),
+                "last_used": time.time(),
+            }
+
+            while self.used() > self.max_size and len(self.index) > 1:
+                oldest = min((entry_key for entry_key in self.index if entry_key != key), key=lambda entry_key: self.index[entry_key]["last_used"])
+                self.remove(oldest)
+
+            self.save()
+            return files
+
+    def remove(self, key):
+        self.index.pop(key, None)
+        shutil.rmtree(self.entry_dir(key), ignore_errors=True)
+
+    def used(self):
+        return sum(entry["size"] for entry in self.index.values())
+
+    def save(self):
+        temp_path = f"{self.index_path}.tmp"
+
+        with open(temp_path, "w", encoding="utf8") as index_file:
+            json.dump(self.index, index_file, indent=2)
+
+        os.replace(temp_path, self.index_path)
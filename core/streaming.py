@@ -0,0 +1,92 @@
+import os
+import shutil
+import numpy as np
+import soundfile as sf
+from core.audio import sndfile_input
+from core.encoder import output_formats
+
+
+def stem_writer(path, output_format, sample_rate, channels):
+    # libsndfile can't always encode mp3, the stream is then kept lossless
+    if output_format.upper() not in sf.available_formats():
+        path = f"{os.path.splitext(path)[0]}.wav"
+
+    return sf.SoundFile(path, "w", samplerate=sample_rate, channels=channels)
+
+
+def stream_separate(worker, input_file, model, output_dir, output_format, params, chunk_seconds=30, overlap_seconds=2, timer=None):
+    # Streamed stems are written as they come in a single format, the first one selected
+    output_format = output_formats(output_format)[0]
+    input_file, decoded_file = sndfile_input(input_file)
+    sample_rate = sf.info(input_file).samplerate
+    overlap = int(overlap_seconds * sample_rate)
+    chunk_dir = os.path.join(output_dir, "chunks")
+    os.makedirs(chunk_dir, exist_ok=True)
+    writers = {}
+    tails = {}
+    written = 0
+
+    try:
+        # Each window shares `overlap` frames with the previous one, only one window is ever in memory
+        for index, block in enumerate(sf.blocks(input_file, blocksize=int(chunk_seconds * sample_rate) + overlap, overlap=overlap, always_2d=True)):
+            chunk_file = os.path.join(chunk_dir, f"{index:05d}.wav")
+            sf.write(chunk_file, block, sample_rate, subtype="FLOAT")
+
+            # The stems stay in memory as the model returns them, without the peak normalisation of a written stem
+            # that would give every window its own gain, so the stream matches the full track wherever it peaks below 0.9
+            try:
+                stems = worker.separate(chunk_file, model, chunk_dir, "wav", params, capture=True, timer=timer)
+            finally:
+                os.remove(chunk_file)
+
+            stems = {stem: (stem_rate, np.asarray(source, dtype=np.float32)) for stem, (stem_rate, source) in stems.items()}
+
+            # A stem the model didn't return for this window is silent in it, every stem keeps the timeline of the input
+            if stems:
+                stem_rate, source = next(iter(stems.values()))
+
+                for stem in writers.keys() - stems.keys():
+                    stems[stem] = (stem_rate, np.zeros((len(source), writers[stem].channels), dtype=np.float32))
+
+            chunk = {}
+            ready_length = 0
+
+            for stem, (stem_rate, data) in stems.items():
+                stem_overlap = int(overlap_seconds * stem_rate)
+
+                if stem not in writers:
+                    writers[stem] = stem_writer(os.path.join(output_dir, f"{stem}.{output_format}"), output_format, stem_rate, data.shape[1])
+                    # First seen after the start, the windows before it were silent for this stem
+                    writers[stem].write(np.zeros((written, data.shape[1]), dtype=np.float32))
+
+                tail = tails.get(stem)
+
+                if tail is not None:
+                    length = min(len(tail), len(data))
+                    fade = np.linspace(0, 1, length)[:, None]
+                    data[:length] = data[:length] * fade + tail[:length] * (1 - fade)
+
+                # The end of this window is only final once the next one has been crossfaded into it
+                ready, tails[stem] = data[:max(0, len(data) - stem_overlap)], data[max(0, len(data) - stem_overlap):]
+                writers[stem].write(np.clip(ready, -1, 1))
+                chunk[stem] = (stem_rate, ready)
+                ready_length = len(ready)
+
+            written += ready_length
+            yield chunk
+
+        chunk = {}
+
+        for stem, tail in tails.items():
+            writers[stem].write(np.clip(tail, -1, 1))
+            chunk[stem] = (writers[stem].samplerate, tail)
+
+        yield chunk
+    finally:
+        for writer in writers.values():
+            writer.close()
+
+        shutil.rmtree(chunk_dir, ignore_errors=True)
+
+        if decoded_file is not None:
+            os.remove(decoded_file)
@@ -0,0 +1,239 @@
+import os
+import json
+import time
+import platform
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from core.audio import scratch_dir
+
+# Tried during calibration, the largest chunk must still fit twice in the calibration clip
+candidate_segments = [64, 128, 256, 512]
+min_segment = 32
+
+
+def current_rss():
+    try:
+        with open("/proc/self/statm", "r") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def available_memory():
+    try:
+        with open("/proc/meminfo", "r") as meminfo:
+            for line in meminfo:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+
+    return None
+
+
+def is_out_of_memory(error):
+    message = str(error).lower()
+    return isinstance(error, MemoryError) or "out of memory" in message or "can't allocate memory" in message
+
+
+class PeakMemory:
+    # Samples the resident size while a separation runs, torch allocations never show up in tracemalloc
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.start = self.peak = current_rss()
+        self.done = threading.Event()
+        self.thread = threading.Thread(target=self.sample, daemon=True)
+
+    def sample(self):
+        while not self.done.wait(self.interval):
+            self.peak = max(self.peak, current_rss())
+
+    def __enter__(self):
+        if self.start is not None:
+            self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.done.set()
+
+        if self.start is not None:
+            self.thread.join()
+
+    @property
+    def used(self):
+        return None if self.start is None else self.peak - self.start
+
+
+def measure_memory(model_file_dir, model, params, audio_file, segment_size):
+    # Runs in a process of its own: in the calibrating one the allocator keeps what the previous runs grew,
+    # so every later run would only show the part of its peak that didn't fit in it
+    from audio_separator.separator import Separator
+
+    separator = Separator(model_file_dir=model_file_dir, **params)
+    separator.load_model(model_filename=model)
+    instance = separator.model_instance
+    instance.final_process = lambda stem_path, source, stem_name: None
+    instance.override_model_segment_size = True
+    instance.segment_size = segment_size
+
+    # Measured from the loaded model, like the peak a job adds on top of a cached one
+    with PeakMemory() as memory:
+        instance.separate(audio_file)
+
+    return memory.used
+
+
+class SegmentTuner:
+    def __init__(self, model_file_dir="./models", budget=None, file_name="uvr5-tuning.json"):
+        self.budget = budget
+        self.path = os.path.join(model_file_dir, file_name)
+        self.lock = threading.Lock()
+        self.host = platform.node()
+
+        try:
+            with open(self.path, "r", encoding="utf8") as profiles_file:
+                profiles = json.load(profiles_file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            profiles = {}
+
+        # Version 1 measured the memory of every run in the calibrating process and underestimated it, those are redone
+        self.profiles = profiles.get("profiles", {}) if profiles.get("version") == 2 else {}
+
+    def memory_budget(self):
+        # Without a configured budget, most of what the host has free right now
+        if self.budget:
+            return self.budget
+
+        available = available_memory()
+        return None if available is None else available * 0.8
+
+    def run(self, instance, audio_file, segment_size):
+        instance.override_model_segment_size = True
+        instance.segment_size = segment_size
+        start = time.perf_counter()
+
+        instance.separate(audio_file)
+        return time.perf_counter() - start
+
+    def measure(self, separator, model, params, audio_file, segment_size):
+        context = multiprocessing.get_context("spawn")
+
+        try:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                return pool.submit(measure_memory, separator.model_file_dir, model, params, audio_file, segment_size).result()
+        except Exception as error:
+            print(f"Couldn't measure the memory use of segment size {segment_size}: {error}")
+            return None
+
+    def calibrate(self, separator, model, params):
+        import numpy as np
+        import soundfile as sf
+
+        instance = separator.model_instance
+        sample_rate = instance.sample_rate
+        hop_length = instance.model_data_cfgdict.audio.hop_length
+        seconds = max(10, 2 * hop_length * (candidate_segments[-1] - 1) / sample_rate)
+        print(f"Calibrating the segment size of {model} on this machine, this only happens once")
+
+        # The stems of the calibration runs are dropped instead of encoded
+        instance.final_process = lambda stem_path, source, stem_name: None
+        clip = os.path.join(scratch_dir(), f"calibration-{os.getpid()}.wav")
+        samples, memory = [], []
+        timings = {}
+
+        try:
+            rng = np.random.default_rng(0)
+
+            for length in (seconds, 2 * seconds):
+                sf.write(clip, rng.normal(0, 0.1, (int(length * sample_rate), 2)).astype(np.float32), sample_rate)
+
+                # The first call also pays for lazy initialisation in torch, it would make the first candidate look slow
+                if length == seconds:
+                    self.run(instance, clip, candidate_segments[0])
+
+                # All candidates on the short clip, the smallest again on a clip twice as long for the per sample cost
+                for segment_size in (candidate_segments if length == seconds else candidate_segments[:1]):
+                    if length == seconds:
+                        timings[str(segment_size)] = self.run(instance, clip, segment_size) / (length * instance.overlap)
+
+                    used = self.measure(separator, model, params, clip, segment_size)
+
+                    if used is not None:
+                        samples.append((segment_size, length * sample_rate * 2))
+                        memory.append(used)
+        finally:
+            del instance.final_process
+
+            if os.path.exists(clip):
+                os.remove(clip)
+
+        profile = {"host": self.host, "seconds_per_second": timings, "memory": self.fit(samples, memory), "calibrated_at": time.time()}
+
+        with self.lock:
+            self.profiles[model] = profile
+
+            # A calibration whose memory couldn't be measured is only kept until the next start, which tries again
+            if profile["memory"] is not None:
+                self.save()
+
+        return profile
+
+    def fit(self, samples, memory):
+        import numpy as np
+
+        if len(memory) < 3:
+            return None
+
+        # peak = base + per segment step + per input sample, fitted on the calibration runs
+        features = np.array([[1, segment_size, count] for segment_size, count in samples], dtype=np.float64)
+        coefficients = np.linalg.lstsq(features, np.array(memory, dtype=np.float64), rcond=None)[0]
+        return [max(0.0, float(value)) for value in coefficients]
+
+    def predict_memory(self, profile, segment_size, samples):
+        base, per_segment, per_sample = profile["memory"]
+        return base + per_segment * segment_size + per_sample * samples
+
+    def segment_size(self, separator, model, params, audio_file, timer=None):
+        import soundfile as sf
+
+        profile = self.profiles.get(model)
+
+        if profile is None or profile["host"] != self.host:
+            if timer is not None:
+                with timer.stage("calibrate"):
+                    profile = self.calibrate(separator, model, params)
+            else:
+                profile = self.calibrate(separator, model, params)
+
+        info = sf.info(audio_file)
+        samples = info.frames * info.channels
+        budget = self.memory_budget()
+        overlap = separator.model_instance.overlap
+
+        # Without memory measurements no peak can be predicted, the smallest segment is the one least likely to run out
+        if profile["memory"] is None and budget is not None:
+            segment_size = min(int(segment_size) for segment_size in profile["seconds_per_second"])
+            print(f"The memory use of {model} couldn't be measured, using the smallest segment size {segment_size}")
+            return segment_size
+
+        # Fastest first, the first one whose predicted peak fits the budget wins
+        ranked = sorted(profile["seconds_per_second"].items(), key=lambda item: item[1])
+
+        for segment_size, seconds_per_second in ranked:
+            segment_size = int(segment_size)
+
+            if budget is None or self.predict_memory(profile, segment_size, samples) <= budget:
+                estimate = seconds_per_second * overlap * info.duration
+                print(f"Segment size {segment_size} picked for {model} (about {estimate:.0f}s for {info.duration:.0f}s of audio)")
+                return segment_size
+
+        return min(int(segment_size) for segment_size in profile["seconds_per_second"])
+
+    def save(self):
+        temp_path = f"{self.path}.tmp"
+
+        with open(temp_path, "w", encoding="utf8") as profiles_file:
+            json.dump({"version": 2, "profiles": self.profiles}, profiles_file, indent=2)
+
+        os.replace(temp_path, self.path)
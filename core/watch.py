@@ -0,0 +1,121 @@
+import os
+import time
+import select
+import struct
+import ctypes
+import ctypes.util
+
+in_modify = 0x2
+in_close_write = 0x8
+in_moved_to = 0x80
+in_create = 0x100
+
+
+def inotify_watch(path):
+    # inotify through libc so Linux hosts don't need an extra package; returns None where it's unavailable
+    library = ctypes.util.find_library("c")
+
+    if not library or not hasattr(os, "O_NONBLOCK"):
+        return None
+
+    try:
+        libc = ctypes.CDLL(library, use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK)
+    except (OSError, AttributeError):
+        return None
+
+    if fd < 0:
+        return None
+
+    if libc.inotify_add_watch(fd, os.fsencode(path), in_modify | in_close_write | in_moved_to | in_create) < 0:
+        os.close(fd)
+        return None
+
+    return fd
+
+
+class FolderWatcher:
+    def __init__(self, path, extensions, settle_seconds=5, poll_interval=2):
+        self.path = path
+        self.extensions = extensions
+        self.settle_seconds = settle_seconds
+        self.poll_interval = poll_interval
+        self.fd = inotify_watch(path)
+        self.mode = "inotify" if self.fd is not None else "polling"
+        self.pending = {}
+        self.seen = {}
+        self.scan()
+
+    def scan(self):
+        for name in os.listdir(self.path):
+            self.candidate(name)
+
+    def candidate(self, name):
+        if not name.endswith(self.extensions) or name in self.pending:
+            return
+
+        try:
+            stat = os.stat(os.path.join(self.path, name))
+        except FileNotFoundError:
+            return
+
+        # Files already handed out are only picked up again once they have been rewritten
+        if self.seen.get(name) != (stat.st_size, stat.st_mtime):
+            self.pending[name] = None
+
+    def read_events(self):
+        ready, _, _ = select.select([self.fd], [], [], self.poll_interval)
+
+        if not ready:
+            return
+
+        data = os.read(self.fd, 64 * 1024)
+        offset = 0
+
+        while offset < len(data):
+            _, _, _, length = struct.unpack_from("iIII", data, offset)
+            name = data[offset + 16:offset + 16 + length].rstrip(b"\0")
+            offset += 16 + length
+
+            if name:
+                self.candidate(os.fsdecode(name))
+
+    def settled(self):
+        now = time.time()
+        ready = []
+
+        for name, previous in list(self.pending.items()):
+            file_path = os.path.join(self.path, name)
+
+            try:
+                stat = os.stat(file_path)
+            except FileNotFoundError:
+                del self.pending[name]
+                continue
+
+            state = (stat.st_size, stat.st_mtime)
+
+            # A file is ready once its size and mtime stop changing, so half-copied files are left alone
+            if previous is None or previous[0] != state:
+                self.pending[name] = (state, now)
+            elif stat.st_size > 0 and now - previous[1] >= self.settle_seconds:
+                del self.pending[name]
+                self.seen[name] = state
+                ready.append(file_path)
+
+        return sorted(ready)
+
+    def batches(self):
+        while True:
+            if self.fd is not None:
+                self.read_events()
+            else:
+                time.sleep(self.poll_interval)
+                self.scan()
+
+            yield self.settled()
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
@@ -0,0 +1,290 @@
+import os
+import re
+import time
+import queue
+import itertools
+import threading
+from contextlib import nullcontext
+from concurrent.futures import Future
+from core.model_cache import ModelCache
+from core.encoder import EncoderPool, output_formats
+from core.tuning import SegmentTuner, is_out_of_memory, min_segment
+from core.progress import SeparationProgress, ThroughputHistory, chunk_progress
+from core.metrics import JobTimer, audio_seconds_total, model_seconds, queue_wait_seconds
+
+interactive_priority = 0
+batch_priority = 10
+
+mdx_defaults = {"hop_length": 1024, "segment_size": 256, "overlap": 0.25, "batch_size": 1, "enable_denoise": False}
+vr_defaults = {"batch_size": 1, "window_size": 512, "aggression": 5, "enable_tta": False, "enable_post_process": False, "post_process_threshold": 0.2, "high_end_process": False}
+demucs_defaults = {"segment_size": "Default", "shifts": 2, "overlap": 0.25, "segments_enabled": True}
+mdxc_defaults = {"segment_size": 256, "override_model_segment_size": False, "batch_size": 1, "overlap": 8, "pitch_shift": 0}
+
+
+def separator_params(mdx=None, vr=None, demucs=None, mdxc=None):
+    # Same defaults the audio-separator CLI passes, so results match the old os.system calls
+    return {
+        "mdx_params": {**mdx_defaults, **(mdx or {})},
+        "vr_params": {**vr_defaults, **(vr or {})},
+        "demucs_params": {**demucs_defaults, **(demucs or {})},
+        "mdxc_params": {**mdxc_defaults, **(mdxc or {})},
+    }
+
+
+def params_key(params):
+    return tuple(sorted((section, tuple(sorted(values.items()))) for section, values in params.items()))
+
+
+def audio_duration(audio_file):
+    try:
+        import soundfile as sf
+
+        return sf.info(audio_file).duration
+    except Exception:
+        return 0
+
+
+def stem_name(file):
+    # audio-separator names stems "<input>_(<stem>)_<model>.<format>"
+    file_name = os.path.basename(file)
+    match = re.search(r"_\((.+?)\)_", file_name)
+    return match.group(1) if match else os.path.splitext(file_name)[0]
+
+
+class SeparatorWorker:
+    def __init__(self, model_file_dir="./models", normalization=0.9, amplification=0.6, model_cache_size=4 * 1024 ** 3, threads=1, memory_budget=None, encoder_workers=2):
+        self.model_file_dir = model_file_dir
+        self.normalization = normalization
+        self.amplification = amplification
+        self.jobs = queue.PriorityQueue()
+        self.sequence = itertools.count()
+        self.running = 0
+        self.models = ModelCache(model_cache_size, model_file_dir)
+        self.index = None
+        self.tuner = SegmentTuner(model_file_dir, memory_budget)
+        self.history = ThroughputHistory(model_file_dir)
+        self.encoder = EncoderPool(encoder_workers)
+        self.model_locks = {}
+        self.model_locks_lock = threading.Lock()
+        self.threads = [threading.Thread(target=self.run, name=f"separator-worker-{index}", daemon=True) for index in range(max(1, threads))]
+
+        for thread in self.threads:
+            thread.start()
+
+    def submit(self, audio_file, model, output_dir, output_format, params, priority=interactive_priority, **options):
+        future = Future()
+        future.submitted = time.time()
+        future.started = None
+        future.finished = None
+        # Lower priority values run first, the sequence keeps jobs of the same priority in FIFO order
+        self.jobs.put((priority, next(self.sequence), future, (audio_file, model, output_dir, output_format, params), options))
+        return future
+
+    def separate(self, audio_file, model, output_dir, output_format, params, priority=interactive_priority, progress=None, **options):
+        if progress is None:
+            return self.submit(audio_file, model, output_dir, output_format, params, priority, **options).result()
+
+        # progress(fraction, message) is called here rather than on the separator thread, Gradio finds the event
+        # to update through the context of the thread that handles it
+        updates = queue.Queue()
+        future = self.submit(audio_file, model, output_dir, output_format, params, priority, progress=lambda *update: updates.put(update), **options)
+
+        while not future.done() or not updates.empty():
+            try:
+                progress(*updates.get(timeout=0.1))
+            except queue.Empty:
+                pass
+
+        return future.result()
+
+    def stats(self):
+        return {"queued": self.jobs.qsize(), "running": self.running, "threads": len(self.threads), "encoding": self.encoder.pending, "model_cache": self.models.stats()}
+
+    def model_lock(self, key):
+        with self.model_locks_lock:
+            return self.model_locks.setdefault(key, threading.Lock())
+
+    def load(self, key, model, params):
+        separator = self.models.get(key)
+
+        if separator is None:
+            from audio_separator.separator import Separator
+
+            self.models.reserve(model)
+
+            separator = Separator(
+                model_file_dir=self.model_file_dir,
+                normalization_threshold=self.normalization,
+                amplification_threshold=self.amplification,
+                **params,
+            )
+            separator.load_model(model_filename=model)
+            self.models.put(key, separator)
+
+        if self.index is not None:
+            self.index.touch(model)
+
+        return separator
+
+    def warm(self, model, params):
+        key = (model, params_key(params))
+
+        with self.model_lock(key):
+            self.load(key, model, params)
+
+    def estimate(self, model, params, audio_seconds):
+        return self.history.estimate(model, params, audio_seconds)
+
+    def process(self, audio_file, model, output_dir, output_format, params, amplification=None, capture=False, timer=None, skip_silence=None, progress=None):
+        key = (model, params_key(params))
+        timer = timer or JobTimer()
+        timer.model = model
+
+        if skip_silence and not capture:
+            from core.silence import separate_active
+
+            # Runs the model on the parts that aren't silent, through this same method with capture
+            return separate_active(self, audio_file, model, output_dir, output_format, params, amplification, timer, progress, **(skip_silence if isinstance(skip_silence, dict) else {}))
+
+        # A loaded Separator holds per-file state, so each one serves a single job at a time;
+        # jobs for different models still run side by side on the other worker threads
+        with self.model_lock(key):
+            with timer.stage("model_load"):
+                separator = self.load(key, model, params)
+
+            os.makedirs(output_dir, exist_ok=True)
+            formats = output_formats(output_format)
+
+            # The loaded model keeps its own copy of the output settings, so point both at this job
+            for target in (separator, separator.model_instance):
+                target.output_dir = output_dir
+                target.output_format = formats[0]
+
+            instance = separator.model_instance
+            instance.amplification_threshold = separator.amplification_threshold if amplification is None else amplification
+            # Only MDXC (Roformer and MDX23C) models read the segment size on every call, the others ignore "auto"
+            auto_segment = params["mdxc_params"].get("segment_size") == "auto" and hasattr(instance, "override_model_segment_size")
+
+            if auto_segment:
+                instance.override_model_segment_size = True
+                instance.segment_size = self.tuner.segment_size(separator, model, params, audio_file, timer)
+
+            stems = {}
+            encodes = {output_format: [] for output_format in formats}
+
+            if capture:
+                # Every architecture hands each finished stem to final_process, keeping them there skips the encode
+                instance.final_process = lambda stem_path, source, stem_name: stems.setdefault(stem_name, (instance.sample_rate, source))
+            else:
+                def encode_final_process(stem_path, source, stem_name):
+                    # Stems are encoded by the encoder pool, once in every format, while the model moves on
+                    for output_format in formats:
+                        file_path = os.path.join(output_dir, f"{os.path.splitext(stem_path)[0]}.{output_format}")
+                        encodes[output_format].append(self.encoder.submit(
+                            file_path,
+                            instance.sample_rate,
+                            source,
+                            timer,
+                            normalization=instance.normalization_threshold,
+                            amplification=instance.amplification_threshold,
+                            bitrate=instance.output_bitrate,
+                        ))
+
+                    return {stem_name: source}
+
+                instance.final_process = encode_final_process
+
+            duration = audio_duration(audio_file)
+            tracker = None
+
+            if progress is not None:
+                # progress(fraction, message) follows the chunks of the model, with a time left from its previous runs
+                tracker = SeparationProgress(progress, self.history.estimate(model, params, duration), self.history.passes(model, params))
+                tracker.started()
+
+            start = time.perf_counter()
+
+            try:
+                while True:
+                    try:
+                        with chunk_progress(tracker) if tracker is not None else nullcontext():
+                            separator.separate(audio_file)
+                        break
+                    except Exception as error:
+                        if not auto_segment or not is_out_of_memory(error) or instance.segment_size <= min_segment:
+                            raise
+
+                        instance.segment_size //= 2
+                        print(f"{model} ran out of memory, retrying with segment size {instance.segment_size}")
+            finally:
+                del instance.final_process
+
+            # Reading the input and inference both happen inside separate(), the encode runs afterwards in the pool
+            elapsed = time.perf_counter() - start
+            timer.add("inference", elapsed)
+            self.history.record(model, params, elapsed, duration, len(tracker.bars) if tracker is not None else None)
+            timer.audio_seconds += duration
+            audio_seconds_total.inc(duration, model=model)
+
+            if capture:
+                return stems
+
+            # Resolves with the files of the first format first, which are the ones the UI plays back
+            return self.encoder.gather([encode for output_format in formats for encode in encodes[output_format]])
+
+    def run(self):
+        while True:
+            priority, _, future, job, options = self.jobs.get()
+
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            future.started = time.time()
+            queue_wait_seconds.observe(future.started - future.submitted, priority=priority)
+
+            if options.get("timer") is not None:
+                options["timer"].add("queue_wait", future.started - future.submitted)
+
+            with self.model_locks_lock:
+                self.running += 1
+
+            try:
+                result = self.process(*job, **options)
+            except Exception as error:
+                self.finish(future, job[1], error=error)
+            else:
+                if isinstance(result, Future):
+                    # Stems still being encoded, this thread already picks up the next job
+                    result.add_done_callback(lambda encoded, future=future, model=job[1]: self.encoded(future, model, encoded))
+                else:
+                    self.finish(future, job[1], result)
+            finally:
+                with self.model_locks_lock:
+                    self.running -= 1
+
+    def encoded(self, future, model, encoded):
+        error = encoded.exception()
+        self.finish(future, model, None if error is not None else encoded.result(), error)
+
+    def finish(self, future, model, result=None, error=None):
+        future.finished = time.time()
+        model_seconds.observe(future.finished - future.started, model=model)
+
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+
+worker = None
+worker_lock = threading.Lock()
+
+
+def get_worker(**kwargs):
+    global worker
+
+    with worker_lock:
+        if worker is None:
+            worker = SeparatorWorker(**kwargs)
+
+    return worker
@@ -0,0 +1,29 @@
+from core.batch import find_audio_files, parse_globs
+
+
+def make_tree(root, files):
+    for file in files:
+        path = root / file
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"")
+
+
+def test_only_audio_at_the_top_unless_recursive(tmp_path):
+    make_tree(tmp_path, ["a.wav", "b.mp3", "notes.txt", "live/c.flac"])
+
+    assert find_audio_files(str(tmp_path)) == ["a.wav", "b.mp3"]
+    assert find_audio_files(str(tmp_path), recursive=True) == ["a.wav", "b.mp3", "live/c.flac"]
+
+
+def test_patterns_match_names_anywhere_and_folders_by_path(tmp_path):
+    make_tree(tmp_path, ["a.wav", "b.mp3", "live/c.wav", "live/d.mp3", "demos/live.wav"])
+
+    assert find_audio_files(str(tmp_path), True, parse_globs("*.wav")) == ["a.wav", "demos/live.wav", "live/c.wav"]
+    assert find_audio_files(str(tmp_path), True, exclude=parse_globs("live/*, b.*")) == ["a.wav", "demos/live.wav"]
+    assert find_audio_files(str(tmp_path), True, parse_globs("*.mp3"), parse_globs("live/*")) == ["b.mp3"]
+
+
+def test_the_output_folder_inside_the_input_is_skipped(tmp_path):
+    make_tree(tmp_path, ["a.wav", "outputs/a_(Vocals)_model.wav"])
+
+    assert find_audio_files(str(tmp_path), True, skip=[str(tmp_path / "outputs")]) == ["a.wav"]
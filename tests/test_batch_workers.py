@@ -0,0 +1,112 @@
+import os
+import sys
+import json
+import shutil
+import subprocess
+import numpy as np
+import pytest
+import soundfile as sf
+
+repo = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Laid out like app.py: the settings only exist under the guard, so a spawned worker that ran it again would fail
+main_script = """
+import sys
+import json
+sys.path.insert(0, {repo!r})
+from core.pinning import spawn_entry
+from core.batch import BatchEngine
+
+if __name__ == "__main__":
+    spawn_entry()
+    settings = json.loads(sys.argv[1])
+
+engine = BatchEngine(workers=settings["workers"], model_file_dir=settings["model_dir"])
+
+if __name__ == "__main__":
+    from tests.test_batch_workers import {case} as case
+    print(json.dumps(case(engine, settings)))
+"""
+
+
+def run_main(tmp_path, case, **settings):
+    script = tmp_path / "main.py"
+    script.write_text(main_script.format(repo=repo, case=case))
+    process = subprocess.run([sys.executable, str(script), json.dumps({"workers": 2, "model_dir": str(tmp_path / "models"), **settings})], capture_output=True, text=True, cwd=repo, timeout=600)
+
+    assert process.returncode == 0, process.stderr
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+
+def thread_settings(engine, settings):
+    pool = engine.get_pool()
+    return [pool.submit(os.getenv, "OMP_NUM_THREADS").result() for _ in range(4)]
+
+
+def batch_stems(engine, settings):
+    from core.worker import separator_params
+
+    events = engine.run(settings["files"], settings["model"], settings["output_dir"], "wav", separator_params(), settings["input_root"])
+    return [(event, os.path.basename(file_path), sorted(map(os.path.basename, result or [])) if event == "processed" else str(result)) for event, file_path, result in events if event != "processing"]
+
+
+def ensemble_stems(engine, settings):
+    from core.audio import read_audio
+    from core.ensemble import ensemble
+    from core.stem_cache import StemCache
+    from core.worker import separator_params
+
+    sample_rate, audio = read_audio(settings["input"])
+    models = [(model, separator_params()) for model in settings["models"]]
+    stems = ensemble(None, StemCache(settings["cache_dir"], max_size=0), sample_rate, audio, models, "Average", engine=engine)
+    return {stem: [rate, len(data)] for stem, (rate, data) in stems.items()}
+
+
+def stub_model(tmp_path):
+    for module in ("audio_separator", "onnx", "torch"):
+        pytest.importorskip(module)
+    if shutil.which("ffmpeg") is None:
+        pytest.skip("audio-separator needs ffmpeg")
+
+    from benchmarks.stub_models import build_stub_models, stub_models
+
+    build_stub_models(str(tmp_path / "models"))
+    return stub_models
+
+
+def write_inputs(tmp_path, names):
+    input_root = tmp_path / "inputs"
+    input_root.mkdir()
+    rng = np.random.default_rng(0)
+
+    for name in names:
+        sf.write(input_root / name, rng.normal(0, 0.1, (44100 * 3, 2)).astype(np.float32), 44100)
+
+    return input_root
+
+
+def test_spawned_workers_are_pinned_without_running_the_main_script(tmp_path):
+    cores = run_main(tmp_path, "thread_settings")
+
+    assert all(value is not None and int(value) >= 1 for value in cores)
+
+
+def test_batch_with_two_workers_returns_stems(tmp_path):
+    model = stub_model(tmp_path)["mdxnet"]
+    input_root = write_inputs(tmp_path, ["a.wav", "b.wav", "c.wav"])
+    files = [str(input_root / name) for name in ("a.wav", "b.wav", "c.wav")]
+
+    events = run_main(tmp_path, "batch_stems", model=model, files=files, input_root=str(input_root), output_dir=str(tmp_path / "outputs"))
+
+    assert sorted(file for _, file, _ in events) == ["a.wav", "b.wav", "c.wav"]
+    assert all(event == "processed" and len(stems) == 2 for event, _, stems in events), events
+
+
+def test_ensemble_on_two_workers_returns_the_stems_of_every_model(tmp_path):
+    models = stub_model(tmp_path)
+    input_root = write_inputs(tmp_path, ["a.wav"])
+
+    stems = run_main(tmp_path, "ensemble_stems", models=[models["mdxnet"], models["mdx23c"]], input=str(input_root / "a.wav"), cache_dir=str(tmp_path / "cache"))
+
+    assert {stem.lower() for stem in stems} == {"vocals", "instrumental"}
+    assert all(rate == 44100 and length == 44100 * 3 for rate, length in stems.values())
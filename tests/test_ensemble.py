@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+from core import ensemble
+from core.ensemble import combine
+
+
+def tone(frequency, seconds=3, sample_rate=44100, amplitude=0.5):
+    time = np.arange(int(seconds * sample_rate)) / sample_rate
+    wave = amplitude * np.sin(2 * np.pi * frequency * time)
+    return np.stack([wave, wave], axis=1).astype(np.float32)
+
+
+def test_average_trims_to_the_shortest_stem():
+    first, second = tone(440), tone(440)[:-100]
+    result = combine([first, second * 0], "Average")
+
+    assert result.shape == second.shape
+    assert np.allclose(result, first[:len(second)] / 2)
+
+
+@pytest.mark.parametrize("method", ["Max Spec", "Min Spec"])
+def test_spectral_methods_rebuild_identical_stems(method):
+    source = tone(440) + tone(3000, amplitude=0.1)
+
+    assert np.allclose(combine([source, source, source], method), source, atol=1e-5)
+
+
+def test_max_spec_keeps_the_louder_stem_and_min_spec_the_quieter():
+    loud, quiet = tone(440), tone(440, amplitude=0.01)
+
+    assert np.allclose(combine([loud, quiet], "Max Spec"), loud, atol=1e-4)
+    assert np.allclose(combine([loud, quiet], "Min Spec"), quiet, atol=1e-4)
+
+
+def test_blocks_line_up_with_a_single_transform(monkeypatch):
+    rng = np.random.default_rng(0)
+    sources = [rng.normal(0, 0.1, (44100 * 2 + 37, 2)).astype(np.float32) for _ in range(3)]
+    whole = combine(sources, "Max Spec")
+    # Every frame in a block of its own crosses all the block edges the overlap-add has
+    monkeypatch.setattr(ensemble, "block_frames", 1)
+
+    assert np.allclose(combine(sources, "Max Spec"), whole, atol=1e-6)
@@ -0,0 +1,54 @@
+import numpy as np
+import soundfile as sf
+from core.fingerprint import find_duplicates
+
+sample_rate = 8000
+
+
+def noise(seconds, seed):
+    return np.random.default_rng(seed).normal(0, 0.1, int(seconds * sample_rate)).astype(np.float32)
+
+
+def silence(seconds):
+    return np.zeros(int(seconds * sample_rate), dtype=np.float32)
+
+
+def write(tmp_path, name, *parts):
+    path = tmp_path / name
+    sf.write(path, np.concatenate(parts), sample_rate, subtype="FLOAT")
+    return str(path)
+
+
+def groups(file_paths):
+    return sorted(sorted(group) for group in find_duplicates(file_paths))
+
+
+def test_copies_match_whatever_their_gain_and_leading_silence(tmp_path):
+    track = noise(60, seed=1)
+    original = write(tmp_path, "original.wav", track)
+    copy = write(tmp_path, "copy.wav", silence(1), track * 0.5)
+    other = write(tmp_path, "other.wav", noise(60, seed=2))
+
+    assert groups([original, copy, other]) == [sorted([original, copy]), [other]]
+
+
+def test_tracks_opening_with_silence_are_told_apart(tmp_path):
+    first = write(tmp_path, "first.wav", silence(100), noise(30, seed=1))
+    second = write(tmp_path, "second.wav", silence(100), noise(30, seed=2))
+
+    assert groups([first, second]) == [[first], [second]]
+
+
+def test_tracks_that_only_share_their_start_are_told_apart(tmp_path):
+    start = noise(125, seed=1)
+    first = write(tmp_path, "first.wav", start, noise(60, seed=2))
+    second = write(tmp_path, "second.wav", start, noise(60, seed=3))
+
+    assert groups([first, second]) == [[first], [second]]
+
+
+def test_silent_files_are_never_grouped(tmp_path):
+    first = write(tmp_path, "first.wav", silence(20))
+    second = write(tmp_path, "second.wav", silence(20))
+
+    assert groups([first, second]) == [[first], [second]]
@@ -0,0 +1,49 @@
+import os
+from core.manifest import Manifest
+
+
+def make_files(tmp_path):
+    input_file = tmp_path / "song.wav"
+    stem = tmp_path / "out" / "song_(Vocals)_model.wav"
+    input_file.write_bytes(b"audio")
+    stem.parent.mkdir()
+    stem.write_bytes(b"stem")
+    return input_file, stem
+
+
+def test_done_files_are_skipped_until_something_changes(tmp_path):
+    input_file, stem = make_files(tmp_path)
+    manifest = Manifest(str(tmp_path / "out"), "model.onnx", "wav", {"overlap": 8})
+
+    assert manifest.needs_processing(str(input_file))
+    manifest.record(str(input_file), [str(stem)])
+
+    # Reloaded from disk, like the next batch over the same folder
+    manifest = Manifest(str(tmp_path / "out"), "model.onnx", "wav", {"overlap": 8})
+    assert not manifest.needs_processing(str(input_file))
+    assert Manifest(str(tmp_path / "out"), "model.onnx", "wav", {"overlap": 4}).needs_processing(str(input_file))
+    assert Manifest(str(tmp_path / "out"), "model.onnx", ["wav", "mp3"], {"overlap": 8}).needs_processing(str(input_file))
+
+    input_file.write_bytes(b"other")
+    assert manifest.needs_processing(str(input_file))
+
+
+def test_touched_files_with_the_same_content_are_still_done(tmp_path):
+    input_file, stem = make_files(tmp_path)
+    manifest = Manifest(str(tmp_path / "out"), "model.onnx", "wav", {})
+    manifest.record(str(input_file), [str(stem)])
+
+    os.utime(input_file, (0, 0))
+    assert not manifest.needs_processing(str(input_file))
+
+
+def test_failed_files_and_missing_stems_are_redone(tmp_path):
+    input_file, stem = make_files(tmp_path)
+    manifest = Manifest(str(tmp_path / "out"), "model.onnx", "wav", {})
+
+    manifest.record(str(input_file), error=RuntimeError("out of memory"))
+    assert manifest.needs_processing(str(input_file))
+
+    manifest.record(str(input_file), [str(stem)])
+    stem.unlink()
+    assert manifest.needs_processing(str(input_file))
@@ -0,0 +1,38 @@
+from types import SimpleNamespace
+from core.metrics import registry
+from core.model_cache import ModelCache
+
+
+def loaded(model_path):
+    # resident_size falls back to the checkpoint size for models without torch weights
+    return SimpleNamespace(model_instance=SimpleNamespace(model_path=str(model_path), clear_gpu_cache=lambda: None))
+
+
+def write_models(tmp_path, sizes):
+    for model, size in sizes.items():
+        (tmp_path / model).write_bytes(b"0" * size)
+
+
+def test_plan_keeps_the_models_that_fit_together(tmp_path):
+    write_models(tmp_path, {"a.onnx": 600, "b.onnx": 600, "c.onnx": 300})
+    cache = ModelCache(1000, str(tmp_path))
+    cache.register(["a.onnx", "b.onnx", "c.onnx"])
+
+    assert cache.plan(["a.onnx", "b.onnx", "c.onnx", "missing.ckpt"]) == ["a.onnx", "c.onnx", "missing.ckpt"]
+
+
+def test_hits_misses_and_evictions_are_counted_and_exported(tmp_path):
+    write_models(tmp_path, {"a.onnx": 600, "b.onnx": 600})
+    cache = ModelCache(1000, str(tmp_path))
+
+    for model in ("a.onnx", "a.onnx", "b.onnx"):
+        if cache.get((model, "{}")) is None:
+            cache.put((model, "{}"), loaded(tmp_path / model))
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"], stats["models"]) == (1, 2, 1, ["b.onnx"])
+
+    metrics = registry.render()
+    assert 'uvr5_model_cache_hits_total{model="a.onnx"} 1' in metrics
+    assert 'uvr5_model_cache_evictions_total{model="a.onnx"} 1' in metrics
+    assert "uvr5_model_cache_bytes 600" in metrics
@@ -0,0 +1,58 @@
+import json
+import numpy as np
+import pytest
+import soundfile as sf
+import core.pipeline
+import core.worker
+from core.audio import read_audio
+from core.cli import main
+from core.models import all_models, roformer_models
+from core.pipeline import parse_steps
+
+roformer = "BS-Roformer-Viperx-1297.ckpt"
+
+
+def test_params_are_built_by_the_tab_of_each_model():
+    steps = parse_steps([
+        {"model": roformer, "stem": "Vocals", "params": {"overlap": 2, "segment_size": "auto"}},
+        {"model": "htdemucs.yaml", "params": {"shifts": 4}},
+    ], all_models, roformer_models)
+
+    assert steps[0]["model"] == roformer_models[roformer]
+    assert steps[0]["params"]["mdxc_params"]["overlap"] == 2
+    assert steps[0]["params"]["mdxc_params"]["segment_size"] == "auto"
+    assert steps[1]["params"]["demucs_params"]["shifts"] == 4
+    assert steps[1]["save"]
+
+
+@pytest.mark.parametrize("steps, message", [
+    ([{"model": roformer, "params": {"overlapp": 2}}], "Step 1: overlapp can't be used with roformer models"),
+    ([{"model": roformer, "stem": "Vocals"}, {"model": roformer, "params": {"overlap": 9}}], "Step 2: overlap must be between 2 and 4"),
+    ([{"model": "htdemucs.yaml", "params": {"shifts": "many"}}], "Step 1: invalid literal"),
+    ([{"model": roformer, "params": [2]}], "Step 1: Settings must be an object"),
+    (["htdemucs.yaml"], "Step 1: must be an object"),
+    ([{"model": roformer}, {"model": roformer}], "Step 1: choose the stem"),
+])
+def test_invalid_steps_raise_value_error(steps, message):
+    with pytest.raises(ValueError, match=message):
+        parse_steps(steps, all_models, roformer_models)
+
+
+
+def test_command_line_reads_mono_input_like_the_tab(tmp_path, monkeypatch):
+    input_file = tmp_path / "mono.wav"
+    sf.write(input_file, np.full(8000, 0.25, dtype=np.float32), 8000)
+    inputs = []
+
+    # Every step hands its input back as its only stem
+    def separate_array(worker, sample_rate, audio, model, params, priority=0, timer=None):
+        inputs.append(audio.shape)
+        return {"Vocals": (sample_rate, audio)}
+
+    monkeypatch.setattr(core.worker, "get_worker", lambda **options: None)
+    monkeypatch.setattr(core.pipeline, "separate_array", separate_array)
+
+    main(["pipeline", str(input_file), "--steps", json.dumps([{"model": "htdemucs.yaml"}]), "--output-dir", str(tmp_path / "out")])
+
+    assert inputs == [read_audio(str(input_file))[1].shape] == [(8000, 1)]
+    assert len(list((tmp_path / "out").iterdir())) == 1
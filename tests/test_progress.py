@@ -0,0 +1,36 @@
+import threading
+import pytest
+from core.progress import chunk_progress
+from core.worker import SeparatorWorker
+
+
+class FakeWorker(SeparatorWorker):
+    # Reports a few chunks from the separator thread, like a model would
+    def process(self, audio_file, model, output_dir, output_format, params, progress=None, **options):
+        for done in range(1, 4):
+            progress(done / 3, f"Chunk {done}/3")
+
+        return [audio_file]
+
+
+def test_progress_is_reported_on_the_calling_thread(tmp_path):
+    worker = FakeWorker(model_file_dir=str(tmp_path))
+    calls = []
+
+    files = worker.separate("input.wav", "model.onnx", str(tmp_path), "wav", {}, progress=lambda fraction, message: calls.append((threading.get_ident(), fraction, message)))
+
+    assert files == ["input.wav"]
+    assert [call[1:] for call in calls] == [(1 / 3, "Chunk 1/3"), (2 / 3, "Chunk 2/3"), (1, "Chunk 3/3")]
+    assert all(call[0] == threading.get_ident() for call in calls)
+
+
+def test_bars_outside_the_separators_are_not_followed():
+    # tqdm comes with audio-separator, it isn't needed by the other tests
+    tqdm = pytest.importorskip("tqdm").tqdm
+    reported = []
+
+    with chunk_progress(lambda *update: reported.append(update)):
+        for _ in tqdm(range(5), disable=False):
+            pass
+
+    assert reported == []
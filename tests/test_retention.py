@@ -0,0 +1,34 @@
+import os
+import time
+from uuid import uuid4
+from core.retention import RetentionManager
+
+
+def make(path, size=100, age=0):
+    if path.suffix:
+        path.write_bytes(b"0" * size)
+    else:
+        path.mkdir()
+        (path / "Vocals.wav").write_bytes(b"0" * size)
+        os.utime(path / "Vocals.wav", (time.time() - age,) * 2)
+
+    os.utime(path, (time.time() - age,) * 2)
+    return path
+
+
+def test_off_by_default(tmp_path):
+    assert not RetentionManager({"outputs": str(tmp_path)}).enabled
+
+
+def test_only_app_created_entries_are_removed(tmp_path):
+    week = 8 * 24 * 3600
+    job = make(tmp_path / uuid4().hex, age=week)
+    upload = make(tmp_path / f"{uuid4().hex}.wav", age=week)
+    link = make(tmp_path / "0123456789abcdef", age=week)
+    batch = make(tmp_path / "my batch", age=week)
+    song = make(tmp_path / "song.wav", age=week)
+
+    RetentionManager({"outputs": str(tmp_path)}, max_age=7 * 24 * 3600).sweep()
+
+    assert not job.exists() and not upload.exists() and not link.exists()
+    assert batch.exists() and song.exists()
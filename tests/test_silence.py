@@ -0,0 +1,66 @@
+import numpy as np
+import soundfile as sf
+from core.encoder import EncoderPool
+from core.metrics import JobTimer
+from core.silence import active_regions, restore_timeline, separate_active
+
+sample_rate = 8000
+
+
+def tone(seconds, gain=0.5):
+    time = np.arange(int(seconds * sample_rate)) / sample_rate
+    audio = gain * np.sin(2 * np.pi * 220 * time)
+    return np.stack([audio, audio], axis=1).astype(np.float32)
+
+
+def silence(seconds):
+    return np.zeros((int(seconds * sample_rate), 2), dtype=np.float32)
+
+
+class FakeWorker:
+    # The stems are the compacted input itself, like a model that hands back what it was given
+    normalization = 0.9
+    amplification = 0.6
+
+    def __init__(self):
+        self.encoder = EncoderPool(1)
+
+    def process(self, audio_file, model, output_dir, output_format, params, amplification=None, capture=False, **options):
+        assert capture
+        audio, rate = sf.read(audio_file, always_2d=True, dtype="float32")
+        return {"Vocals": (rate, audio)}
+
+
+def test_short_pauses_stay_and_long_silence_is_cut():
+    audio = np.concatenate([silence(3), tone(3), silence(0.5), tone(2.5), silence(6)])
+    regions = active_regions(audio, sample_rate, min_silence=2.0, padding=0.5)
+
+    assert regions == [(int(2.5 * sample_rate), int(9.5 * sample_rate))]
+
+
+def test_all_silence_has_no_regions():
+    assert active_regions(silence(5), sample_rate) == []
+
+
+def test_timeline_is_restored_at_the_model_rate():
+    regions = [(1000, 3000), (6000, 7000)]
+    compact = np.arange(3000 * 2, dtype=np.float32).reshape(-1, 1)
+    timeline = restore_timeline(compact, regions, 8000, 2)
+
+    assert len(timeline) == 16000
+    assert np.array_equal(timeline[2000:6000], compact[:4000])
+    assert np.array_equal(timeline[12000:14000], compact[4000:])
+    assert not timeline[:2000].any() and not timeline[6000:12000].any() and not timeline[14000:].any()
+
+
+def test_quiet_stems_get_the_default_amplification(tmp_path):
+    input_file = tmp_path / "input.wav"
+    sf.write(input_file, np.concatenate([silence(4), tone(3, gain=0.1), silence(4)]), sample_rate, subtype="FLOAT")
+    timer = JobTimer()
+
+    files = separate_active(FakeWorker(), str(input_file), "model.onnx", str(tmp_path / "out"), "wav", {}, timer=timer).result()
+    stem, rate = sf.read(files[0], always_2d=True)
+
+    assert timer.skipped_seconds > 6
+    assert len(stem) == 11 * sample_rate
+    assert abs(np.abs(stem).max() - 0.6) < 1e-3
@@ -0,0 +1,56 @@
+import numpy as np
+import soundfile as sf
+from core.streaming import stream_separate
+
+sample_rate = 8000
+
+
+class FakeWorker:
+    # Instrumental is the input as it is, Vocals are only returned for windows that aren't silent
+    def separate(self, audio_file, model, output_dir, output_format, params, capture=False, **options):
+        assert capture
+        audio, rate = sf.read(audio_file, always_2d=True, dtype="float32")
+        stems = {"Instrumental": (rate, audio)}
+
+        if np.abs(audio).max() > 0:
+            stems["Vocals"] = (rate, audio * 0.5)
+
+        return stems
+
+
+def write_input(path, seconds, silent=()):
+    time = np.arange(seconds * sample_rate) / sample_rate
+    audio = 0.5 * np.sin(2 * np.pi * 220 * time)
+    # A quiet stretch, a window that only covers it would be normalised way up
+    audio[int(seconds / 2 * sample_rate):] *= 0.1
+
+    for start, end in silent:
+        audio[start * sample_rate:end * sample_rate] = 0
+
+    sf.write(path, np.stack([audio, audio], axis=1), sample_rate, subtype="FLOAT")
+    return audio
+
+
+def stream(tmp_path, input_file):
+    output_dir = tmp_path / "out"
+    chunks = list(stream_separate(FakeWorker(), str(input_file), "model", str(output_dir), "wav", {}, chunk_seconds=3, overlap_seconds=1))
+    return chunks, {stem: sf.read(output_dir / f"{stem}.wav", always_2d=True)[0] for stem in ("Instrumental", "Vocals")}
+
+
+def test_stems_missing_from_windows_keep_the_timeline(tmp_path):
+    input_file = tmp_path / "input.wav"
+    audio = write_input(input_file, 20, silent=[(0, 8), (12, 16)])
+    chunks, stems = stream(tmp_path, input_file)
+
+    assert len(stems["Instrumental"]) == len(stems["Vocals"]) == len(audio)
+    assert np.allclose(stems["Vocals"][:, 0], audio * 0.5, atol=1e-3)
+    # Every streamed chunk carries both stems with the same length once Vocals were first seen
+    assert all(len(chunk["Vocals"][1]) == len(chunk["Instrumental"][1]) for chunk in chunks if "Vocals" in chunk)
+
+
+def test_windows_keep_the_gain_of_the_input(tmp_path):
+    input_file = tmp_path / "input.wav"
+    audio = write_input(input_file, 12)
+    _, stems = stream(tmp_path, input_file)
+
+    assert np.allclose(stems["Instrumental"][:, 0], audio, atol=1e-3)
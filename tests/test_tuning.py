@@ -0,0 +1,28 @@
+import time
+import numpy as np
+import soundfile as sf
+from types import SimpleNamespace
+from core.tuning import SegmentTuner
+
+timings = {"64": 0.04, "128": 0.02, "256": 0.01, "512": 0.03}
+
+
+def tuned(tmp_path, memory, budget):
+    tuner = SegmentTuner(str(tmp_path), budget=budget)
+    tuner.profiles["model.ckpt"] = {"host": tuner.host, "seconds_per_second": timings, "memory": memory, "calibrated_at": time.time()}
+    audio_file = tmp_path / "input.wav"
+    sf.write(audio_file, np.zeros((44100 * 10, 2), dtype=np.float32), 44100)
+    separator = SimpleNamespace(model_instance=SimpleNamespace(overlap=2))
+    return tuner.segment_size(separator, "model.ckpt", {}, str(audio_file))
+
+
+def test_fastest_segment_that_fits_the_budget(tmp_path):
+    # 1 MB per segment step, 256 would need 356 MB
+    memory = [100e6, 1e6, 0.0]
+
+    assert tuned(tmp_path, memory, budget=1e9) == 256
+    assert tuned(tmp_path, memory, budget=300e6) == 128
+
+
+def test_smallest_segment_without_memory_measurements(tmp_path):
+    assert tuned(tmp_path, None, budget=1e9) == 64